@@ -0,0 +1,255 @@
+"""Admission control for LLM calls.
+
+Every chat turn used to call Gemini as soon as it arrived, so a burst of
+users turned straight into provider 429s and failed turns. The
+``AdmissionController`` sits in front of the call instead:
+
+* at most ``max_concurrency`` calls in flight, and ``per_user`` per signed-in
+  user (``DEFAULT_USER`` is every unauthenticated session at once, so only
+  the global limit applies to it),
+* an optional token bucket (``rate_per_minute``) matching the provider quota,
+* callers beyond that wait in a FIFO queue of at most ``max_queue`` entries,
+  for at most ``timeout`` seconds, instead of failing right away,
+* queue depth, wait times and rejections are counted for ``stats()``.
+
+Sync callers (Streamlit, ``chatbot.stream``) use ``admit()``; coroutines on the
+event loop use ``aadmit()``. Both share one set of slots and one queue, so a
+process serving either kind of traffic has a single limit.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from thread_registry import DEFAULT_USER
+
+DEFAULT_CONCURRENCY = int(os.getenv("CHATBOT_LLM_CONCURRENCY", "8"))
+# 0 disables the per-user limit
+DEFAULT_PER_USER = int(os.getenv("CHATBOT_LLM_PER_USER", "2"))
+DEFAULT_QUEUE = int(os.getenv("CHATBOT_LLM_QUEUE", "64"))
+DEFAULT_TIMEOUT = float(os.getenv("CHATBOT_LLM_QUEUE_TIMEOUT", "30"))
+# requests per minute the provider allows; 0 disables the token bucket
+DEFAULT_RPM = float(os.getenv("CHATBOT_LLM_RPM", "0"))
+
+
+class AdmissionError(RuntimeError):
+    """The call was not admitted; the caller should ask the user to retry."""
+
+
+class QueueFullError(AdmissionError):
+    pass
+
+
+class AdmissionTimeout(AdmissionError):
+    pass
+
+
+class _Waiter:
+    __slots__ = ("user_id", "wake", "granted")
+
+    def __init__(self, user_id, wake):
+        self.user_id = user_id
+        self.wake = wake
+        self.granted = False
+
+
+class AdmissionController:
+    """Global and per-user concurrency limits with a bounded wait queue."""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, per_user=DEFAULT_PER_USER,
+                 max_queue=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT, rate_per_minute=DEFAULT_RPM):
+        self.max_concurrency = max_concurrency
+        self.per_user = per_user
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.limiter = None
+        if rate_per_minute:
+            from http_client import RateLimiter
+
+            self.limiter = RateLimiter.per_minute(rate_per_minute)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._by_user = Counter()
+        self._waiters = deque()
+        self._stats = Counter()
+        self._max_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # -- slots ---------------------------------------------------------------
+
+    def _under_user_limit(self, user_id):
+        return not self.per_user or user_id == DEFAULT_USER or self._by_user[user_id] < self.per_user
+
+    def _can_run(self, user_id):
+        return self._active < self.max_concurrency and self._under_user_limit(user_id)
+
+    def _grant(self, user_id):
+        self._active += 1
+        self._by_user[user_id] += 1
+
+    def _dispatch(self):
+        # Hand free slots to queued callers in arrival order, skipping users
+        # that are at their own limit. Afterwards no queued caller could run,
+        # so a newcomer that can run never overtakes one that waits.
+        for waiter in list(self._waiters):
+            if self._active >= self.max_concurrency:
+                break
+            if self._can_run(waiter.user_id):
+                self._waiters.remove(waiter)
+                self._grant(waiter.user_id)
+                waiter.granted = True
+                waiter.wake()
+
+    def _enqueue(self, user_id, wake):
+        """Take a slot now (returns ``None``) or queue a waiter; caller holds the lock."""
+        if self._can_run(user_id):
+            self._grant(user_id)
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise QueueFullError("too many requests waiting for the model, try again shortly")
+        waiter = _Waiter(user_id, wake)
+        self._waiters.append(waiter)
+        self._max_depth = max(self._max_depth, len(self._waiters))
+        return waiter
+
+    def _give_up(self, waiter):
+        """Leave the queue after a timeout; True if the slot arrived meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self._stats["timed_out"] += 1
+        return False
+
+    def _admitted(self, waited, queued):
+        with self._lock:
+            self._stats["admitted"] += 1
+            self._stats["queued"] += queued
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def release(self, user_id):
+        with self._lock:
+            self._active -= 1
+            self._by_user[user_id] -= 1
+            if not self._by_user[user_id]:
+                del self._by_user[user_id]
+            self._dispatch()
+
+    # -- sync ----------------------------------------------------------------
+
+    def acquire(self, user_id, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(user_id, event.set)
+        if waiter is not None and not event.wait(timeout) and not self._give_up(waiter):
+            raise AdmissionTimeout(f"no model capacity within {timeout:.0f}s, try again shortly")
+        self._take_token(user_id, start, timeout)
+        self._admitted(time.monotonic() - start, waiter is not None)
+
+    def _take_token(self, user_id, start, timeout):
+        if self.limiter is None:
+            return
+        from http_client import RateLimitedError
+
+        try:
+            self.limiter.acquire(max_wait=max(0.0, timeout - (time.monotonic() - start)))
+        except RateLimitedError:
+            self.release(user_id)
+            with self._lock:
+                self._stats["rate_limited"] += 1
+            raise AdmissionTimeout("model rate limit reached, try again shortly") from None
+
+    @contextmanager
+    def admit(self, user_id):
+        """Hold one LLM slot for ``user_id`` for the duration of the block."""
+        self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    # -- async ---------------------------------------------------------------
+
+    async def aacquire(self, user_id, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            # release() may run on another thread
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self._lock:
+            waiter = self._enqueue(user_id, wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                if not self._give_up(waiter):
+                    raise AdmissionTimeout(
+                        f"no model capacity within {timeout:.0f}s, try again shortly"
+                    ) from None
+            except asyncio.CancelledError:
+                if self._give_up(waiter):
+                    self.release(user_id)
+                raise
+        await self._atake_token(user_id, start, timeout)
+        self._admitted(time.monotonic() - start, waiter is not None)
+
+    async def _atake_token(self, user_id, start, timeout):
+        if self.limiter is None:
+            return
+        from http_client import RateLimitedError
+
+        try:
+            await self.limiter.aacquire(max_wait=max(0.0, timeout - (time.monotonic() - start)))
+        except RateLimitedError:
+            self.release(user_id)
+            with self._lock:
+                self._stats["rate_limited"] += 1
+            raise AdmissionTimeout("model rate limit reached, try again shortly") from None
+        except asyncio.CancelledError:
+            self.release(user_id)
+            raise
+
+    @asynccontextmanager
+    async def aadmit(self, user_id):
+        await self.aacquire(user_id)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    # -- metrics -------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            admitted = self._stats["admitted"]
+            return {
+                "active": self._active,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self._max_depth,
+                "admitted": admitted,
+                "queued": self._stats["queued"],
+                "rejected": self._stats["rejected"],
+                "timed_out": self._stats["timed_out"],
+                "rate_limited": self._stats["rate_limited"],
+                "avg_wait_seconds": self._wait_total / admitted if admitted else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "limits": {
+                    "concurrency": self.max_concurrency,
+                    "per_user": self.per_user,
+                    "queue": self.max_queue,
+                    "timeout": self.timeout,
+                    "rate_per_minute": self.limiter.rate * 60 if self.limiter else None,
+                },
+            }
@@ -0,0 +1,354 @@
+"""End-to-end load test of the compiled chatbot, fully offline.
+
+Gemini is replaced by ``fake_llm.FakeChatModel`` (fixed latency, scripted tool
+calls) and Alpha Vantage by ``stub_alpha_vantage``, so the run measures our
+own overhead: admission, context window, tool node, checkpointer and
+registry. N synthetic users each hold one thread and send turns back to back
+(or after ``--think`` seconds); the report has turns/sec, turn latency and
+time-to-first-token percentiles, checkpoint DB growth and process memory::
+
+    python benchmarks/bench_chatbot.py --users 32 --turns 10 --latency 0.2
+    python benchmarks/bench_chatbot.py --async --pattern stock --out after.json
+    python benchmarks/bench_chatbot.py --out after.json --baseline before.json
+
+With ``--baseline`` the run is compared to an earlier report and exits
+non-zero when throughput or p95 latency regressed by more than
+``--max-regression`` percent.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from bench_import import backend_path
+from fake_llm import PATTERNS, FakeChatModel
+import stub_alpha_vantage
+
+
+def load_backend():
+    # stock_quotes reads these on first import, i.e. on the first tool call
+    os.environ.setdefault("ALPHA_VANTAGE_CALLS_PER_MIN", "1000000")
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    spec = importlib.util.spec_from_file_location("main_backend", backend_path())
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["main_backend"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# -------------------
+# Measurements
+# -------------------
+
+def percentiles(values):
+    """Nearest-rank p50/p95/p99 and max, in milliseconds."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(q):
+        return round(ordered[max(0, math.ceil(q * len(ordered)) - 1)] * 1000, 1)
+
+    return {"p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99), "max": rank(1.0)}
+
+
+def db_size(path):
+    """Bytes on disk of the database plus its WAL and shared-memory files."""
+    return {
+        suffix or "db": os.path.getsize(path + suffix) if os.path.exists(path + suffix) else 0
+        for suffix in ("", "-wal", "-shm")
+    }
+
+
+def db_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("checkpoints", "writes", "threads")
+        }
+    finally:
+        conn.close()
+
+
+def rss_mb():
+    """Current resident set size, where the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class Recorder:
+    """Per-turn samples, shared by all user threads / tasks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.ttfts = []
+        self.errors = Counter()
+
+    def turn(self, started, first_token, error=None):
+        with self.lock:
+            if error is not None:
+                self.errors[type(error).__name__] += 1
+                return
+            self.latencies.append(time.perf_counter() - started)
+            if first_token is not None:
+                self.ttfts.append(first_token - started)
+
+
+# -------------------
+# Synthetic users
+# -------------------
+
+def user_ids(index):
+    return f"bench-user-{index}", f"bench-thread-{index}"
+
+
+def turn_input(index, turn):
+    from langchain_core.messages import HumanMessage
+
+    return {"messages": [HumanMessage(content=f"user {index} turn {turn}: how is my portfolio doing?")]}
+
+
+def turn_config(index):
+    user_id, thread_id = user_ids(index)
+    return {
+        "configurable": {"thread_id": thread_id, "user_id": user_id},
+        "metadata": {"thread_id": thread_id, "user_id": user_id},
+        "run_name": "chat_turn",
+    }
+
+
+def is_token(chunk, meta):
+    return meta.get("langgraph_node") == "chat_node" and bool(getattr(chunk, "content", None))
+
+
+def run_user(chatbot, index, turns, think, recorder):
+    for turn in range(turns):
+        started, first_token = time.perf_counter(), None
+        try:
+            for chunk, meta in chatbot.stream(
+                turn_input(index, turn), config=turn_config(index), stream_mode="messages"
+            ):
+                if first_token is None and is_token(chunk, meta):
+                    first_token = time.perf_counter()
+        except Exception as e:
+            recorder.turn(started, None, e)
+        else:
+            recorder.turn(started, first_token)
+        if think:
+            time.sleep(think)
+
+
+async def arun_user(chatbot, index, turns, think, recorder):
+    for turn in range(turns):
+        started, first_token = time.perf_counter(), None
+        try:
+            async for chunk, meta in chatbot.astream(
+                turn_input(index, turn), config=turn_config(index), stream_mode="messages"
+            ):
+                if first_token is None and is_token(chunk, meta):
+                    first_token = time.perf_counter()
+        except Exception as e:
+            recorder.turn(started, None, e)
+        else:
+            recorder.turn(started, first_token)
+        if think:
+            await asyncio.sleep(think)
+
+
+def run_sync(backend, db_path, args, recorder):
+    bot = backend.Backend(db_path)
+    try:
+        chatbot = bot.chatbot
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            for future in [
+                pool.submit(run_user, chatbot, i, args.turns, args.think, recorder)
+                for i in range(args.users)
+            ]:
+                future.result()
+    finally:
+        bot.close()
+
+
+async def run_async(backend, db_path, args, recorder):
+    async with backend.async_chatbot(db_path) as chatbot:
+        await asyncio.gather(*(
+            arun_user(chatbot, i, args.turns, args.think, recorder) for i in range(args.users)
+        ))
+
+
+# -------------------
+# Report
+# -------------------
+
+def run(args):
+    backend = load_backend()
+    backend.use_llm(FakeChatModel(
+        first_token_latency=args.latency,
+        token_latency=args.token_latency,
+        reply_tokens=args.reply_tokens,
+        pattern=args.pattern,
+    ))
+    workdir = tempfile.mkdtemp(prefix="bench_chatbot_")
+    db_path = args.db or os.path.join(workdir, "chatbot.db")
+    server, url = stub_alpha_vantage.start(latency=args.tool_latency, fail_rate=args.tool_fail_rate)
+    os.environ["ALPHA_VANTAGE_URL"] = url
+
+    recorder = Recorder()
+    size_before = db_size(db_path)
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    try:
+        if args.use_async:
+            asyncio.run(run_async(backend, db_path, args, recorder))
+        else:
+            run_sync(backend, db_path, args, recorder)
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - started
+
+    size_after = db_size(db_path)
+    turns = len(recorder.latencies)
+    growth = sum(size_after.values()) - sum(size_before.values())
+    return {
+        "config": {
+            "mode": "async" if args.use_async else "sync",
+            "users": args.users,
+            "turns_per_user": args.turns,
+            "think_seconds": args.think,
+            "pattern": args.pattern,
+            "llm_latency": args.latency,
+            "token_latency": args.token_latency,
+            "reply_tokens": args.reply_tokens,
+            "tool_latency": args.tool_latency,
+            "tool_fail_rate": args.tool_fail_rate,
+            "python": platform.python_version(),
+        },
+        "turns": turns,
+        "errors": dict(recorder.errors),
+        "seconds": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(recorder.latencies),
+        "ttft_ms": percentiles(recorder.ttfts),
+        "db": {
+            "bytes_before": size_before,
+            "bytes_after": size_after,
+            "growth_bytes": growth,
+            "growth_bytes_per_turn": round(growth / turns) if turns else None,
+            "rows": db_rows(db_path),
+        },
+        "memory_mb": {
+            "rss_before": rss_before and round(rss_before, 1),
+            "rss_after": rss_mb() and round(rss_mb(), 1),
+            "peak_rss": peak_rss_mb() and round(peak_rss_mb(), 1),
+        },
+        "admission": backend.admission_stats(),
+        "tools": backend.tool_stats(),
+    }
+
+
+# (label, path into the report, True if higher is better)
+COMPARED = [
+    ("turns/sec", ("turns_per_sec",), True),
+    ("latency p50 ms", ("latency_ms", "p50"), False),
+    ("latency p95 ms", ("latency_ms", "p95"), False),
+    ("latency p99 ms", ("latency_ms", "p99"), False),
+    ("ttft p95 ms", ("ttft_ms", "p95"), False),
+    ("db bytes/turn", ("db", "growth_bytes_per_turn"), False),
+    ("peak rss MB", ("memory_mb", "peak_rss"), False),
+]
+# regressions in these fail the run
+GATED = {"turns/sec", "latency p95 ms"}
+
+
+def _lookup(report, path):
+    for key in path:
+        if not isinstance(report, dict):
+            return None
+        report = report.get(key)
+    return report
+
+
+def compare(report, baseline, max_regression):
+    """Print old vs new for the headline numbers; returns the gated regressions."""
+    regressions = []
+    print(f"{'':16} {'baseline':>12} {'current':>12} {'change':>9}")
+    for label, path, higher_is_better in COMPARED:
+        old, new = _lookup(baseline, path), _lookup(report, path)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{label:16} {old:12} {new:12} {change:+8.1f}%")
+        worse = -change if higher_is_better else change
+        if label in GATED and worse > max_regression:
+            regressions.append(label)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=16, help="concurrent synthetic users")
+    parser.add_argument("--turns", type=int, default=5, help="turns per user")
+    parser.add_argument("--think", type=float, default=0.0, help="pause between a user's turns (s)")
+    parser.add_argument("--pattern", choices=sorted(PATTERNS), default="mixed",
+                        help="tool calls the fake model asks for")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="per streamed token (s)")
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="stub Alpha Vantage latency (s)")
+    parser.add_argument("--tool-fail-rate", type=float, default=0.0)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="drive async_chatbot() instead of the sync graph")
+    parser.add_argument("--db", help="checkpoint database (default: a fresh temp file)")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier --out report to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="allowed throughput / p95 regression vs the baseline, in percent")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    summary = {key: report[key] for key in ("turns", "errors", "seconds", "turns_per_sec", "latency_ms", "ttft_ms")}
+    print(json.dumps(summary, indent=2))
+    print(f"db growth {report['db']['growth_bytes']} bytes, memory {report['memory_mb']}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("regressed:", ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Checkpoint write throughput: shared-connection SqliteSaver vs PooledSqliteSaver.
+
+Each worker thread plays one conversation: per step it records a pending
+write, stores a checkpoint and reads the latest state back, which is the
+access pattern of one graph step plus a sidebar click.
+
+    python benchmarks/bench_checkpointer.py --seconds 5 --threads 1 8 64
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from sqlite_pool import PooledSqliteSaver
+
+
+def make_shared(path):
+    saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    return saver
+
+
+def make_pooled(path):
+    return PooledSqliteSaver(path, readers=8)
+
+
+def worker(saver, thread_id, deadline, counts, index):
+    messages = [HumanMessage(content="hello " * 20), AIMessage(content="hi there " * 40)]
+    version = None
+    done = 0
+    while time.perf_counter() < deadline:
+        version = saver.get_next_version(version, None)
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": messages}
+        checkpoint["channel_versions"] = {"messages": version}
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        written = saver.put(
+            config,
+            checkpoint,
+            {"source": "loop", "step": done, "writes": None, "parents": {}},
+            {"messages": version},
+        )
+        saver.put_writes(written, [("messages", messages[-1])], task_id=str(uuid.uuid4()))
+        saver.get_tuple({"configurable": {"thread_id": thread_id}})
+        done += 1
+    counts[index] = done
+
+
+def run(factory, n_threads, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        saver = factory(os.path.join(tmp, "bench.db"))
+        counts = [0] * n_threads
+        deadline = time.perf_counter() + seconds
+        threads = [
+            threading.Thread(target=worker, args=(saver, f"t{i}", deadline, counts, i))
+            for i in range(n_threads)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        if isinstance(saver, PooledSqliteSaver):
+            saver.close()
+        else:
+            saver.conn.close()
+    return sum(counts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'shared conn':>14} {'pooled':>14}   (checkpoints/sec)")
+    for n in args.threads:
+        shared = run(make_shared, n, args.seconds)
+        pooled = run(make_pooled, n, args.seconds)
+        print(f"{n:>8} {shared:>14.1f} {pooled:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Cold-start cost of ``import main_backend``, from ``python -X importtime``.
+
+Runs the import in a fresh interpreter (several times; the best run is
+reported, like ``timeit``), prints the total and the slowest modules, and
+checks that modules which should only load on first use did not sneak back
+into the import path. Exits non-zero on a regression, so it can gate CI:
+
+    python benchmarks/bench_import.py --budget-ms 600
+    python benchmarks/bench_import.py --json > import_times.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Must not be imported by ``import main_backend`` alone. (requests is not
+# listed: langchain_core already pulls it in through langsmith.)
+LAZY_MODULES = [
+    "langchain_google_genai",
+    "langgraph.graph",
+    "langgraph.prebuilt",
+    "langgraph.checkpoint.sqlite",
+    "httpx",
+    "stock_quotes",
+]
+
+
+def backend_path():
+    for name in ("main_backend.py", "main_backend (1) (1).py"):
+        path = os.path.join(ROOT, name)
+        if os.path.exists(path):
+            return path
+    raise SystemExit("main_backend not found next to benchmarks/")
+
+
+# Loads the backend by path (the file name is not always importable as-is)
+# and prints which of the lazy modules ended up in sys.modules.
+SNIPPET = """
+import importlib.util, json, sys
+sys.path.insert(0, {root!r})
+spec = importlib.util.spec_from_file_location("main_backend", {path!r})
+module = importlib.util.module_from_spec(spec)
+sys.modules["main_backend"] = module
+spec.loader.exec_module(module)
+print(json.dumps([m for m in {lazy!r} if m in sys.modules]))
+"""
+
+
+def parse_importtime(stderr):
+    """``{module: (self_us, cumulative_us)}`` from ``-X importtime`` output.
+
+    Names keep their indentation: unindented ones were imported directly by
+    the snippet, so their cumulative times add up to the whole import.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name[1:].rstrip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure():
+    code = SNIPPET.format(root=ROOT, path=backend_path(), lazy=LAZY_MODULES)
+    env = dict(os.environ, GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "bench"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=ROOT, env=env, check=False,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+    modules = parse_importtime(proc.stderr)
+    total_us = sum(
+        cumulative for line, (_, cumulative) in modules.items() if not line.startswith(" ")
+    )
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"total_ms": total_us / 1000, "modules": modules, "eager": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the best run is slower than this")
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["total_ms"])
+    slowest = sorted(best["modules"].items(), key=lambda item: item[1][1], reverse=True)
+    report = {
+        "best_ms": round(best["total_ms"], 1),
+        "runs_ms": [round(run["total_ms"], 1) for run in runs],
+        "slowest": [
+            {"module": name.strip(), "self_ms": self_us / 1000, "cumulative_ms": cumulative / 1000}
+            for name, (self_us, cumulative) in slowest[:args.top]
+        ],
+        "eager_heavy_modules": best["eager"],
+        "budget_ms": args.budget_ms,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import main_backend: best {report['best_ms']} ms of {report['runs_ms']}")
+        for row in report["slowest"]:
+            print(f"  {row['cumulative_ms']:9.1f} ms  {row['module']}")
+        if report["eager_heavy_modules"]:
+            print("imported eagerly:", ", ".join(report["eager_heavy_modules"]))
+
+    failed = bool(report["eager_heavy_modules"])
+    if args.budget_ms is not None and report["best_ms"] > args.budget_ms:
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
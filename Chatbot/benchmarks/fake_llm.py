@@ -0,0 +1,127 @@
+"""Deterministic stand-in for ``ChatGoogleGenerativeAI``.
+
+Answers without network or quota, with configurable latency, so the graph,
+tools, checkpointer and UI plumbing can be load-tested offline::
+
+    from fake_llm import FakeChatModel
+    main_backend.use_llm(FakeChatModel(first_token_latency=0.3, pattern="mixed"))
+
+For each user message the model first requests the tool calls of the
+pattern (picked from the message text, so reruns are identical), and once
+the tool results are in it streams a reply of ``reply_tokens`` tokens.
+Usage metadata is reported like a real provider.
+"""
+
+import asyncio
+import time
+import zlib
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+SYMBOLS = ["AAPL", "MSFT", "TSLA", "GOOG", "AMZN", "NVDA", "META", "IBM"]
+
+# tool calls requested for one user message, by pattern
+PATTERNS = {
+    "chat": [[]],
+    "stock": [["get_stock_price"]],
+    "batch": [["get_stock_prices"]],
+    "calc": [["calculator", "calculator"]],
+    "mixed": [[], ["get_stock_price"], ["calculator"], ["get_stock_prices", "calculator"]],
+}
+
+
+def _tool_args(name, seed):
+    if name == "get_stock_price":
+        return {"symbol": SYMBOLS[seed % len(SYMBOLS)]}
+    if name == "get_stock_prices":
+        return {"symbols": [SYMBOLS[(seed + i) % len(SYMBOLS)] for i in range(3)]}
+    return {"first_num": seed % 97, "second_num": seed % 13 + 1, "operation": "mul"}
+
+
+class FakeChatModel(BaseChatModel):
+    first_token_latency: float = 0.2
+    token_latency: float = 0.01
+    reply_tokens: int = 40
+    pattern: str = "mixed"
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages):
+        """The next message: tool calls after a user turn, text after tool results."""
+        last_human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        text = last_human.content if last_human is not None else ""
+        seed = zlib.crc32(str(text).encode())
+        if not isinstance(messages[-1], ToolMessage):
+            calls = PATTERNS[self.pattern][seed % len(PATTERNS[self.pattern])]
+            if calls:
+                return AIMessage(content="", tool_calls=[
+                    {"name": name, "args": _tool_args(name, seed + i), "id": f"call_{seed:x}_{i}"}
+                    for i, name in enumerate(calls)
+                ])
+        return AIMessage(content=" ".join(f"word{(seed + i) % 1000}" for i in range(self.reply_tokens)))
+
+    def _usage(self, messages, output_tokens):
+        prompt = sum(len(str(m.content)) for m in messages) // 4
+        return {"input_tokens": prompt, "output_tokens": output_tokens, "total_tokens": prompt + output_tokens}
+
+    def _chunks(self, messages):
+        reply = self._respond(messages)
+        if reply.tool_calls:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": repr(c["args"]).replace("'", '"'), "id": c["id"], "index": i}
+                    for i, c in enumerate(reply.tool_calls)
+                ],
+                usage_metadata=self._usage(messages, len(reply.tool_calls) * 8),
+            )
+            return
+        words = reply.content.split(" ")
+        for i, word in enumerate(words):
+            yield AIMessageChunk(
+                content=word if i == 0 else " " + word,
+                usage_metadata=self._usage(messages, len(words)) if i == 0 else None,
+            )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_latency)
+        reply = self._respond(messages)
+        if not reply.tool_calls:
+            time.sleep(self.token_latency * self.reply_tokens)
+        reply.usage_metadata = self._usage(messages, len(reply.tool_calls) * 8 or self.reply_tokens)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        reply = self._respond(messages)
+        if not reply.tool_calls:
+            await asyncio.sleep(self.token_latency * self.reply_tokens)
+        reply.usage_metadata = self._usage(messages, len(reply.tool_calls) * 8 or self.reply_tokens)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_latency)
+        for i, message in enumerate(self._chunks(messages)):
+            if i:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        for i, message in enumerate(self._chunks(messages)):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                await run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
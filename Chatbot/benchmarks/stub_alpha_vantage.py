@@ -0,0 +1,84 @@
+"""Local stand-in for the Alpha Vantage GLOBAL_QUOTE endpoint.
+
+Point the backend at it with ``ALPHA_VANTAGE_URL=http://127.0.0.1:<port>/query``.
+Prices are derived from the symbol so runs are reproducible; latency and a
+failure rate can be injected to exercise timeouts, retries and the breaker.
+
+    python benchmarks/stub_alpha_vantage.py --port 8765 --latency 0.05 --fail-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def quote(symbol):
+    seed = zlib.crc32(symbol.encode())
+    price = 50 + seed % 45000 / 100
+    change = (seed % 1000 - 500) / 100
+    return {
+        "Global Quote": {
+            "01. symbol": symbol,
+            "02. open": f"{price - change:.4f}",
+            "05. price": f"{price:.4f}",
+            "06. volume": str(seed % 10_000_000),
+            "07. latest trading day": time.strftime("%Y-%m-%d"),
+            "08. previous close": f"{price - change:.4f}",
+            "09. change": f"{change:.4f}",
+            "10. change percent": f"{change / (price - change) * 100:.4f}%",
+        }
+    }
+
+
+def make_handler(latency=0.0, fail_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_GET(self):
+            Handler.requests_served += 1
+            if latency:
+                time.sleep(latency)
+            if fail_rate and random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            params = parse_qs(urlparse(self.path).query)
+            symbol = params.get("symbol", [""])[0].upper()
+            body = json.dumps(quote(symbol) if symbol else {"Error Message": "symbol required"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start(port=0, latency=0.0, fail_rate=0.0):
+    """Serve in a daemon thread; returns ``(server, url)``. Call ``server.shutdown()`` to stop."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, fail_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/query"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.fail_rate))
+    print(f"stub Alpha Vantage on http://127.0.0.1:{args.port}/query")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
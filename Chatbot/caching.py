@@ -0,0 +1,276 @@
+"""Result caches for tools and (optionally) LLM responses.
+
+* ``cached`` memoizes a tool function with a per-tool TTL and size limit.
+  Apply it under ``@tool`` so the tool schema still comes from the original
+  signature and docstring.
+* ``SingleFlight`` / ``AsyncSingleFlight`` collapse concurrent calls for the
+  same key into one upstream request.
+* ``SqliteLLMCache`` is a LangChain ``BaseCache`` stored in chatbot.db. Chat
+  models look it up with the serialized message list (the whole history
+  plus the new message) and the model parameters, so an identical turn is
+  answered without a Gemini call.
+
+Every cache counts hits and misses; ``cache_stats()`` reports them.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+_MISSING = object()
+
+# name -> TTLCache, for cache_stats()
+TOOL_CACHES = {}
+
+
+class TTLCache:
+    """Thread-safe LRU with an optional time-to-live per entry."""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=_MISSING):
+        with self._lock:
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+def _is_cacheable(result):
+    return not (isinstance(result, dict) and "error" in result)
+
+
+def cached(ttl=None, maxsize=128, key=None, cache_if=_is_cacheable):
+    """Memoize a (sync or async) function.
+
+    ``key`` maps the call arguments to a cache key (defaults to the arguments
+    themselves); ``cache_if`` decides whether a result may be stored, so
+    error payloads are retried next time instead of being replayed.
+    """
+
+    def decorator(func):
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        TOOL_CACHES[func.__name__] = cache
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple(bound.arguments.items())
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = make_key(args, kwargs)
+                value = cache.get(cache_key)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    if cache_if(value):
+                        cache.put(cache_key, value)
+                return value
+
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = make_key(args, kwargs)
+            value = cache.get(cache_key)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                if cache_if(value):
+                    cache.put(cache_key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+class SingleFlight:
+    """Deduplicate in-flight calls: callers with the same key share one result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines running on one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func(*args, **kwargs))
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+# Generations are stored as plain JSON rather than through langchain_core.load,
+# whose loads() is a beta API that warns on every call and revives arbitrary
+# serialized classes; only messages and generation info are kept.
+def _dump_generation(generation):
+    item = {"text": generation.text, "generation_info": generation.generation_info}
+    if isinstance(generation, ChatGeneration):
+        item["message"] = message_to_dict(generation.message)
+    return item
+
+
+def _load_generation(item):
+    if "message" in item:
+        message = messages_from_dict([item["message"]])[0]
+        return ChatGeneration(message=message, generation_info=item.get("generation_info"))
+    return Generation(text=item["text"], generation_info=item.get("generation_info"))
+
+
+class SqliteLLMCache(BaseCache):
+    """Exact-match LLM response cache in an ``llm_cache`` table."""
+
+    def __init__(self, path="chatbot.db", ttl=None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        query = "SELECT generations FROM llm_cache WHERE key = ?"
+        params = [self._key(prompt, llm_string)]
+        if self.ttl:
+            query += " AND created_at > ?"
+            params.append(time.time() - self.ttl)
+        with self.lock:
+            row = self.conn.execute(query, params).fetchone()
+        try:
+            generations = [_load_generation(item) for item in json.loads(row[0])] if row else None
+        except (KeyError, TypeError, ValueError):
+            # rows written in another format count as misses and get replaced
+            generations = None
+        with self.lock:
+            if generations is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        generations = json.dumps([_dump_generation(g) for g in return_val], default=str)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, generations, created_at) VALUES (?, ?, ?)",
+                (self._key(prompt, llm_string), generations, time.time()),
+            )
+            self.conn.commit()
+
+    def clear(self, **kwargs):
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            entries = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "ttl": self.ttl,
+        }
+
+
+def tool_cache_stats():
+    return {name: cache.stats() for name, cache in TOOL_CACHES.items()}
@@ -0,0 +1,156 @@
+"""In-memory LRU hot tier in front of the SQLite checkpointer.
+
+Switching conversations in the sidebar calls ``chatbot.get_state`` which
+means reading and deserializing the latest checkpoint blob. ``TieredSaver``
+keeps the latest checkpoint of recently used threads in memory, bounded by
+(serialized) bytes, and writes through to the wrapped saver, so revisiting a
+thread costs no disk I/O.
+"""
+
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.base import CheckpointTuple, get_checkpoint_id
+
+try:
+    from langgraph.checkpoint.base import get_checkpoint_metadata
+except ImportError:  # older langgraph stores the metadata exactly as given
+    def get_checkpoint_metadata(config, metadata):
+        return metadata
+
+from checkpointing import DelegatingSaver, checkpoint_size
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _key(config):
+    configurable = config["configurable"]
+    return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+
+class TieredSaver(DelegatingSaver):
+    """Write-through checkpointer with a byte-bounded LRU of latest states."""
+
+    def __init__(self, backend, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(backend)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._cache_lock = threading.Lock()
+
+    # cache bookkeeping
+
+    def _lookup(self, config):
+        wanted = get_checkpoint_id(config)
+        with self._cache_lock:
+            entry = self._entries.get(_key(config))
+            if entry is not None and wanted in (None, entry[0].checkpoint["id"]):
+                self._entries.move_to_end(_key(config))
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def _store(self, key, checkpoint_tuple):
+        size = checkpoint_size(self.serde, checkpoint_tuple.checkpoint)
+        with self._cache_lock:
+            self._evict(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (checkpoint_tuple, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+
+    def _evict(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _invalidate(self, config):
+        with self._cache_lock:
+            self._evict(_key(config))
+
+    def _invalidate_thread(self, thread_id):
+        with self._cache_lock:
+            for key in [k for k in self._entries if k[0] == str(thread_id)]:
+                self._evict(key)
+
+    def _written(self, config, next_config, checkpoint, metadata):
+        parent_id = config["configurable"].get("checkpoint_id")
+        parent_config = None
+        if parent_id:
+            parent_config = {
+                "configurable": {
+                    "thread_id": config["configurable"]["thread_id"],
+                    "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+                    "checkpoint_id": parent_id,
+                }
+            }
+        return CheckpointTuple(
+            next_config, checkpoint, get_checkpoint_metadata(config, metadata), parent_config, []
+        )
+
+    def stats(self):
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # sync
+
+    def get_tuple(self, config):
+        cached = self._lookup(config)
+        if cached is not None:
+            return cached
+        checkpoint_tuple = super().get_tuple(config)
+        if checkpoint_tuple is not None and get_checkpoint_id(config) is None:
+            self._store(_key(config), checkpoint_tuple)
+        return checkpoint_tuple
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._store(_key(config), self._written(config, next_config, checkpoint, metadata))
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        # pending writes change what get_tuple returns; reload on next read
+        self._invalidate(config)
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        self._invalidate_thread(thread_id)
+
+    # async
+
+    async def aget_tuple(self, config):
+        cached = self._lookup(config)
+        if cached is not None:
+            return cached
+        checkpoint_tuple = await super().aget_tuple(config)
+        if checkpoint_tuple is not None and get_checkpoint_id(config) is None:
+            self._store(_key(config), checkpoint_tuple)
+        return checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        next_config = await super().aput(config, checkpoint, metadata, new_versions)
+        self._store(_key(config), self._written(config, next_config, checkpoint, metadata))
+        return next_config
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await super().aput_writes(config, writes, task_id, task_path)
+        self._invalidate(config)
+
+    async def adelete_thread(self, thread_id):
+        await super().adelete_thread(thread_id)
+        self._invalidate_thread(thread_id)
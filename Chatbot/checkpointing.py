@@ -0,0 +1,105 @@
+"""Building blocks for layering behaviour on top of a LangGraph checkpointer."""
+
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+SIZE_MEMO_ENTRIES = 1024
+
+_sizes = OrderedDict()
+_sizes_lock = threading.Lock()
+
+
+def remember_size(checkpoint_id, size):
+    """Record the serialized size of a checkpoint someone just wrote or read."""
+    if checkpoint_id is None:
+        return
+    with _sizes_lock:
+        _sizes[checkpoint_id] = size
+        _sizes.move_to_end(checkpoint_id)
+        if len(_sizes) > SIZE_MEMO_ENTRIES:
+            _sizes.popitem(last=False)
+
+
+def checkpoint_size(serde, checkpoint):
+    """Serialized size of ``checkpoint`` in bytes, memoized by checkpoint id.
+
+    Several layers want the size of the same checkpoint (the metrics probe,
+    the hot tier's byte budget); a checkpoint id never changes content, so
+    the size seen when the storage saver wrote or read it (``remember_size``)
+    is reused, and it is only serialized again for sizing on a miss.
+    """
+    key = checkpoint.get("id")
+    with _sizes_lock:
+        size = _sizes.get(key)
+        if size is not None:
+            _sizes.move_to_end(key)
+            return size
+    size = len(serde.dumps_typed(checkpoint)[1])
+    remember_size(key, size)
+    return size
+
+
+class DelegatingSaver(BaseCheckpointSaver):
+    """Checkpointer that forwards every call to ``backend``.
+
+    Subclasses override only the methods they care about (``put``,
+    ``get_tuple`` ...) and call ``super()`` to reach the wrapped saver.
+    """
+
+    def __init__(self, backend: BaseCheckpointSaver):
+        super().__init__(serde=backend.serde)
+        self.backend = backend
+
+    def __getattr__(self, name):
+        # setup(), conn, lock ... of the concrete saver
+        return getattr(self.backend, name)
+
+    @property
+    def config_specs(self):
+        return self.backend.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.backend.get_next_version(current, channel)
+
+    # sync
+
+    def get_tuple(self, config):
+        return self.backend.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.backend.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self.backend.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self.backend.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        return self.backend.delete_thread(thread_id)
+
+    def get_delta_channel_history(self, **kwargs):
+        return self.backend.get_delta_channel_history(**kwargs)
+
+    # async
+
+    async def aget_tuple(self, config):
+        return await self.backend.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async for item in self.backend.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self.backend.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await self.backend.aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await self.backend.adelete_thread(thread_id)
+
+    async def aget_delta_channel_history(self, **kwargs):
+        return await self.backend.aget_delta_channel_history(**kwargs)
@@ -0,0 +1,139 @@
+"""Token-budgeted context for ``chat_node``.
+
+The checkpoint keeps the full conversation for display, but the prompt only
+carries a rolling summary plus the most recent turns that fit the budget.
+The summary lives in ``ChatState`` together with the number of messages it
+already covers, so each refresh only folds in the turns that dropped out of
+the window since last time.
+"""
+
+import os
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("CHATBOT_CONTEXT_TOKENS", "8000"))
+# Tags that keep the summarizer's tokens out of stream_mode="messages"
+NOSTREAM_TAGS = ["nostream", "langsmith:nostream"]
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Extend the existing summary with the new messages below. Keep facts, numbers, tool "
+    "results and open questions; drop pleasantries. Reply with the updated summary only.\n\n"
+    "Existing summary:\n{summary}\n\nNew messages:\n{transcript}"
+)
+
+
+def approx_tokens(messages):
+    """Cheap token estimate (~4 characters per token plus per-message overhead)."""
+    total = 0
+    for msg in messages:
+        content = msg.content if isinstance(msg.content, str) else str(msg.content)
+        total += len(content) // 4 + 4
+        for call in getattr(msg, "tool_calls", None) or []:
+            total += len(str(call.get("args", ""))) // 4 + 8
+    return total
+
+
+def _transcript(messages):
+    lines = []
+    for msg in messages:
+        content = msg.content if isinstance(msg.content, str) else str(msg.content)
+        if content:
+            lines.append(f"{msg.type}: {content}")
+    return "\n".join(lines)
+
+
+class ContextWindow:
+    """Decide what part of the history goes into the prompt.
+
+    ``token_budget`` caps the prompt; when it is exceeded, everything older
+    than the newest ``recent_tokens`` worth of turns is folded into the
+    summary. Cuts always land on a user message so tool calls stay paired
+    with their results.
+    """
+
+    def __init__(self, summarizer, token_budget=DEFAULT_TOKEN_BUDGET, recent_tokens=None,
+                 token_counter=approx_tokens):
+        # a zero-argument factory defers creating the model until the first summary
+        self._summarizer = None
+        self._make_summarizer = summarizer
+        if isinstance(summarizer, Runnable):
+            self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.recent_tokens = recent_tokens or token_budget // 2
+        self.count_tokens = token_counter
+
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            self.summarizer = self._make_summarizer()
+        return self._summarizer
+
+    @summarizer.setter
+    def summarizer(self, model):
+        self._summarizer = model.with_config(tags=NOSTREAM_TAGS, run_name="summarize_history")
+
+    def _prompt(self, messages, summary, start):
+        prompt = list(messages[start:])
+        if summary:
+            prompt.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        return prompt
+
+    def _cut(self, messages, start):
+        """Index of the oldest message to keep verbatim."""
+        used = 0
+        cut = len(messages)
+        for i in range(len(messages) - 1, start - 1, -1):
+            used += self.count_tokens([messages[i]])
+            if used > self.recent_tokens:
+                break
+            cut = i
+        # move forward to a turn boundary, but always keep the latest user turn
+        while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+            cut += 1
+        if cut == len(messages):
+            cut = max(
+                (i for i in range(start, len(messages)) if isinstance(messages[i], HumanMessage)),
+                default=start,
+            )
+        return max(cut, start)
+
+    def _needs_refresh(self, state):
+        messages = state["messages"]
+        start = state.get("summarized_count", 0)
+        prompt = self._prompt(messages, state.get("summary", ""), start)
+        if self.count_tokens(prompt) <= self.token_budget:
+            return None, prompt
+        cut = self._cut(messages, start)
+        if cut <= start:
+            return None, prompt
+        return cut, None
+
+    def _summary_request(self, state, cut):
+        start = state.get("summarized_count", 0)
+        return [HumanMessage(content=SUMMARY_PROMPT.format(
+            summary=state.get("summary") or "(none)",
+            transcript=_transcript(state["messages"][start:cut]),
+        ))]
+
+    def prepare(self, state):
+        """Return ``(prompt_messages, state_update)`` for the next LLM call."""
+        cut, prompt = self._needs_refresh(state)
+        if cut is None:
+            return prompt, {}
+        summary = self.summarizer.invoke(self._summary_request(state, cut)).content
+        return (
+            self._prompt(state["messages"], summary, cut),
+            {"summary": summary, "summarized_count": cut},
+        )
+
+    async def aprepare(self, state):
+        cut, prompt = self._needs_refresh(state)
+        if cut is None:
+            return prompt, {}
+        summary = (await self.summarizer.ainvoke(self._summary_request(state, cut))).content
+        return (
+            self._prompt(state["messages"], summary, cut),
+            {"summary": summary, "summarized_count": cut},
+        )
@@ -0,0 +1,303 @@
+"""Shared HTTP clients for backend tools.
+
+Tools used to call ``requests.get(url)`` directly: a new TCP+TLS handshake
+per call, no timeout, no retry. ``HttpClient`` (sync, ``requests``) and
+``AsyncHttpClient`` (async, ``httpx``) add:
+
+* keep-alive connection pooling,
+* separate connect/read timeouts,
+* retries with jittered exponential backoff on connection errors, 429 and 5xx,
+* a circuit breaker that fails fast while the upstream is down,
+* a token-bucket rate limiter matching the upstream quota.
+
+Failures surface as ``HttpClientError`` so tools can turn them into the
+``{"error": ...}`` payloads the model already understands.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpClientError(Exception):
+    """Request failed after retries (or was refused locally)."""
+
+
+class CircuitOpenError(HttpClientError):
+    """The circuit breaker is open; the upstream was not called."""
+
+
+class RateLimitedError(HttpClientError):
+    """No rate-limit token became available within ``max_wait``."""
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open, calls fail immediately. After ``reset_timeout`` seconds one
+    trial call is let through (half-open); success closes the circuit again.
+    A trial that ends without a verdict (rate limited, cancelled, any other
+    exception) must call ``end_trial`` so the next call can try instead.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def admit(self):
+        """``None`` if the call is refused, else whether it is the half-open trial."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return True
+
+    def allow(self):
+        return self.admit() is not None
+
+    def end_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` tokens per second, up to ``burst`` banked."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls, burst=None):
+        return cls(calls / 60.0, burst=burst or calls)
+
+    def _reserve(self):
+        """Take a token if one is available, else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, max_wait=None):
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitedError("rate limit reached, try again shortly")
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait=None):
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitedError("rate limit reached, try again shortly")
+            await asyncio.sleep(wait)
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _RetryPolicy:
+    def __init__(self, retries, backoff_base, backoff_cap, breaker, limiter, max_wait):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.max_wait = max_wait
+
+    def check_circuit(self, url):
+        """Raise if the circuit is open; True if this call is the half-open trial."""
+        trial = self.breaker.admit()
+        if trial is None:
+            raise CircuitOpenError(f"circuit open for {url}; upstream is failing")
+        return trial
+
+    def delay(self, attempt):
+        return backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+
+
+class HttpClient(_RetryPolicy):
+    """Pooled ``requests`` session with timeouts, retries, breaker and limiter."""
+
+    def __init__(
+        self,
+        *,
+        pool_size=20,
+        connect_timeout=3.05,
+        read_timeout=10.0,
+        retries=3,
+        backoff_base=0.5,
+        backoff_cap=8.0,
+        breaker=None,
+        limiter=None,
+        max_wait=15.0,
+        headers=None,
+    ):
+        super().__init__(retries, backoff_base, backoff_cap, breaker, limiter, max_wait)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        trial = self.check_circuit(url)
+        try:
+            return self._request(method, url, **kwargs)
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    def _request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire(self.max_wait)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                last_error = HttpClientError(f"{response.status_code} from {url}")
+            if attempt < self.retries:
+                time.sleep(self.delay(attempt))
+        self.breaker.record_failure()
+        raise HttpClientError(f"{method} {url} failed after {self.retries + 1} attempts: {last_error}")
+
+    def get_json(self, url, **kwargs):
+        try:
+            return self.request("GET", url, **kwargs).json()
+        except requests.RequestException as e:
+            raise HttpClientError(str(e)) from e
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpClient(_RetryPolicy):
+    """``httpx.AsyncClient`` counterpart of :class:`HttpClient`.
+
+    The underlying client is created lazily so it binds to the running loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size=100,
+        connect_timeout=3.05,
+        read_timeout=10.0,
+        retries=3,
+        backoff_base=0.5,
+        backoff_cap=8.0,
+        breaker=None,
+        limiter=None,
+        max_wait=15.0,
+        headers=None,
+    ):
+        super().__init__(retries, backoff_base, backoff_cap, breaker, limiter, max_wait)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size // 5 or 1)
+        self.headers = headers or {}
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, headers=self.headers)
+        return self._client
+
+    async def request(self, method, url, **kwargs):
+        trial = self.check_circuit(url)
+        try:
+            return await self._request(method, url, **kwargs)
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    async def _request(self, method, url, **kwargs):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                await self.limiter.aacquire(self.max_wait)
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                last_error = HttpClientError(f"{response.status_code} from {url}")
+            if attempt < self.retries:
+                await asyncio.sleep(self.delay(attempt))
+        self.breaker.record_failure()
+        raise HttpClientError(f"{method} {url} failed after {self.retries + 1} attempts: {last_error}")
+
+    async def get_json(self, url, **kwargs):
+        try:
+            return (await self.request("GET", url, **kwargs)).json()
+        except httpx.HTTPError as e:
+            raise HttpClientError(str(e)) from e
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,15 +1,28 @@
-from langgraph.graph import StateGraph, START, END
-from typing import TypedDict, Annotated
+from typing import TypedDict, Annotated, Literal, Optional
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.checkpoint.sqlite import SqliteSaver
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
 # from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 import sqlite3
-import requests
+import sys
+import threading
+
+import retention
+from context_window import ContextWindow
+from caching import cached, SqliteLLMCache, tool_cache_stats
+from tool_executor import ParallelToolNode
+from thread_registry import DEFAULT_USER, user_of
+from admission import AdmissionController
+from metrics import METRICS, InstrumentedSaver, MetricsCallbackHandler
+import os
+
+# Heavy modules (langchain_google_genai, langgraph.graph / prebuilt, the SQLite
+# savers, httpx via stock_quotes / task_client) are imported where they are
+# first needed, so importing this module stays cheap for Streamlit cold starts
+# and tests. Track it with ``python benchmarks/bench_import.py``.
 
 
 load_dotenv()
@@ -18,7 +31,41 @@ load_dotenv()
 # 1. LLM
 # -------------------
 
-llm=ChatGoogleGenerativeAI(model='gemini-2.5-flash')
+DB_PATH = "chatbot.db"
+
+# Created on first use (the first chat turn), not at import / first page load.
+llm = None
+llm_with_tools = None
+# Opt-in exact-match response cache (CHATBOT_LLM_CACHE=1), stored in chatbot.db
+llm_cache = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """The shared Gemini client; built once per process, thread-safe."""
+    global llm, llm_with_tools, llm_cache
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                if os.getenv("CHATBOT_LLM_CACHE") == "1":
+                    llm_cache = SqliteLLMCache(DB_PATH)
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                client = ChatGoogleGenerativeAI(model='gemini-2.5-flash', cache=llm_cache)
+                llm_with_tools = client.bind_tools(tools)
+                llm = client
+    return llm
+
+def get_llm_with_tools():
+    get_llm()
+    return llm_with_tools
+
+def use_llm(model):
+    """Swap in another chat model, e.g. ``benchmarks/fake_llm.py`` for offline runs."""
+    global llm, llm_with_tools
+    with _llm_lock:
+        llm_with_tools = model.bind_tools(tools)
+        llm = model
+    context.summarizer = model
 
 
 # -------------------
@@ -29,6 +76,7 @@ llm=ChatGoogleGenerativeAI(model='gemini-2.5-flash')
 # search_tool = DuckDuckGoSearchRun(region="us-en")
 
 @tool
+@cached(maxsize=1024)
 def calculator(first_num: float, second_num: float, operation: str) -> dict:
     """
     Perform a basic arithmetic operation on two numbers.
@@ -57,62 +105,416 @@ def calculator(first_num: float, second_num: float, operation: str) -> dict:
 def get_stock_price(symbol: str) -> dict:
     """
     Fetch latest stock price for a given symbol (e.g. 'AAPL', 'TSLA') 
-    using Alpha Vantage with API key in the URL.
+    using Alpha Vantage.
+    """
+    import stock_quotes
+
+    return stock_quotes.fetch_quote(symbol)
+
+
+@tool
+def get_stock_prices(symbols: list[str]) -> str:
+    """
+    Fetch latest prices for several stock symbols at once (e.g. ['AAPL', 'MSFT', 'TSLA']).
+    Use this instead of calling get_stock_price once per symbol. Returns one table.
+    """
+    import stock_quotes
+
+    return stock_quotes.format_table(stock_quotes.fetch_quotes(symbols))
+
+
+# Task tools answer from one cached snapshot of the user's tasks (task_client.py);
+# the user comes from the run config, never from the model.
+@tool
+def search_tasks(
+    config: RunnableConfig,
+    query: Optional[str] = None,
+    status: Optional[Literal["pending", "in-progress", "completed", "overdue"]] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+) -> dict:
+    """
+    Search the user's tasks by words in the title or description (words may
+    be prefixes, e.g. 'rep' finds 'report'), optionally filtered by status and
+    priority. Returns the number of matches and the 10 best.
+    """
+    import task_client
+
+    return task_client.answer(task_client.search, user_of(config), query, status, priority)
+
+
+@tool
+def get_task_stats(config: RunnableConfig) -> dict:
+    """
+    Get statistics about the user's tasks: counts by status and priority,
+    and how many are overdue.
+    """
+    import task_client
+
+    return task_client.answer(task_client.stats, user_of(config))
+
+
+@tool
+def suggest_priorities(config: RunnableConfig) -> dict:
     """
-    url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey=C9PE94QUEW9VWGFM"
-    r = requests.get(url)
-    return r.json()
+    Suggest which of the user's open tasks to work on first, based on
+    priority and how soon they are due.
+    """
+    import task_client
+
+    return task_client.answer(task_client.suggest, user_of(config))
 
 
-tools = [get_stock_price, calculator]
-llm_with_tools = llm.bind_tools(tools)
+task_tools = [search_tasks, get_task_stats, suggest_priorities]
+tools = [get_stock_price, get_stock_prices, calculator, *task_tools]
 
 # -------------------
 # 3. State
 # -------------------
 
+def add_messages(left, right):
+    """``langgraph.graph.message.add_messages``, imported on first merge."""
+    from langgraph.graph.message import add_messages as merge
+
+    return merge(left, right)
+
 class ChatState(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
+    # rolling summary of messages[:summarized_count]; see context_window.py
+    summary: str
+    summarized_count: int
 
 # -------------------
 # 4. Nodes
 # -------------------
 
-def chat_node(state: ChatState):
+# Full history stays in the checkpoint; the prompt gets summary + recent turns.
+context = ContextWindow(get_llm)
+# Caps concurrent Gemini calls (globally and per user); excess turns queue briefly.
+admission = AdmissionController()
+
+def chat_node(state: ChatState, config: RunnableConfig):
     """LLM node that may answer or request a tool call."""
-    messages = state["messages"]
-    response = llm_with_tools.invoke(messages)
-    return {"messages": [response]}
+    with admission.admit(user_of(config)):
+        messages, context_update = context.prepare(state)
+        response = get_llm_with_tools().invoke(messages)
+    return {"messages": [response], **context_update}
+
+# Tool calls of one turn run concurrently (thread pool / gather), each with a timeout.
+tool_node = ParallelToolNode(tools)
 
-tool_node = ToolNode(tools)
+# Node, LLM and tool timings of every run, attached to the compiled graphs
+metrics_handler = MetricsCallbackHandler()
 
 # -------------------
-# 5. Checkpointer
+# 5. Graph
 # -------------------
 
-conn = sqlite3.connect(database="chatbot.db", check_same_thread=False)
-checkpointer = SqliteSaver(conn=conn)
+def build_graph(chat, tools_node):
+    from langgraph.graph import StateGraph, START
+    from langgraph.prebuilt import tools_condition
+
+    graph = StateGraph(ChatState)
+    graph.add_node("chat_node", chat)
+    graph.add_node("tools", tools_node)
+
+    graph.add_edge(START, "chat_node")
+
+    graph.add_conditional_edges("chat_node",tools_condition)
+    graph.add_edge('tools', 'chat_node')
+    return graph
 
 # -------------------
-# 6. Graph
+# 6. Shared resources
 # -------------------
 
-graph = StateGraph(ChatState)
-graph.add_node("chat_node", chat_node)
-graph.add_node("tools", tool_node)
+class Backend:
+    """Process-wide resources behind the sync graph.
 
-graph.add_edge(START, "chat_node")
+    Holds the pooled checkpointer, the thread index and the compiled graph.
+    Every Streamlit session and request shares one instance through
+    ``get_backend()``; the pooled saver serializes writes and hands out its
+    read-only connections per call, so sharing it across threads is safe.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        from checkpoint_cache import TieredSaver
+        from sqlite_pool import PooledSqliteSaver
+        from thread_registry import ThreadRegistry, RegistrySaver
+
+        self.db_path = db_path
+        # One writer connection plus a pool of read-only connections (WAL mode).
+        self.sqlite_saver = PooledSqliteSaver(db_path)
+        self.conn = self.sqlite_saver.conn
+        self.registry = ThreadRegistry(self.conn, lock=self.sqlite_saver.lock)
+        # Latest state of recently used threads is served from memory; writes go through.
+        # Below the cache, every DB read/write is timed and sized (metrics.py).
+        self.hot_tier = TieredSaver(InstrumentedSaver(self.sqlite_saver))
+        self.checkpointer = RegistrySaver(self.hot_tier, self.registry)
+        self.registry.backfill(self.sqlite_saver)
+        self._chatbot = None
+        self._compile_lock = threading.Lock()
+        self.closed = False
+
+    @property
+    def chatbot(self):
+        """The compiled graph; compiled (and langgraph imported) on first use."""
+        if self._chatbot is None:
+            with self._compile_lock:
+                if self._chatbot is None:
+                    self._chatbot = build_graph(chat_node, tool_node.as_node()).compile(
+                        checkpointer=self.checkpointer
+                    ).with_config(callbacks=[metrics_handler])
+        return self._chatbot
+
+    def health(self):
+        """Cheap readiness report: can both connections answer, is the LLM built."""
+        report = {"db": "ok", "llm": "ready" if llm is not None else "not_started"}
+        try:
+            if self.closed:
+                raise sqlite3.ProgrammingError("backend is closed")
+            with self.sqlite_saver.reader() as reader:
+                reader.execute("SELECT 1").fetchone()
+            with self.sqlite_saver.lock:
+                self.conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error as e:
+            report["db"] = f"error: {e}"
+        report["ok"] = report["db"] == "ok"
+        return report
+
+    def healthy(self):
+        return self.health()["ok"]
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.sqlite_saver.close()
 
-graph.add_conditional_edges("chat_node",tools_condition)
-graph.add_edge('tools', 'chat_node')
 
-chatbot = graph.compile(checkpointer=checkpointer)
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend(check=False):
+    """The shared ``Backend``, built on first call.
+
+    With ``check=True`` an unhealthy instance (e.g. the DB file went away) is
+    closed and rebuilt; callers that run on every request should leave it off.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None and (_backend.closed or (check and not _backend.healthy())):
+            _backend.close()
+            _backend = None
+        if _backend is None:
+            _backend = Backend(DB_PATH)
+        return _backend
+
+def __getattr__(name):
+    # ``from main_backend import chatbot`` and friends resolve to the shared backend
+    if name in ("chatbot", "checkpointer", "registry", "sqlite_saver", "hot_tier", "conn"):
+        return getattr(get_backend(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # -------------------
 # 7. Helper
 # -------------------
-def retrieve_all_threads():
-    all_threads = set()
-    for checkpoint in checkpointer.list(None):
-        all_threads.add(checkpoint.config["configurable"]["thread_id"])
-    return list(all_threads)
\ No newline at end of file
+def list_threads(limit=50, cursor=None, query=None, user_id=DEFAULT_USER):
+    """One page of ``user_id``'s threads, newest activity first. See ``ThreadRegistry.list_threads``."""
+    return get_backend().registry.list_threads(
+        limit=limit, cursor=cursor, query=query, user_id=user_id
+    )
+
+def retrieve_all_threads(user_id=DEFAULT_USER):
+    """All of ``user_id``'s thread ids, oldest activity first (the sidebar renders them reversed)."""
+    registry = get_backend().registry
+    all_threads = []
+    cursor = None
+    while True:
+        threads, cursor = registry.list_threads(limit=500, cursor=cursor, user_id=user_id)
+        all_threads.extend(t["thread_id"] for t in threads)
+        if cursor is None:
+            return all_threads[::-1]
+
+def cache_stats():
+    """Hit/miss counters of the checkpoint hot tier, tool caches and LLM cache."""
+    return {
+        "checkpoints": get_backend().hot_tier.stats(),
+        "tools": tool_cache_stats(),
+        "llm": llm_cache.stats() if llm_cache is not None else None,
+    }
+
+def admission_stats():
+    """In-flight and queued LLM calls, wait times and rejections; see ``admission.py``."""
+    return admission.stats()
+
+def prometheus_metrics():
+    """Prometheus text of the graph, LLM, tool and checkpoint metrics, plus admission gauges."""
+    admission_now = admission.stats()
+    return METRICS.render(
+        gauges={
+            "chatbot_llm_active": admission_now["active"],
+            "chatbot_llm_queue_depth": admission_now["queue_depth"],
+        },
+        counters={
+            "chatbot_llm_admitted_total": admission_now["admitted"],
+            "chatbot_llm_rejected_total": admission_now["rejected"],
+            "chatbot_llm_timed_out_total": admission_now["timed_out"],
+        },
+    )
+
+def tool_stats():
+    """Tool calls run and wall-clock seconds saved by running them concurrently."""
+    return {"sync": tool_node.stats(), "async": async_tool_node.stats()}
+
+def compact_checkpoints(keep_last=None, max_age_days=None, vacuum_pages=None):
+    """Apply the retention policy to chatbot.db; see ``retention.compact``.
+
+    Also available as ``python retention.py chatbot.db --keep-last N``.
+    """
+    backend = get_backend()
+    with backend.sqlite_saver.lock:
+        return retention.compact(
+            backend.conn, keep_last=keep_last, max_age_days=max_age_days, vacuum_pages=vacuum_pages
+        )
+
+
+# -------------------
+# 8. Async graph
+# -------------------
+# Same graph, but every step awaits: the LLM call, the stock lookup and the
+# checkpointer all run on the event loop, so a single process can hold many
+# concurrent turns without parking a thread per request.
+
+@tool("get_stock_price")
+async def aget_stock_price(symbol: str) -> dict:
+    """
+    Fetch latest stock price for a given symbol (e.g. 'AAPL', 'TSLA') 
+    using Alpha Vantage.
+    """
+    import stock_quotes
+
+    return await stock_quotes.afetch_quote(symbol)
+
+
+@tool("get_stock_prices")
+async def aget_stock_prices(symbols: list[str]) -> str:
+    """
+    Fetch latest prices for several stock symbols at once (e.g. ['AAPL', 'MSFT', 'TSLA']).
+    Use this instead of calling get_stock_price once per symbol. Returns one table.
+    """
+    import stock_quotes
+
+    return stock_quotes.format_table(await stock_quotes.afetch_quotes(symbols))
+
+
+@tool("search_tasks")
+async def asearch_tasks(
+    config: RunnableConfig,
+    query: Optional[str] = None,
+    status: Optional[Literal["pending", "in-progress", "completed", "overdue"]] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+) -> dict:
+    """
+    Search the user's tasks by words in the title or description (words may
+    be prefixes, e.g. 'rep' finds 'report'), optionally filtered by status and
+    priority. Returns the number of matches and the 10 best.
+    """
+    import task_client
+
+    return await task_client.aanswer(task_client.search, user_of(config), query, status, priority)
+
+
+@tool("get_task_stats")
+async def aget_task_stats(config: RunnableConfig) -> dict:
+    """
+    Get statistics about the user's tasks: counts by status and priority,
+    and how many are overdue.
+    """
+    import task_client
+
+    return await task_client.aanswer(task_client.stats, user_of(config))
+
+
+@tool("suggest_priorities")
+async def asuggest_priorities(config: RunnableConfig) -> dict:
+    """
+    Suggest which of the user's open tasks to work on first, based on
+    priority and how soon they are due.
+    """
+    import task_client
+
+    return await task_client.aanswer(task_client.suggest, user_of(config))
+
+
+async_tools = [
+    aget_stock_price, aget_stock_prices, calculator,
+    asearch_tasks, aget_task_stats, asuggest_priorities,
+]
+
+async def achat_node(state: ChatState, config: RunnableConfig):
+    """Async LLM node; tokens still reach ``astream(stream_mode="messages")``."""
+    async with admission.aadmit(user_of(config)):
+        messages, context_update = await context.aprepare(state)
+        response = await get_llm_with_tools().ainvoke(messages)
+    return {"messages": [response], **context_update}
+
+async_tool_node = ParallelToolNode(async_tools)
+
+
+@asynccontextmanager
+async def async_chatbot(db_path: str = DB_PATH):
+    """Compile the async graph against an ``AsyncSqliteSaver``.
+
+    Usage::
+
+        async with async_chatbot() as bot:
+            async for chunk, meta in bot.astream(inputs, config, stream_mode="messages"):
+                ...
+    """
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from thread_registry import ThreadRegistry, RegistrySaver
+
+    async_graph = build_graph(achat_node, async_tool_node.as_node())
+    async with AsyncSqliteSaver.from_conn_string(db_path) as saver:
+        await saver.setup()
+        thread_index = ThreadRegistry(sqlite3.connect(db_path, check_same_thread=False))
+        try:
+            checkpointer = RegistrySaver(InstrumentedSaver(saver), thread_index)
+            yield async_graph.compile(checkpointer=checkpointer).with_config(
+                callbacks=[metrics_handler]
+            )
+        finally:
+            thread_index.conn.close()
+            # only loaded once a stock / task tool ran
+            for name in ("stock_quotes", "task_client"):
+                client = sys.modules.get(name)
+                if client is not None:
+                    await client.async_client.aclose()
+
+
+async def ahealth(checkpointer):
+    """``Backend.health`` for a graph from ``async_chatbot``, without building the sync backend."""
+    registry = checkpointer.registry
+
+    def ping_registry():
+        with registry.lock:
+            registry.conn.execute("SELECT 1").fetchone()
+
+    report = {"db": "ok", "llm": "ready" if llm is not None else "not_started"}
+    try:
+        async with checkpointer.conn.execute("SELECT 1") as cursor:
+            await cursor.fetchone()
+        await asyncio.to_thread(ping_registry)
+    except (sqlite3.Error, ValueError) as e:
+        # aiosqlite raises ValueError once its connection is closed
+        report["db"] = f"error: {e}"
+    report["ok"] = report["db"] == "ok"
+    return report
+
+
+async def alist_threads(limit=50, cursor=None, query=None, user_id=DEFAULT_USER, registry=None):
+    """``list_threads`` off the event loop; pass the async graph's ``registry`` to skip the sync backend."""
+    if registry is None:
+        return await asyncio.to_thread(list_threads, limit, cursor, query, user_id)
+    return await asyncio.to_thread(
+        registry.list_threads, limit=limit, cursor=cursor, query=query, user_id=user_id
+    )
@@ -1,8 +1,38 @@
 import streamlit as st
-from main_backend import chatbot, retrieve_all_threads
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from main_backend import get_backend, DEFAULT_USER
+from thread_registry import QuotaExceededError, display_message
+from admission import AdmissionError
+from langchain_core.messages import HumanMessage
+from stream_adapter import TokenStream
+import os
 import uuid
 
+# Messages rendered per page; older ones load on demand
+PAGE_SIZE = 30
+# Conversations listed per sidebar page
+SIDEBAR_PAGE_SIZE = 20
+
+#! =========================== Resources ===========================
+
+# One backend per process, shared by every session. Building it opens the
+# SQLite pool and compiles the graph; the Gemini client is only created on
+# the first chat turn. An unhealthy backend is dropped and rebuilt.
+@st.cache_resource(show_spinner=False, validate=lambda backend: backend.healthy())
+def shared_backend():
+    return get_backend(check=True)
+
+backend = shared_backend()
+
+# Whose conversations this session sees: the signed-in user when Streamlit
+# auth is configured, else CHATBOT_USER_ID, else the single local user.
+if getattr(st.user, "is_logged_in", False):
+    USER_ID = st.user.get("email") or st.user.get("sub")
+else:
+    USER_ID = os.getenv("CHATBOT_USER_ID", DEFAULT_USER)
+
+def thread_config(thread_id):
+    return {"configurable": {"thread_id": thread_id, "user_id": USER_ID}}
+
 #! =========================== Utilities ===========================
 
 def generate_thread_id():
@@ -11,17 +41,40 @@ def generate_thread_id():
 def reset_chat():
     thread_id = generate_thread_id()
     st.session_state["thread_id"] = thread_id
-    add_thread(thread_id)
     st.session_state["message_history"] = []
+    st.session_state["visible_messages"] = PAGE_SIZE
+    reset_thread_pages()
+
+def open_thread(thread_id):
+    st.session_state["thread_id"] = thread_id
+    st.session_state["message_history"] = load_conversation(thread_id)
+    st.session_state["visible_messages"] = PAGE_SIZE
+
+def reset_thread_pages():
+    # cursors of the sidebar pages visited so far; the last one is on screen
+    st.session_state["thread_pages"] = [None]
 
-def add_thread(thread_id):
-    if thread_id not in st.session_state["chat_threads"]:
-        st.session_state["chat_threads"].append(thread_id)
+def next_thread_page(cursor):
+    st.session_state["thread_pages"].append(cursor)
+
+def previous_thread_page():
+    st.session_state["thread_pages"].pop()
 
 def load_conversation(thread_id):
-    state = chatbot.get_state(config={"configurable": {"thread_id": thread_id}})
-    # Check if messages key exists in state values, return empty list if not
-    return state.values.get("messages", [])
+    # Read the thread's display projection (role/text/tool per message), kept
+    # up to date on every write; only threads from before it existed fall back
+    # to deserializing the checkpoint, once.
+    backend.registry.authorize(thread_id, USER_ID, write=False)
+    messages = backend.registry.display_messages(thread_id)
+    if messages is None:
+        state = backend.chatbot.get_state(config=thread_config(thread_id))
+        history = state.values.get("messages", [])
+        backend.registry.project(thread_id, history)
+        messages = [display_message(msg) for msg in history]
+    return messages
+
+def show_older_messages():
+    st.session_state["visible_messages"] += PAGE_SIZE
 
 
 #! ======================= Session Initialization ===================
@@ -30,13 +83,14 @@ def load_conversation(thread_id):
 if "message_history" not in st.session_state:
     st.session_state["message_history"] = []
 
+if "visible_messages" not in st.session_state:
+    st.session_state["visible_messages"] = PAGE_SIZE
+
 if "thread_id" not in st.session_state:
     st.session_state["thread_id"] = generate_thread_id()
 
-if "chat_threads" not in st.session_state:
-    st.session_state["chat_threads"] = retrieve_all_threads()
-
-add_thread(st.session_state["thread_id"])
+if "thread_pages" not in st.session_state:
+    reset_thread_pages()
 
 
 #! ============================ Sidebar ============================
@@ -48,36 +102,74 @@ if st.sidebar.button("New Chat"):
     reset_chat()
 
 st.sidebar.header("My Conversations")
-for thread_id in st.session_state["chat_threads"][::-1]:
-    if st.sidebar.button(str(thread_id)):
-        st.session_state["thread_id"] = thread_id
-        messages = load_conversation(thread_id)
-
-        temp_messages = []
-        for msg in messages:
-            role = "user" if isinstance(msg, HumanMessage) else "assistant"
-            temp_messages.append({"role": role, "content": msg.content})
-        st.session_state["message_history"] = temp_messages
+search = st.sidebar.text_input(
+    "Search", key="thread_search", placeholder="Search conversations", on_change=reset_thread_pages
+)
+
+# Only the visible page is queried (thread index, most recent first) and rendered
+thread_pages = st.session_state["thread_pages"]
+threads, next_cursor = backend.registry.list_threads(
+    limit=SIDEBAR_PAGE_SIZE, cursor=thread_pages[-1], query=search.strip() or None, user_id=USER_ID
+)
+if not threads:
+    st.sidebar.caption("No conversations found.")
+for thread in threads:
+    current = thread["thread_id"] == str(st.session_state["thread_id"])
+    st.sidebar.button(
+        thread["title"] or "New chat",
+        key=f"thread-{thread['thread_id']}",
+        help=thread["preview"],
+        type="primary" if current else "secondary",
+        on_click=open_thread,
+        args=(thread["thread_id"],),
+    )
+
+newer_col, older_col = st.sidebar.columns(2)
+newer_col.button("‹ Newer", disabled=len(thread_pages) == 1, on_click=previous_thread_page)
+older_col.button(
+    "Older ›", disabled=next_cursor is None, on_click=next_thread_page, args=(next_cursor,)
+)
 
 
 #! ============================ Main UI ============================
 
-# Render history
-for message in st.session_state["message_history"]:
+# Render history: only the newest `visible_messages`, so reruns cost the window
+history = st.session_state["message_history"]
+hidden = len(history) - st.session_state["visible_messages"]
+if hidden > 0:
+    st.button(
+        f"Load {min(PAGE_SIZE, hidden)} older messages ({hidden} hidden)",
+        on_click=show_older_messages,
+    )
+for message in history[-st.session_state["visible_messages"]:]:
+    if message["role"] == "tool":
+        with st.chat_message("tool", avatar="🔧"):
+            st.caption(message.get("tool_name") or "tool")
+            st.text(message["content"])
+        continue
     with st.chat_message(message["role"]):
         st.text(message["content"])
 
 user_input = st.chat_input("Type here")
 
 if user_input:
+    try:
+        backend.registry.authorize(st.session_state["thread_id"], USER_ID)
+    except QuotaExceededError:
+        st.error(
+            f"You have reached the limit of {backend.registry.max_threads} conversations. "
+            "Continue one of them from the sidebar."
+        )
+        st.stop()
+
     # Show user's message
     st.session_state["message_history"].append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.text(user_input)
 
     CONFIG = {
-        "configurable": {"thread_id": st.session_state["thread_id"]},
-        "metadata": {"thread_id": st.session_state["thread_id"]},
+        **thread_config(st.session_state["thread_id"]),
+        "metadata": {"thread_id": st.session_state["thread_id"], "user_id": USER_ID},
         "run_name": "chat_turn",
     }
 
@@ -86,31 +178,36 @@ if user_input:
         # Use a mutable holder so the generator can set/modify it
         status_holder = {"box": None}
 
-        def ai_only_stream():
-            for message_chunk, metadata in chatbot.stream(
+        def show_tool_status(message_chunk):
+            # Lazily create & update the SAME status container when any tool runs
+            tool_name = getattr(message_chunk, "name", "tool")
+            if status_holder["box"] is None:
+                status_holder["box"] = st.status(
+                    f"🔧 Using `{tool_name}` …", expanded=True
+                )
+            else:
+                status_holder["box"].update(
+                    label=f"🔧 Using `{tool_name}` …",
+                    state="running",
+                    expanded=True,
+                )
+
+        # Stream ONLY assistant tokens, coalesced into fewer UI updates
+        token_stream = TokenStream(
+            backend.chatbot.stream(
                 {"messages": [HumanMessage(content=user_input)]},
                 config=CONFIG,
                 stream_mode="messages",
-            ):
-                # Lazily create & update the SAME status container when any tool runs
-                if isinstance(message_chunk, ToolMessage):
-                    tool_name = getattr(message_chunk, "name", "tool")
-                    if status_holder["box"] is None:
-                        status_holder["box"] = st.status(
-                            f"🔧 Using `{tool_name}` …", expanded=True
-                        )
-                    else:
-                        status_holder["box"].update(
-                            label=f"🔧 Using `{tool_name}` …",
-                            state="running",
-                            expanded=True,
-                        )
-
-                # Stream ONLY assistant tokens
-                if isinstance(message_chunk, AIMessage):
-                    yield message_chunk.content
-
-        ai_message = st.write_stream(ai_only_stream())
+            ),
+            on_tool=show_tool_status,
+        )
+
+        try:
+            ai_message = st.write_stream(token_stream)
+        except AdmissionError as e:
+            # model queue full or timed out: the question is saved, ask to resend later
+            st.warning(f"The assistant is busy right now ({e}).")
+            st.stop()
 
         # Finalize only if a tool was actually used
         if status_holder["box"] is not None:
@@ -118,7 +215,18 @@ if user_input:
                 label="✅ Tool finished", state="complete", expanded=False
             )
 
+        turn_stats = token_stream.stats()
+        if turn_stats["ttft_seconds"] is not None:
+            st.caption(
+                f"first token {turn_stats['ttft_seconds']:.2f}s · "
+                f"{turn_stats['tokens_per_second'] or 0:.0f} tokens/s"
+            )
+
     # Save assistant message
     st.session_state["message_history"].append(
         {"role": "assistant", "content": ai_message}
-    )
\ No newline at end of file
+    )
+
+    # First turn of a new conversation: rerun so it shows up in the sidebar
+    if len(st.session_state["message_history"]) == 2:
+        st.rerun()
\ No newline at end of file
@@ -0,0 +1,447 @@
+"""Latency, token and checkpoint metrics for the chat graph.
+
+Two probes feed one ``Metrics`` registry:
+
+* ``MetricsCallbackHandler`` (a LangChain callback attached to the compiled
+  graph) times every graph node, LLM call (time-to-first-token, duration,
+  prompt/completion tokens) and tool call, and counts ``chat_node`` loops
+  per turn.
+* ``InstrumentedSaver`` wraps the checkpointer and times reads and writes to
+  ``chatbot.db``, with the serialized size of what goes in and comes out.
+
+``METRICS.render()`` returns Prometheus text (served at ``GET /metrics`` by
+``server.py``). Series are labelled by ``run_name`` (``chat_turn`` for the
+UI) but not by thread, which would be one series per conversation; per-thread
+detail goes to the ``chatbot.metrics`` logger instead, one JSON object per
+turn with ``thread_id`` and ``run_name``. Set ``CHATBOT_METRICS_LOG=1`` to
+print those lines to stderr without configuring logging.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from checkpointing import DelegatingSaver, remember_size
+
+log = logging.getLogger("chatbot.metrics")
+if os.getenv("CHATBOT_METRICS_LOG") == "1" and not log.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+
+# Histogram buckets in seconds (and loop counts for graph_loops)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LOOP_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 25)
+
+HELP = {
+    "chatbot_turns_total": ("counter", "Graph runs by outcome"),
+    "chatbot_turn_seconds": ("histogram", "Wall time of a whole graph run"),
+    "chatbot_graph_loops": ("histogram", "chat_node executions per graph run"),
+    "chatbot_node_seconds": ("histogram", "Wall time per graph node execution"),
+    "chatbot_llm_seconds": ("histogram", "LLM call duration"),
+    "chatbot_llm_ttft_seconds": ("histogram", "LLM time to first token"),
+    "chatbot_llm_tokens_total": ("counter", "LLM tokens by direction"),
+    "chatbot_tool_seconds": ("histogram", "Tool call duration"),
+    "chatbot_tool_errors_total": ("counter", "Tool calls that raised"),
+    "chatbot_checkpoint_seconds": ("histogram", "Checkpointer call duration"),
+    "chatbot_checkpoint_bytes_total": ("counter", "Serialized checkpoint bytes read/written"),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """Thread-safe counters and histograms with Prometheus text output."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        # thread_id -> checkpoint totals of the turn in progress
+        self._turns = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    # per-turn checkpoint totals, so a turn's log line includes its DB time
+
+    def open_turn(self, thread_id):
+        with self._lock:
+            self._turns[thread_id] = defaultdict(float)
+
+    def close_turn(self, thread_id):
+        with self._lock:
+            return dict(self._turns.pop(thread_id, {}))
+
+    def checkpoint_op(self, op, seconds, nbytes=None, thread_id=None):
+        self.observe("chatbot_checkpoint_seconds", seconds, op=op)
+        if nbytes is not None:
+            self.inc("chatbot_checkpoint_bytes_total", nbytes, op=op)
+        with self._lock:
+            turn = self._turns.get(thread_id)
+            if turn is not None:
+                turn[f"{op}_count"] += 1
+                turn[f"{op}_seconds"] += seconds
+                if nbytes is not None:
+                    turn[f"{op}_bytes"] += nbytes
+
+    def render(self, gauges=None, counters=None):
+        """Prometheus text exposition (version 0.0.4).
+
+        ``gauges`` and ``counters`` add values kept elsewhere, such as the
+        admission queue depth: ``{"name": value}`` or
+        ``{"name": [(labels_dict, value), ...]}``.
+        """
+        with self._lock:
+            own_counters = list(self._counters.items())
+            histograms = [
+                (key, h.buckets, list(h.counts), h.total, h.count)
+                for key, h in self._histograms.items()
+            ]
+        # Samples are emitted in the order built here, never sorted as text:
+        # each histogram series lists its buckets by increasing le (+Inf
+        # last), then _sum and _count, as the exposition format requires.
+        families = defaultdict(list)
+        for (name, labels), value in own_counters:
+            families[name].append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), buckets, counts, total, count in histograms:
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                le = labels + (("le", bound if bound == "+Inf" else f"{bound:g}"),)
+                families[name].append(f"{name}_bucket{_labels(le)} {cumulative}")
+            families[name].append(f"{name}_sum{_labels(labels)} {total:g}")
+            families[name].append(f"{name}_count{_labels(labels)} {count}")
+
+        lines = []
+        for name in sorted(families):
+            kind, text = HELP.get(name, ("untyped", name))
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}", *families[name]]
+        for kind, extra in (("gauge", gauges), ("counter", counters)):
+            for name, value in (extra or {}).items():
+                lines.append(f"# TYPE {name} {kind}")
+                samples = value if isinstance(value, list) else [({}, value)]
+                for labels, sample in samples:
+                    lines.append(f"{name}{_labels(sorted(labels.items()))} {sample:g}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class _Turn:
+    __slots__ = ("thread_id", "run_name", "start", "nodes", "loops", "llm", "tools")
+
+    def __init__(self, thread_id, run_name):
+        self.thread_id = thread_id
+        self.run_name = run_name
+        self.start = time.perf_counter()
+        self.nodes = defaultdict(float)
+        self.loops = 0
+        self.llm = []
+        self.tools = []
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Per-run timings for graph nodes, LLM calls and tools.
+
+    One instance serves every concurrent run: state is keyed by ``run_id``
+    and each run is mapped to the root run (the turn) it belongs to.
+    """
+
+    run_inline = True
+
+    def __init__(self, metrics=METRICS, loop_node="chat_node"):
+        self.metrics = metrics
+        self.loop_node = loop_node
+        self._lock = threading.Lock()
+        self._root = {}
+        self._turns = {}
+        self._runs = {}
+
+    def _begin(self, run_id, parent_run_id, **info):
+        with self._lock:
+            self._root[run_id] = self._root.get(parent_run_id, parent_run_id) or run_id
+            self._runs[run_id] = {"start": time.perf_counter(), **info}
+
+    def _end(self, run_id):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            turn = self._turns.get(self._root.pop(run_id, None))
+        if run is None:
+            return None, None, None
+        return run, time.perf_counter() - run["start"], turn
+
+    # -- graph and nodes -----------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None,
+                       metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if parent_run_id is None:
+            thread_id = metadata.get("thread_id")
+            turn = _Turn(str(thread_id) if thread_id is not None else None, name or "graph")
+            with self._lock:
+                self._turns[run_id] = turn
+            if turn.thread_id is not None:
+                self.metrics.open_turn(turn.thread_id)
+            self._begin(run_id, None, kind="turn")
+        elif parent_run_id in self._turns and name == metadata.get("langgraph_node"):
+            # a node run is a direct child of the graph run; runnables inside
+            # a node can carry the node's name too and are not counted again
+            self._begin(run_id, parent_run_id, kind="node", name=name)
+        else:
+            with self._lock:
+                self._root[run_id] = self._root.get(parent_run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish_chain(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish_chain(run_id, "error")
+
+    def _finish_chain(self, run_id, status):
+        run, seconds, turn = self._end(run_id)
+        if run is None:
+            return
+        if run["kind"] == "node":
+            if turn is not None:
+                self.metrics.observe("chatbot_node_seconds", seconds, node=run["name"], run_name=turn.run_name)
+                turn.nodes[run["name"]] += seconds
+                turn.loops += run["name"] == self.loop_node
+            return
+        # the root run: the whole turn; drop whatever its children left behind
+        with self._lock:
+            self._turns.pop(run_id, None)
+            for child in [child for child, root in self._root.items() if root == run_id]:
+                del self._root[child]
+                self._runs.pop(child, None)
+        self.metrics.inc("chatbot_turns_total", run_name=turn.run_name, status=status)
+        self.metrics.observe("chatbot_turn_seconds", seconds, run_name=turn.run_name)
+        self.metrics.observe("chatbot_graph_loops", turn.loops, buckets=LOOP_BUCKETS, run_name=turn.run_name)
+        checkpoint = self.metrics.close_turn(turn.thread_id) if turn.thread_id is not None else {}
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps({
+                "event": "turn",
+                "thread_id": turn.thread_id,
+                "run_name": turn.run_name,
+                "status": status,
+                "seconds": round(seconds, 4),
+                "loops": turn.loops,
+                "nodes": {name: round(s, 4) for name, s in turn.nodes.items()},
+                "llm": turn.llm,
+                "tools": turn.tools,
+                "checkpoint": {key: round(v, 4) for key, v in checkpoint.items()},
+            }))
+
+    # -- LLM -----------------------------------------------------------------
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None,
+                            **kwargs):
+        # the context-window summarizer runs with the nostream tag
+        kind = "summary" if "nostream" in (tags or []) else "chat"
+        self._begin(run_id, parent_run_id, kind=kind, first_token=None)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["first_token"] is None and token:
+                run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run, seconds, turn = self._end(run_id)
+        if run is None:
+            return
+        kind = run["kind"]
+        ttft = (run["first_token"] - run["start"]) if run["first_token"] else seconds
+        usage = _usage(response)
+        self.metrics.observe("chatbot_llm_seconds", seconds, kind=kind)
+        self.metrics.observe("chatbot_llm_ttft_seconds", ttft, kind=kind)
+        for direction in ("prompt", "completion"):
+            if usage[direction]:
+                self.metrics.inc("chatbot_llm_tokens_total", usage[direction], kind=kind, direction=direction)
+        if turn is not None:
+            turn.llm.append({
+                "kind": kind, "seconds": round(seconds, 4), "ttft": round(ttft, 4),
+                "prompt_tokens": usage["prompt"], "completion_tokens": usage["completion"],
+            })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    # -- tools ---------------------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._begin(run_id, parent_run_id, kind="tool", name=name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id, error):
+        run, seconds, turn = self._end(run_id)
+        if run is None:
+            return
+        self.metrics.observe("chatbot_tool_seconds", seconds, tool=run["name"])
+        if error:
+            self.metrics.inc("chatbot_tool_errors_total", tool=run["name"])
+        if turn is not None:
+            turn.tools.append({"name": run["name"], "seconds": round(seconds, 4), "error": error})
+
+
+def _usage(response):
+    """Prompt/completion token counts from an ``LLMResult``, 0 when not reported."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    return {"prompt": prompt, "completion": completion}
+
+
+# sizes of what the storage serializer wrote / read during the current
+# InstrumentedSaver call (None outside one)
+_serialized = contextvars.ContextVar("chatbot_serialized_bytes", default=None)
+
+
+class _SizingSerde:
+    """Serializer wrapper that reports the size of every blob it produces or loads.
+
+    Sizes go to the running ``InstrumentedSaver`` call, and whole checkpoints
+    are also remembered for ``checkpoint_size``, so nothing is serialized a
+    second time just to be measured.
+    """
+
+    def __init__(self, serde):
+        self.serde = serde
+
+    def __getattr__(self, name):
+        return getattr(self.serde, name)
+
+    @staticmethod
+    def _measure(obj, data):
+        sizes = _serialized.get()
+        if sizes is not None:
+            sizes.append(len(data))
+        if isinstance(obj, dict) and "channel_values" in obj:
+            remember_size(obj.get("id"), len(data))
+
+    def dumps_typed(self, obj):
+        type_, data = self.serde.dumps_typed(obj)
+        self._measure(obj, data)
+        return type_, data
+
+    def loads_typed(self, data):
+        obj = self.serde.loads_typed(data)
+        self._measure(obj, data[1])
+        return obj
+
+
+class InstrumentedSaver(DelegatingSaver):
+    """Times checkpointer calls and counts the bytes they move.
+
+    Sizes are those of the blobs the storage saver serializes or loads during
+    the call (a read counts the checkpoint and its pending writes), taken
+    from a serializer wrapper installed on ``backend``; checkpoint sizes are
+    shared with ``TieredSaver`` through ``checkpoint_size``. Place it directly
+    above the storage saver so cache hits of a ``TieredSaver`` are not
+    counted as DB reads.
+    """
+
+    def __init__(self, backend, metrics=METRICS):
+        if not isinstance(backend.serde, _SizingSerde):
+            backend.serde = _SizingSerde(backend.serde)
+        super().__init__(backend)
+        self.metrics = metrics
+
+    def _record(self, op, config, seconds, sizes):
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        self.metrics.checkpoint_op(
+            op, seconds, sum(sizes), str(thread_id) if thread_id is not None else None
+        )
+
+    def _measure(self, op, config, call, *args):
+        sizes = []
+        token = _serialized.set(sizes)
+        start = time.perf_counter()
+        try:
+            result = call(config, *args)
+        finally:
+            _serialized.reset(token)
+        self._record(op, config, time.perf_counter() - start, sizes)
+        return result
+
+    async def _ameasure(self, op, config, call, *args):
+        sizes = []
+        token = _serialized.set(sizes)
+        start = time.perf_counter()
+        try:
+            result = await call(config, *args)
+        finally:
+            _serialized.reset(token)
+        self._record(op, config, time.perf_counter() - start, sizes)
+        return result
+
+    def get_tuple(self, config):
+        return self._measure("read", config, super().get_tuple)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self._measure("write", config, super().put, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self._measure("write_pending", config, super().put_writes, writes, task_id, task_path)
+
+    async def aget_tuple(self, config):
+        return await self._ameasure("read", config, super().aget_tuple)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self._ameasure("write", config, super().aput, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await self._ameasure("write_pending", config, super().aput_writes, writes, task_id, task_path)
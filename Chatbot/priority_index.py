@@ -0,0 +1,201 @@
+"""Incremental priority index behind ``suggest_priorities``.
+
+A task's score is its priority (high 10, medium 5, low 2) plus an urgency
+bonus from the days left until it is due (overdue +20, within a day +15,
+within three days +10), as in the Next.js assistant. Scoring and sorting
+every open task on every question cost O(n log n); here each user's open
+tasks sit in a max-heap instead:
+
+* create / update / complete / delete events touch one entry in O(log n);
+  replaced entries stay in the heap and are skipped when they surface (lazy
+  deletion), and the heap is rebuilt once they outnumber live ones,
+* ``top(k)`` pops the k best live entries and pushes them back, O(k log n),
+* ``sync(tasks)`` folds a freshly fetched list in: only tasks that changed
+  or disappeared touch the heap, so a refetch does not rebuild the index,
+* days are counted in whole UTC calendar days, so scores only change when
+  the day rolls over; the first query of a new day rescores every entry in
+  one vectorized NumPy pass and re-heapifies in O(n).
+"""
+
+import heapq
+import itertools
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+PRIORITY_POINTS = {"high": 10, "medium": 5, "low": 2}
+# due-day ordinal of a task without a due date (real ordinals start at 1)
+NO_DUE = 0
+
+_versions = itertools.count()
+
+
+def today():
+    return datetime.now(timezone.utc).date().toordinal()
+
+
+def parse_time(value):
+    """ISO 8601 timestamp from the tasks API (``...Z``) as an aware datetime."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def due_day(task):
+    due = parse_time(task.get("dueDate"))
+    return due.astimezone(timezone.utc).date().toordinal() if due else NO_DUE
+
+
+def score(priority, days):
+    """Score of one open task; ``days`` until due, ``None`` if it has no due date."""
+    value = PRIORITY_POINTS.get(priority, 2)
+    if days is not None:
+        if days < 0:
+            value += 20
+        elif days <= 1:
+            value += 15
+        elif days <= 3:
+            value += 10
+    return value
+
+
+def bulk_scores(points, due, day):
+    """``score`` over arrays of priority points and due-day ordinals at once."""
+    days = due - day
+    bonus = np.select([days < 0, days <= 1, days <= 3], [20, 15, 10], 0)
+    return points + np.where(due != NO_DUE, bonus, 0)
+
+
+def reason(priority, days):
+    if days is not None and days < 0:
+        return "Overdue!"
+    if days is not None and days <= 1:
+        return "Due very soon"
+    return "High priority" if priority == "high" else "Needs attention"
+
+
+class _Entry:
+    __slots__ = ("task", "points", "due", "created", "score", "version")
+
+    def __init__(self, task):
+        self.task = task
+        self.points = PRIORITY_POINTS.get(task.get("priority"), 2)
+        self.due = due_day(task)
+        created = parse_time(task.get("createdAt"))
+        # ties go to the newest task, like the API's createdAt-desc order
+        self.created = created.timestamp() if created else 0.0
+        self.score = 0
+        self.version = next(_versions)
+
+    def item(self, task_id):
+        return (-self.score, -self.created, self.version, task_id)
+
+
+class PriorityIndex:
+    """Open tasks of one user, best first; thread-safe."""
+
+    def __init__(self, tasks=(), day=None):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._heap = []
+        self.day = None
+        for task in tasks:
+            if task.get("id") is not None and task.get("status") != "completed":
+                self._entries[task["id"]] = _Entry(task)
+        self.rescore(today() if day is None else day)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -- events --------------------------------------------------------------
+
+    def upsert(self, task):
+        """Add or replace a task; completed tasks leave the index."""
+        task_id = task.get("id")
+        if task_id is None:
+            return
+        if task.get("status") == "completed":
+            self.remove(task_id)
+            return
+        entry = _Entry(task)
+        with self._lock:
+            entry.score = score(task.get("priority"), self._days(entry))
+            self._entries[task_id] = entry
+            heapq.heappush(self._heap, entry.item(task_id))
+            self._compact()
+
+    def remove(self, task_id):
+        with self._lock:
+            if self._entries.pop(task_id, None) is not None:
+                self._compact()
+
+    def sync(self, tasks):
+        """Make the index hold exactly the open tasks of ``tasks``; unchanged ones are kept."""
+        incoming = {
+            task["id"]: task for task in tasks
+            if task.get("id") is not None and task.get("status") != "completed"
+        }
+        with self._lock:
+            for task_id in self._entries.keys() - incoming.keys():
+                del self._entries[task_id]
+            changed = 0
+            for task_id, task in incoming.items():
+                entry = self._entries.get(task_id)
+                if entry is not None and entry.task == task:
+                    continue
+                entry = self._entries[task_id] = _Entry(task)
+                entry.score = score(task.get("priority"), self._days(entry))
+                heapq.heappush(self._heap, entry.item(task_id))
+                changed += 1
+            self._compact()
+            return changed
+
+    # -- queries -------------------------------------------------------------
+
+    def top(self, k, day=None):
+        """``[(task, days_until_due), ...]`` for the ``k`` highest scores."""
+        day = today() if day is None else day
+        if day != self.day:
+            self.rescore(day)
+        best = []
+        with self._lock:
+            while self._heap and len(best) < k:
+                item = heapq.heappop(self._heap)
+                entry = self._entries.get(item[3])
+                if entry is not None and entry.version == item[2]:
+                    best.append(item)
+            for item in best:
+                heapq.heappush(self._heap, item)
+            return [(self._entries[item[3]].task, self._days(self._entries[item[3]])) for item in best]
+
+    def rescore(self, day):
+        """Recompute every score for ``day`` (a date ordinal) and rebuild the heap."""
+        with self._lock:
+            self.day = day
+            entries = list(self._entries.values())
+            if entries:
+                points = np.fromiter((e.points for e in entries), dtype=np.int64, count=len(entries))
+                due = np.fromiter((e.due for e in entries), dtype=np.int64, count=len(entries))
+                for entry, value in zip(entries, bulk_scores(points, due, day).tolist()):
+                    entry.score = value
+            self._rebuild()
+
+    # -- internals (caller holds the lock) ------------------------------------
+
+    def _days(self, entry):
+        return None if entry.due == NO_DUE else entry.due - self.day
+
+    def _rebuild(self):
+        self._heap = [entry.item(task_id) for task_id, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _compact(self):
+        # stale items (replaced or removed tasks) are only dropped when they
+        # reach the top; rebuild once they make up most of the heap
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._rebuild()
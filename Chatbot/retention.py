@@ -0,0 +1,159 @@
+"""Checkpoint retention and compaction for chatbot.db.
+
+Every graph step writes a full checkpoint, so the database grows with every
+turn. ``compact`` prunes old checkpoints according to a retention policy,
+drops the writes that belonged to them, truncates the WAL and hands the
+freed pages back to the filesystem.
+
+The newest checkpoint of each thread is always kept so conversations stay
+loadable; only their history is trimmed.
+
+CLI::
+
+    python retention.py chatbot.db --keep-last 20 --max-age-days 30
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+import uuid
+
+# 100ns intervals between the Gregorian epoch (UUID v1/v6) and the Unix epoch
+_GREGORIAN_OFFSET = 0x01B21DD213814000
+
+
+def checkpoint_id_before(timestamp: float) -> str:
+    """Smallest UUIDv6 checkpoint id at ``timestamp``.
+
+    LangGraph checkpoint ids are UUIDv6, whose string form sorts by time, so
+    ``checkpoint_id < checkpoint_id_before(t)`` selects everything older than
+    ``t`` without decoding a single blob.
+    """
+    ticks = int(timestamp * 10_000_000) + _GREGORIAN_OFFSET
+    time_high = (ticks >> 28) & 0xFFFFFFFF
+    time_mid = (ticks >> 12) & 0xFFFF
+    time_low = (ticks & 0x0FFF) | 0x6000
+    return str(uuid.UUID(f"{time_high:08x}{time_mid:04x}{time_low:04x}0000000000000000"))
+
+
+def _has_table(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def prune(conn: sqlite3.Connection, keep_last=None, max_age_days=None):
+    """Delete checkpoints outside the retention policy. Returns rows deleted.
+
+    ``keep_last`` keeps the N newest checkpoints per (thread, namespace);
+    ``max_age_days`` drops checkpoints older than the limit. Either or both
+    may be given; the newest checkpoint of a thread survives both.
+    """
+    if not _has_table(conn, "checkpoints"):
+        return {"checkpoints": 0, "writes": 0}
+
+    keep = max(keep_last or 0, 1)
+    ranked = """
+        SELECT rowid, checkpoint_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+               ) AS rn
+        FROM checkpoints
+    """
+    conditions = []
+    params = []
+    if keep_last is not None:
+        conditions.append("rn > ?")
+        params.append(keep)
+    if max_age_days is not None:
+        conditions.append("(rn > 1 AND checkpoint_id < ?)")
+        params.append(checkpoint_id_before(time.time() - max_age_days * 86400))
+    if not conditions:
+        return {"checkpoints": 0, "writes": 0}
+
+    with conn:
+        deleted = conn.execute(
+            f"DELETE FROM checkpoints WHERE rowid IN "
+            f"(SELECT rowid FROM ({ranked}) WHERE {' OR '.join(conditions)})",
+            params,
+        ).rowcount
+        orphaned = 0
+        if _has_table(conn, "writes"):
+            orphaned = conn.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            ).rowcount
+    return {"checkpoints": deleted, "writes": orphaned}
+
+
+def reclaim(conn: sqlite3.Connection, vacuum_pages=None):
+    """Checkpoint/truncate the WAL and incrementally vacuum free pages.
+
+    The first run on a database created without ``auto_vacuum=INCREMENTAL``
+    switches the mode, which needs one full ``VACUUM``; later runs only
+    release ``vacuum_pages`` pages (all free pages when ``None``).
+    """
+    converted = False
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        converted = True
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    size_before = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    pages = "" if vacuum_pages is None else f"({int(vacuum_pages)})"
+    # incremental_vacuum frees one page per step of its statement, and
+    # execute() only takes the first step; executescript() runs it to the end
+    conn.executescript(f"PRAGMA incremental_vacuum{pages};")
+    free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    size_after = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    # TRUNCATE reports zeros once the log is reset, so read the sizes first
+    _, wal_pages, _ = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {
+        "converted_to_incremental": converted,
+        "pages_released": free_before - free_after,
+        "db_bytes_before": size_before,
+        "db_bytes_after": size_after,
+        "wal_pages_checkpointed": wal_pages,
+        "wal_busy": bool(busy),
+    }
+
+
+def compact(conn: sqlite3.Connection, keep_last=None, max_age_days=None, vacuum_pages=None):
+    """Prune per the retention policy, then reclaim the space."""
+    stats = {"deleted": prune(conn, keep_last=keep_last, max_age_days=max_age_days)}
+    stats.update(reclaim(conn, vacuum_pages=vacuum_pages))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune and compact the chatbot checkpoint database.")
+    parser.add_argument("database", nargs="?", default="chatbot.db")
+    parser.add_argument("--keep-last", type=int, help="checkpoints to keep per thread")
+    parser.add_argument("--max-age-days", type=float, help="drop checkpoints older than this")
+    parser.add_argument("--vacuum-pages", type=int, help="free pages to release (default: all)")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.database)
+    try:
+        stats = compact(
+            conn,
+            keep_last=args.keep_last,
+            max_age_days=args.max_age_days,
+            vacuum_pages=args.vacuum_pages,
+        )
+    finally:
+        conn.close()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""HTTP/SSE service in front of the async LangGraph chatbot.
+
+One backend for every client: the Streamlit UI, the Next.js
+``/api/chatbot/stream`` route or anything else that speaks HTTP. Each worker
+process compiles the async graph once and shares it across requests; the
+SQLite checkpointer runs in WAL mode, so several workers can serve the same
+``chatbot.db``.
+
+    python server.py --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints:
+
+* ``POST /chat/messages``  -> full reply as JSON
+* ``POST /chat/stream``    -> Server-Sent Events (``text``, ``tool_call``,
+  ``tool_result``, ``done``, ``error``), the same event shapes the Next.js
+  stream route emits
+* ``GET  /threads``        -> paginated thread list
+* ``GET  /threads/{id}``   -> a thread's messages
+* ``GET  /metrics``        -> Prometheus metrics (see ``metrics.py``)
+* ``POST /tasks/invalidate`` -> drop the caller's cached task snapshot after a
+  task write (see ``task_client.py``)
+* ``POST /tasks/events``  -> apply one task create / update / complete / delete
+  to the cached snapshot and priority index instead
+
+The planit task routes call the last two after every write when
+``CHATBOT_API_URL`` points here (``planit-next/src/lib/chatbot-sync.ts``).
+With ``--workers`` > 1 a notification reaches one worker; the others pick the
+change up when their snapshot expires (``CHATBOT_TASKS_TTL``, 30 s).
+
+Every request carries the caller's ``x-user-id`` header (set by the Next.js
+proxy after authentication, as for ``/api/tasks``); threads are scoped to it.
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from typing import Literal
+
+import uvicorn
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from pydantic import BaseModel
+
+from admission import AdmissionError
+from main_backend import (
+    admission_stats, ahealth, alist_threads, async_chatbot, prometheus_metrics,
+)
+from stream_adapter import text_of
+from thread_registry import InvalidCursorError, QuotaExceededError, ThreadAccessError
+
+
+class MessageIn(BaseModel):
+    message: str
+    thread_id: str | None = None
+
+
+class TaskEvent(BaseModel):
+    type: Literal["created", "updated", "completed", "deleted"]
+    # the task as GET /api/tasks returns it (for deletes, just its id)
+    task: dict
+
+
+def message_dict(message):
+    if isinstance(message, HumanMessage):
+        role = "user"
+    elif isinstance(message, ToolMessage):
+        role = "tool"
+    else:
+        role = "assistant"
+    return {"role": role, "content": text_of(message.content), "name": getattr(message, "name", None)}
+
+
+def turn_config(thread_id, user_id):
+    return {
+        "configurable": {"thread_id": thread_id, "user_id": user_id},
+        "metadata": {"thread_id": thread_id, "user_id": user_id},
+        "run_name": "chat_turn",
+    }
+
+
+def sse(payload):
+    return f"data: {json.dumps(payload, default=str)}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with async_chatbot() as bot:
+        app.state.chatbot = bot
+        yield
+
+
+app = FastAPI(title="PlanIt Chatbot", lifespan=lifespan)
+
+# Seconds clients are told to wait when the model queue is full
+RETRY_AFTER = 5
+
+
+@app.exception_handler(AdmissionError)
+async def busy(request: Request, exc: AdmissionError):
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(RETRY_AFTER)}
+    )
+
+
+def current_user(x_user_id: str | None = Header(default=None)):
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return x_user_id
+
+
+async def _authorize(request: Request, thread_id, user_id, write=True):
+    # checked up front so a stream never starts for a thread the user cannot use
+    registry = request.app.state.chatbot.checkpointer.registry
+    try:
+        await asyncio.to_thread(registry.authorize, thread_id, user_id, write)
+    except ThreadAccessError:
+        # same answer as a missing thread, so ids of other users do not leak
+        raise HTTPException(status_code=404, detail="Thread not found")
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+def _validated(body: MessageIn):
+    message = body.message.strip()
+    if not message:
+        raise HTTPException(status_code=400, detail="Message is required")
+    return message, body.thread_id or str(uuid.uuid4())
+
+
+@app.get("/health")
+async def health(request: Request):
+    report = await ahealth(request.app.state.chatbot.checkpointer)
+    if not report["ok"]:
+        raise HTTPException(status_code=503, detail=report)
+    return {"status": "ok", **report}
+
+
+@app.get("/admission")
+async def get_admission():
+    return admission_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(prometheus_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/chat/messages")
+async def send_message(body: MessageIn, request: Request, user_id: str = Depends(current_user)):
+    message, thread_id = _validated(body)
+    await _authorize(request, thread_id, user_id)
+    state = await request.app.state.chatbot.ainvoke(
+        {"messages": [HumanMessage(content=message)]}, config=turn_config(thread_id, user_id)
+    )
+    return {"thread_id": thread_id, "response": text_of(state["messages"][-1].content)}
+
+
+@app.post("/chat/stream")
+async def stream_message(body: MessageIn, request: Request, user_id: str = Depends(current_user)):
+    message, thread_id = _validated(body)
+    await _authorize(request, thread_id, user_id)
+    chatbot = request.app.state.chatbot
+
+    async def events():
+        try:
+            async for mode, payload in chatbot.astream(
+                {"messages": [HumanMessage(content=message)]},
+                config=turn_config(thread_id, user_id),
+                stream_mode=["messages", "updates"],
+            ):
+                if mode == "messages":
+                    chunk, _ = payload
+                    if isinstance(chunk, AIMessage) and (text := text_of(chunk.content)):
+                        yield sse({"type": "text", "content": text})
+                    elif isinstance(chunk, ToolMessage):
+                        yield sse({
+                            "type": "tool_result",
+                            "toolResult": {"id": chunk.tool_call_id, "name": chunk.name, "result": chunk.content},
+                        })
+                elif "chat_node" in payload:
+                    for msg in payload["chat_node"].get("messages", []):
+                        if isinstance(msg, AIMessage):
+                            for call in msg.tool_calls:
+                                yield sse({
+                                    "type": "tool_call",
+                                    "toolCall": {"id": call["id"], "name": call["name"], "arguments": call["args"]},
+                                })
+            yield sse({"type": "done", "threadId": thread_id})
+        except AdmissionError as e:
+            yield sse({"type": "error", "message": str(e), "retryAfter": RETRY_AFTER})
+        except Exception:
+            yield sse({"type": "error", "message": "Streaming failed"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
+
+
+@app.get("/threads")
+async def get_threads(
+    request: Request,
+    limit: int = 50,
+    cursor: str | None = None,
+    q: str | None = None,
+    user_id: str = Depends(current_user),
+):
+    try:
+        threads, next_cursor = await alist_threads(
+            limit=min(limit, 200), cursor=cursor, query=q, user_id=user_id,
+            registry=request.app.state.chatbot.checkpointer.registry,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"threads": threads, "next_cursor": next_cursor}
+
+
+@app.get("/threads/{thread_id}")
+async def get_thread(thread_id: str, request: Request, user_id: str = Depends(current_user)):
+    await _authorize(request, thread_id, user_id, write=False)
+    state = await request.app.state.chatbot.aget_state(turn_config(thread_id, user_id))
+    if not state.values:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return {
+        "thread_id": thread_id,
+        "checkpoint_id": state.config["configurable"].get("checkpoint_id"),
+        "messages": [message_dict(m) for m in state.values.get("messages", [])],
+    }
+
+
+@app.post("/tasks/invalidate", status_code=204)
+async def invalidate_tasks(user_id: str = Depends(current_user)):
+    # called by the Next.js task routes after a create, update or import
+    import task_client
+
+    task_client.invalidate(user_id)
+
+
+@app.post("/tasks/events", status_code=204)
+async def task_event(event: TaskEvent, user_id: str = Depends(current_user)):
+    # cheaper than /tasks/invalidate: the cached snapshot and its priority
+    # index are patched instead of refetched (the Next.js delete route)
+    import task_client
+
+    if "id" not in event.task:
+        raise HTTPException(status_code=400, detail="task.id is required")
+    await asyncio.to_thread(task_client.apply_event, user_id, event.type, event.task)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the LangGraph chatbot over HTTP/SSE.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
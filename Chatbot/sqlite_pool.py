@@ -0,0 +1,195 @@
+"""Pooled, WAL-tuned SQLite storage for the LangGraph checkpointer.
+
+``SqliteSaver`` funnels every read and write through one connection and one
+lock. ``PooledSqliteSaver`` keeps the same schema and SQL but splits the
+traffic: all writes go through a single writer connection (SQLite allows only
+one writer anyway), while ``get_tuple``/``list`` borrow from a pool of
+read-only connections that run concurrently under WAL.
+
+``put_writes`` commits are batched: pending writes ride along with the next
+checkpoint commit (or are flushed once ``write_batch`` of them pile up,
+before any read so readers never miss them, and at most ``max_defer``
+seconds after the first one, so a run that fails or hangs between steps
+does not hold the write lock against other connections). ``batch()``
+extends the same grouping to every write of a bulk job such as
+``transfer.py`` imports.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.utils import load_pending_writes, pending_writes_sql, search_where
+
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+# longest a batched put_writes commit may wait for the next checkpoint
+DEFAULT_MAX_DEFER = 0.1
+
+
+def connect(path, *, readonly=False, mmap_size=DEFAULT_MMAP_SIZE, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS):
+    """Open a connection with the pragmas every checkpoint connection needs."""
+    if readonly:
+        conn = sqlite3.connect(
+            f"file:{os.path.abspath(path)}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=busy_timeout_ms / 1000,
+        )
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout_ms / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    return conn
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """``SqliteSaver`` with one writer connection and a read-only pool."""
+
+    def __init__(
+        self,
+        path="chatbot.db",
+        *,
+        readers=4,
+        write_batch=64,
+        max_defer=DEFAULT_MAX_DEFER,
+        mmap_size=DEFAULT_MMAP_SIZE,
+        busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS,
+        serde=None,
+    ):
+        super().__init__(
+            connect(path, mmap_size=mmap_size, busy_timeout_ms=busy_timeout_ms), serde=serde
+        )
+        self.path = path
+        self.write_batch = write_batch
+        self.max_defer = max_defer
+        self._pending = 0
+        self._timer = None
+        self._deferred = threading.local()
+        # readers are opened after setup() so the tables they query exist
+        self.setup()
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(
+                connect(path, readonly=True, mmap_size=mmap_size, busy_timeout_ms=busy_timeout_ms)
+            )
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        if not transaction:
+            with self.reader() as conn:
+                cur = conn.cursor()
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+            return
+
+        with self.lock:
+            self.setup()
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            finally:
+                if getattr(self._deferred, "active", False) and self._pending < self.write_batch:
+                    self._pending += 1
+                    if self._pending == 1:
+                        self._schedule_flush()
+                else:
+                    self.conn.commit()
+                    self._pending = 0
+                cur.close()
+
+    def _schedule_flush(self):
+        # caller holds the lock; the timer only commits if writes still wait
+        self._timer = threading.Timer(self.max_defer, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection, flushing batched writes first."""
+        self.flush()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # SqliteSaver.list loads pending writes through a cursor on the shared
+        # writer connection, outside the lock; here both queries use the reader
+        where, params = search_where(config, filter, before)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+            f" metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (*params, limit)
+        with self.reader() as conn, closing(conn.cursor()) as cur, closing(conn.cursor()) as wcur:
+            cur.execute(query, params)
+            for thread_id, ns, checkpoint_id, parent_id, type_, checkpoint, metadata in cur:
+                wcur.execute(pending_writes_sql(self._has_task_path), (thread_id, ns, checkpoint_id))
+                yield CheckpointTuple(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+                    self.serde.loads_typed((type_, checkpoint)),
+                    json.loads(metadata) if metadata is not None else {},
+                    (
+                        {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                        if parent_id
+                        else None
+                    ),
+                    load_pending_writes(wcur, self.serde),
+                )
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        previous = getattr(self._deferred, "active", False)
+        self._deferred.active = True
+        try:
+            super().put_writes(config, writes, task_id, task_path)
+        finally:
+            self._deferred.active = previous
+
+    @contextmanager
+    def batch(self):
+        """Group every write made by this thread into ``write_batch``-sized transactions.
+
+        Statements run directly on ``conn`` inside the block (e.g.
+        ``ThreadRegistry.record(..., commit=False)``) join the same
+        transactions. Everything is committed on exit, also after an error,
+        so a failed bulk job keeps the batches it completed.
+        """
+        previous = getattr(self._deferred, "active", False)
+        self._deferred.active = True
+        try:
+            yield self
+        finally:
+            self._deferred.active = previous
+            if not previous:
+                with self.lock:
+                    self.conn.commit()
+                    self._pending = 0
+
+    def flush(self):
+        """Commit any ``put_writes`` still waiting for a batch commit."""
+        if self._pending:
+            with self.lock:
+                if self._pending:
+                    self.conn.commit()
+                    self._pending = 0
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self.flush()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self.conn.close()
@@ -0,0 +1,100 @@
+"""Alpha Vantage quotes for the stock tools.
+
+Single quotes are cached for 60 seconds and concurrent requests for the same
+symbol share one upstream call, so a batch of symbols (or several users
+asking about the same ticker) costs at most one request per symbol.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from caching import AsyncSingleFlight, SingleFlight, cached
+from http_client import AsyncHttpClient, CircuitBreaker, HttpClient, HttpClientError, RateLimiter
+
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "C9PE94QUEW9VWGFM")
+MAX_BATCH = 10
+
+# One quota and one breaker for Alpha Vantage, shared by the sync and async clients
+# (free tier: 5 calls/minute).
+limiter = RateLimiter.per_minute(int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MIN", "5")))
+breaker = CircuitBreaker()
+client = HttpClient(limiter=limiter, breaker=breaker)
+async_client = AsyncHttpClient(limiter=limiter, breaker=breaker)
+
+_in_flight = SingleFlight()
+_async_in_flight = AsyncSingleFlight()
+_pool = ThreadPoolExecutor(max_workers=MAX_BATCH, thread_name_prefix="quote")
+
+
+def _params(symbol):
+    return {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": ALPHA_VANTAGE_API_KEY}
+
+
+def is_quote(result):
+    """Only cache real quotes, not errors or Alpha Vantage rate-limit notes."""
+    return isinstance(result, dict) and "Global Quote" in result
+
+
+def normalize(symbols):
+    """Upper-case, strip and de-duplicate symbols, keeping their order."""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+
+def _request(symbol):
+    try:
+        return client.get_json(ALPHA_VANTAGE_URL, params=_params(symbol))
+    except HttpClientError as e:
+        return {"error": str(e)}
+
+
+async def _arequest(symbol):
+    try:
+        return await async_client.get_json(ALPHA_VANTAGE_URL, params=_params(symbol))
+    except HttpClientError as e:
+        return {"error": str(e)}
+
+
+@cached(ttl=60, maxsize=256, key=lambda symbol: symbol.upper(), cache_if=is_quote)
+def fetch_quote(symbol):
+    symbol = symbol.upper()
+    return _in_flight.do(symbol, _request, symbol)
+
+
+@cached(ttl=60, maxsize=256, key=lambda symbol: symbol.upper(), cache_if=is_quote)
+async def afetch_quote(symbol):
+    symbol = symbol.upper()
+    return await _async_in_flight.do(symbol, _arequest, symbol)
+
+
+def fetch_quotes(symbols):
+    """``{symbol: raw quote}`` for up to ``MAX_BATCH`` symbols, fetched concurrently."""
+    symbols = normalize(symbols)[:MAX_BATCH]
+    return dict(zip(symbols, _pool.map(fetch_quote, symbols)))
+
+
+async def afetch_quotes(symbols):
+    symbols = normalize(symbols)[:MAX_BATCH]
+    return dict(zip(symbols, await asyncio.gather(*(afetch_quote(s) for s in symbols))))
+
+
+def format_table(quotes):
+    """Render quotes as one compact pipe table the model can quote back."""
+    rows = ["symbol | price | change | change % | volume | trading day"]
+    for symbol, result in quotes.items():
+        quote = result.get("Global Quote") if isinstance(result, dict) else None
+        if not quote:
+            reason = (result or {}).get("error") or (result or {}).get("Note") \
+                or (result or {}).get("Information") or "no data"
+            rows.append(f"{symbol} | error: {reason}")
+            continue
+        rows.append(" | ".join([
+            symbol,
+            quote.get("05. price", "?"),
+            quote.get("09. change", "?"),
+            quote.get("10. change percent", "?"),
+            quote.get("06. volume", "?"),
+            quote.get("07. latest trading day", "?"),
+        ]))
+    return "\n".join(rows)
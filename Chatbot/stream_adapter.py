@@ -0,0 +1,98 @@
+"""Coalescing adapter between ``chatbot.stream(stream_mode="messages")`` and a UI.
+
+The model emits many tiny chunks, and every yield into ``st.write_stream`` is
+a websocket round-trip. ``TokenStream`` drops empty deltas (tool-call chunks,
+keep-alives), batches text until ``min_chars`` have accumulated or
+``max_interval`` seconds have passed since the last flush, and records
+time-to-first-token and throughput for the turn. The first text chunk is
+always flushed immediately so perceived latency does not change.
+"""
+
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+
+def text_of(content):
+    """Plain text of a message ``content`` (string or list of parts)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, (str, dict))
+    )
+
+
+class TokenStream:
+    """Iterate coalesced assistant text from ``(message_chunk, metadata)`` pairs.
+
+    ``on_tool`` is called with every ``ToolMessage`` seen on the way, so the
+    caller can show tool progress without handling the raw stream.
+    """
+
+    def __init__(self, source, min_chars=48, max_interval=0.08, on_tool=None):
+        self.source = source
+        self.min_chars = min_chars
+        self.max_interval = max_interval
+        self.on_tool = on_tool
+        self.started_at = None
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks_received = 0
+        self.chunks_yielded = 0
+        self.empty_dropped = 0
+        self.characters = 0
+        self.usage_tokens = 0
+
+    def __iter__(self):
+        self.started_at = last_flush = time.perf_counter()
+        buffer, size = [], 0
+        for chunk, _metadata in self.source:
+            self.chunks_received += 1
+            if isinstance(chunk, ToolMessage):
+                if self.on_tool is not None:
+                    self.on_tool(chunk)
+                continue
+            if not isinstance(chunk, AIMessage):
+                continue
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                self.usage_tokens += usage.get("output_tokens", 0)
+            text = text_of(chunk.content)
+            if not text:
+                self.empty_dropped += 1
+                continue
+
+            self.characters += len(text)
+            buffer.append(text)
+            size += len(text)
+            now = time.perf_counter()
+            if self.first_token_at is None:
+                self.first_token_at = now
+            if self.chunks_yielded == 0 or size >= self.min_chars or now - last_flush >= self.max_interval:
+                self.chunks_yielded += 1
+                yield "".join(buffer)
+                buffer, size, last_flush = [], 0, now
+        if buffer:
+            self.chunks_yielded += 1
+            yield "".join(buffer)
+        self.finished_at = time.perf_counter()
+
+    def stats(self):
+        """TTFT, tokens/sec and chunk counts for the finished turn."""
+        end = self.finished_at or time.perf_counter()
+        # usage metadata when the provider reports it, else ~4 characters per token
+        tokens = self.usage_tokens or -(-self.characters // 4)
+        ttft = self.first_token_at - self.started_at if self.first_token_at else None
+        generating = end - self.first_token_at if self.first_token_at else 0.0
+        return {
+            "ttft_seconds": ttft,
+            "duration_seconds": end - self.started_at if self.started_at else 0.0,
+            "tokens": tokens,
+            "tokens_estimated": not self.usage_tokens,
+            "tokens_per_second": tokens / generating if generating > 0 else None,
+            "chunks_received": self.chunks_received,
+            "chunks_yielded": self.chunks_yielded,
+            "empty_dropped": self.empty_dropped,
+        }
@@ -0,0 +1,306 @@
+"""PlanIt tasks API client for the task tools.
+
+The Next.js assistant fetched ``/api/tasks`` once per tool call, so a turn
+that searched, counted and prioritized tasks made three round trips for the
+same list. Here every tool works on one per-user snapshot of the task list:
+
+* one pooled HTTP client (sync and async) talks to the tasks API,
+* concurrent lookups for the same user share one request, so the tool calls
+  of a turn (run in parallel by ``ParallelToolNode``) cost a single fetch,
+* the snapshot is kept for ``SNAPSHOT_TTL`` seconds. Task writes either
+  patch it in place (``apply_event``, ``POST /tasks/events`` on the chatbot
+  service) or drop it (``invalidate``, ``POST /tasks/invalidate``).
+
+Counting runs locally on the snapshot, priorities come from the user's
+``PriorityIndex`` (priority_index.py) and text search from the FTS5 index
+in task_search.py. Both outlive a snapshot: a refetch is diffed into them
+and events patch them, so neither is rebuilt when the TTL runs out.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from caching import TOOL_CACHES, AsyncSingleFlight, SingleFlight, TTLCache, _MISSING
+from http_client import AsyncHttpClient, CircuitBreaker, HttpClient, HttpClientError
+from priority_index import PriorityIndex, parse_time, reason
+from task_search import DEFAULT_PATH, open_index
+
+TASKS_API_URL = (
+    os.getenv("PLANIT_API_URL") or os.getenv("NEXTAUTH_URL") or "http://localhost:3000"
+).rstrip("/")
+SNAPSHOT_TTL = float(os.getenv("CHATBOT_TASKS_TTL", "30"))
+TASK_INDEX_PATH = os.getenv("CHATBOT_TASK_INDEX", DEFAULT_PATH)
+SEARCH_LIMIT = 10
+SUGGEST_LIMIT = 5
+
+breaker = CircuitBreaker()
+client = HttpClient(retries=2, breaker=breaker)
+async_client = AsyncHttpClient(retries=2, breaker=breaker)
+
+_snapshots = TTLCache(maxsize=1024, ttl=SNAPSHOT_TTL)
+TOOL_CACHES["task_snapshots"] = _snapshots
+_in_flight = SingleFlight()
+_async_in_flight = AsyncSingleFlight()
+# Bumped by invalidate(); a fetch that started before the bump is not cached.
+_generations = Counter()
+_generation_lock = threading.Lock()
+# Serialize index syncs and events per user (striped), so one user's large
+# reconcile does not hold up anyone else's fetches or events.
+_user_locks = [threading.Lock() for _ in range(64)]
+# user_id -> digest of the task list last reconciled into the indexes
+_synced = {}
+# None if this SQLite lacks FTS5; search then scans the snapshot
+search_index = open_index(TASK_INDEX_PATH)
+# user_id -> PriorityIndex, kept across snapshots (least recently used dropped)
+_priority_indexes = OrderedDict()
+
+
+# -------------------
+# Snapshots
+# -------------------
+
+class TaskSnapshot:
+    """One user's task list (newest first) plus the priority index over it.
+
+    ``indexed`` is False for a private snapshot whose tasks were not synced
+    into ``search_index``; ``search`` then scans ``tasks`` instead.
+    """
+
+    def __init__(self, user_id, tasks, priorities=None, indexed=True):
+        self.user_id = user_id
+        self.tasks = tasks
+        self.priorities = PriorityIndex(tasks) if priorities is None else priorities
+        self.indexed = indexed
+        self._lock = threading.Lock()
+
+    def apply(self, kind, task):
+        """Fold one task event (``created`` / ``updated`` / ``completed`` / ``deleted``) in."""
+        task_id = task.get("id")
+        # readers may be iterating the old list, so it is replaced, not mutated
+        with self._lock:
+            if kind == "deleted":
+                self.tasks = [t for t in self.tasks if t.get("id") != task_id]
+                self.priorities.remove(task_id)
+                return
+            if any(t.get("id") == task_id for t in self.tasks):
+                self.tasks = [task if t.get("id") == task_id else t for t in self.tasks]
+            else:
+                self.tasks = [task, *self.tasks]
+            self.priorities.upsert(task)
+
+
+def _url():
+    return f"{TASKS_API_URL}/api/tasks"
+
+
+def _headers(user_id):
+    return {"x-user-id": user_id}
+
+
+def _generation(user_id):
+    with _generation_lock:
+        return _generations[user_id]
+
+
+def _user_lock(user_id):
+    return _user_locks[hash(user_id) % len(_user_locks)]
+
+
+def _digest(tasks):
+    return hashlib.blake2b(
+        json.dumps(tasks, sort_keys=True, default=str).encode(), digest_size=16
+    ).digest()
+
+
+def _priorities(user_id, tasks, changed):
+    """The user's ``PriorityIndex``, with ``tasks`` diffed in if ``changed``; caller holds the user lock."""
+    with _generation_lock:
+        index = _priority_indexes.get(user_id)
+        if index is not None:
+            _priority_indexes.move_to_end(user_id)
+    if index is None:
+        index = PriorityIndex(tasks)
+        with _generation_lock:
+            _priority_indexes[user_id] = index
+            if len(_priority_indexes) > _snapshots.maxsize:
+                _priority_indexes.popitem(last=False)
+    elif changed:
+        index.sync(tasks)
+    return index
+
+
+def _store(user_id, generation, tasks):
+    # Under the user's lock, so an event that arrives meanwhile is applied
+    # after the sync; the generation lock is only held to read / cache.
+    with _user_lock(user_id):
+        if _generation(user_id) != generation:
+            # predates a write: answer from it, but leave the shared indexes alone
+            return TaskSnapshot(user_id, tasks, indexed=False)
+        digest = _digest(tasks)
+        # an unchanged list (the usual TTL refetch) needs no reconcile
+        changed = _synced.get(user_id) != digest
+        snap = TaskSnapshot(user_id, tasks, _priorities(user_id, tasks, changed))
+        if changed and search_index is not None:
+            search_index.sync_user(user_id, tasks)
+        _synced[user_id] = digest
+        with _generation_lock:
+            if _generations[user_id] == generation:
+                _snapshots.put(user_id, snap)
+    return snap
+
+
+def _fetch(user_id):
+    generation = _generation(user_id)
+    return _store(user_id, generation, client.get_json(_url(), headers=_headers(user_id)))
+
+
+async def _afetch(user_id):
+    generation = _generation(user_id)
+    tasks = await async_client.get_json(_url(), headers=_headers(user_id))
+    # the reconcile writes SQLite; keep it off the event loop
+    return await asyncio.to_thread(_store, user_id, generation, tasks)
+
+
+def snapshot(user_id):
+    """``TaskSnapshot`` of ``user_id``'s tasks, as returned by ``GET /api/tasks``."""
+    snap = _snapshots.get(user_id)
+    if snap is _MISSING:
+        snap = _in_flight.do(user_id, _fetch, user_id)
+    return snap
+
+
+async def asnapshot(user_id):
+    snap = _snapshots.get(user_id)
+    if snap is _MISSING:
+        snap = await _async_in_flight.do(user_id, _afetch, user_id)
+    return snap
+
+
+def invalidate(user_id=None):
+    """Forget the snapshot of ``user_id`` (or of everyone) after a task write."""
+    with _generation_lock:
+        if user_id is None:
+            for key in _generations:
+                _generations[key] += 1
+            _snapshots.invalidate()
+            _priority_indexes.clear()
+            _synced.clear()
+        else:
+            _generations[user_id] += 1
+            _snapshots.invalidate(user_id)
+
+
+def apply_event(user_id, kind, task):
+    """Patch the cached snapshot (if any) after a task was created / updated / completed / deleted."""
+    with _user_lock(user_id):
+        with _generation_lock:
+            # a fetch already in flight may predate the write; do not cache it
+            _generations[user_id] += 1
+        # the indexes no longer hold exactly the last fetched list
+        _synced.pop(user_id, None)
+        if search_index is not None:
+            if kind == "deleted":
+                search_index.delete(user_id, task["id"])
+            else:
+                search_index.upsert(user_id, task)
+        snap = _snapshots.get(user_id)
+        if snap is not _MISSING:
+            snap.apply(kind, task)
+
+
+# -------------------
+# Queries
+# -------------------
+
+def search(snap, query=None, status=None, priority=None, limit=SEARCH_LIMIT):
+    """Tasks whose title or description match every word of ``query`` (as prefixes), best first."""
+    if search_index is not None and snap.indexed:
+        found, tasks = search_index.search(snap.user_id, query, status, priority, limit)
+        return {"found": found, "tasks": [summarize(task) for task in tasks]}
+    needle = (query or "").strip().lower()
+    found = [
+        task for task in snap.tasks
+        if (not status or task.get("status") == status)
+        and (not priority or task.get("priority") == priority)
+        and (not needle or needle in (task.get("title") or "").lower()
+             or needle in (task.get("description") or "").lower())
+    ]
+    return {"found": len(found), "tasks": [summarize(task) for task in found[:limit]]}
+
+
+def summarize(task):
+    return {
+        "id": task.get("id"),
+        "title": task.get("title"),
+        "description": (task.get("description") or "")[:100] or None,
+        "status": task.get("status"),
+        "priority": task.get("priority"),
+        "dueDate": task.get("dueDate"),
+    }
+
+
+def stats(snap, now=None):
+    """Same counts as ``GET /api/tasks/stats``."""
+    tasks = snap.tasks
+    today = (now or datetime.now(timezone.utc)).date()
+    status = Counter(task.get("status") for task in tasks)
+    priority = Counter(task.get("priority") for task in tasks)
+    overdue = 0
+    for task in tasks:
+        due = parse_time(task.get("dueDate"))
+        if due is not None and task.get("status") != "completed" and due.date() < today:
+            overdue += 1
+    return {
+        "totalTasks": len(tasks),
+        "pendingTasks": status["pending"],
+        "inProgressTasks": status["in-progress"],
+        "completedTasks": status["completed"],
+        "overdueTasks": overdue,
+        "highPriority": priority["high"],
+        "mediumPriority": priority["medium"],
+        "lowPriority": priority["low"],
+    }
+
+
+def suggest(snap, limit=SUGGEST_LIMIT):
+    """Highest-scoring open tasks, from the snapshot's priority index."""
+    return {
+        "recommendations": [
+            {
+                "title": task.get("title"),
+                "priority": task.get("priority"),
+                "status": task.get("status"),
+                "dueDate": task.get("dueDate"),
+                "reason": reason(task.get("priority"), days),
+            }
+            for task, days in snap.priorities.top(limit)
+        ]
+    }
+
+
+# -------------------
+# Tools
+# -------------------
+
+def answer(query, user_id, *args):
+    """Run ``query`` on the user's snapshot; fetch errors become an error payload."""
+    try:
+        snap = snapshot(user_id)
+    except HttpClientError as e:
+        return {"error": f"Failed to fetch tasks: {e}"}
+    return query(snap, *args)
+
+
+async def aanswer(query, user_id, *args):
+    try:
+        snap = await asnapshot(user_id)
+    except HttpClientError as e:
+        return {"error": f"Failed to fetch tasks: {e}"}
+    # search reads SQLite behind the index lock; keep it off the event loop
+    return await asyncio.to_thread(query, snap, *args)
+
@@ -0,0 +1,252 @@
+"""Full-text index over task titles and descriptions for ``search_tasks``.
+
+``search_tasks`` used to scan the whole task list for a substring and keep
+the first ten hits. This module keeps an SQLite FTS5 index of every user's
+tasks in ``task_index.db`` next to ``chatbot.db`` instead:
+
+* ``tasks`` holds one row per task (with status / priority for filtering),
+  and the external-content FTS5 table ``task_fts`` indexes its title and
+  description through triggers; edits that leave the text alone (a status
+  change) do not touch the FTS index,
+* words are indexed per user: each is case- and accent-folded and prefixed
+  with a short hash of the owner, so a query only reads that user's posting
+  lists. bm25 takes its term frequencies from those per-user postings, but
+  the document count and average length it normalizes by are global to
+  ``task_fts`` (every user's tasks),
+* each word of a query of two or more characters is a prefix term (``rep``
+  finds "report"); a single character only matches itself,
+* matches are ranked with bm25, the title weighted above the description.
+  Only the matches of the ``RANK_WINDOW`` newest tasks (by ``createdAt``)
+  are ranked, so a broad prefix costs a bounded amount of bm25 work; the
+  match count stays exact. Two- and three-letter prefixes also have FTS5
+  prefix indexes (``PREFIX_INDEX``, about 14% more disk). With 20k tasks per
+  user a query for ``w1`` (19.5k matches) takes about 20 ms, down from 77 ms,
+* ``upsert`` / ``delete`` apply single task events; ``sync_user`` reconciles
+  a full task list from the API and only rewrites rows that changed.
+
+SQLite builds without FTS5 are detected by ``open_index()``, which then
+returns ``None`` and callers fall back to scanning the list.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+
+DEFAULT_PATH = "task_index.db"
+# bm25 weights for (title, description)
+RANK = "bm25(task_fts, 10.0, 1.0)"
+MAX_TERMS = 8
+# shorter query words are matched whole, not as prefixes
+MIN_PREFIX = 2
+# matches ranked by bm25 per query, newest tasks first
+RANK_WINDOW = 500
+# letters and digits; "_" would split a term in the FTS tokenizer
+_WORD = re.compile(r"[^\W_]+")
+
+# user_key() is 16 hex digits; index the 2- and 3-letter prefixes after it
+# so a short prefix term reads one posting list instead of merging the
+# postings of every word it expands to
+PREFIX_INDEX = "18 19"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    rowid INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    title_terms TEXT,
+    description_terms TEXT,
+    status TEXT,
+    priority TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (user_id, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_user ON tasks (user_id, created_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5 (
+    title_terms, description_terms,
+    content='tasks', content_rowid='rowid', tokenize='unicode61 remove_diacritics 0',
+    prefix='{prefix}'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_fts (rowid, title_terms, description_terms)
+    VALUES (new.rowid, new.title_terms, new.description_terms);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_ad AFTER DELETE ON tasks BEGIN
+    INSERT INTO task_fts (task_fts, rowid, title_terms, description_terms)
+    VALUES ('delete', old.rowid, old.title_terms, old.description_terms);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_au AFTER UPDATE OF title_terms, description_terms ON tasks BEGIN
+    INSERT INTO task_fts (task_fts, rowid, title_terms, description_terms)
+    VALUES ('delete', old.rowid, old.title_terms, old.description_terms);
+    INSERT INTO task_fts (rowid, title_terms, description_terms)
+    VALUES (new.rowid, new.title_terms, new.description_terms);
+END;
+"""
+
+UPSERT = """
+INSERT INTO tasks (user_id, task_id, title_terms, description_terms, status, priority, created_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, task_id) DO UPDATE SET
+    title_terms = excluded.title_terms, description_terms = excluded.description_terms,
+    status = excluded.status, priority = excluded.priority, created_at = excluded.created_at,
+    data = excluded.data
+WHERE tasks.data IS NOT excluded.data
+"""
+
+
+def user_key(user_id):
+    """Fixed-length term prefix of a user (16 hex digits)."""
+    return hashlib.blake2b(str(user_id).encode(), digest_size=8).hexdigest()
+
+
+def words(text):
+    """Lower-cased words of ``text`` with accents removed ("Résumé" -> "resume")."""
+    folded = unicodedata.normalize("NFKD", (text or "").lower())
+    return _WORD.findall("".join(c for c in folded if not unicodedata.combining(c)))
+
+
+def user_terms(key, text):
+    return " ".join(key + word for word in words(text))
+
+
+def match_expression(key, query):
+    """FTS5 query for free text: every word as a quoted (prefix) term, all required."""
+    terms = words(query)[:MAX_TERMS]
+    if not terms:
+        return None
+    return " AND ".join(
+        f'"{key}{term}"' + ("*" if len(term) >= MIN_PREFIX else "") for term in terms
+    )
+
+
+def _data(task):
+    return json.dumps(task, sort_keys=True, default=str)
+
+
+def _row(user_id, key, task, data):
+    return (
+        user_id, str(task["id"]), user_terms(key, task.get("title")),
+        user_terms(key, task.get("description")), task.get("status"), task.get("priority"),
+        str(task.get("createdAt") or ""), data,
+    )
+
+
+class TaskSearchIndex:
+    """FTS5 task index; one writer connection shared behind a lock."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._drop_outdated()
+            self.conn.executescript(SCHEMA.format(prefix=PREFIX_INDEX))
+        except sqlite3.Error:
+            self.conn.close()
+            raise
+
+    def _drop_outdated(self):
+        # An index from before the prefix indexes is dropped and rebuilt; it
+        # only mirrors the tasks API, so the next sync of each user refills it.
+        row = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'"
+        ).fetchone()
+        if row is not None and f"prefix='{PREFIX_INDEX}'" not in row[0]:
+            self.conn.executescript(
+                "DROP TABLE task_fts; DROP TABLE IF EXISTS tasks;"
+            )
+
+    # -- writes --------------------------------------------------------------
+
+    def upsert(self, user_id, task):
+        row = _row(user_id, user_key(user_id), task, _data(task))
+        with self.lock, self.conn:
+            self.conn.execute(UPSERT, row)
+
+    def delete(self, user_id, task_id):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM tasks WHERE user_id = ? AND task_id = ?", (user_id, str(task_id))
+            )
+
+    def sync_user(self, user_id, tasks):
+        """Make the index hold exactly ``tasks`` for ``user_id``; unchanged rows are not rewritten."""
+        key = user_key(user_id)
+        incoming = {str(task["id"]): task for task in tasks if task.get("id") is not None}
+        with self.lock, self.conn:
+            known = dict(self.conn.execute(
+                "SELECT task_id, data FROM tasks WHERE user_id = ?", (user_id,)
+            ))
+            changed = []
+            for task_id, task in incoming.items():
+                data = _data(task)
+                if known.get(task_id) != data:
+                    changed.append(_row(user_id, key, task, data))
+            self.conn.executemany(UPSERT, changed)
+            self.conn.executemany(
+                "DELETE FROM tasks WHERE user_id = ? AND task_id = ?",
+                [(user_id, task_id) for task_id in known.keys() - incoming.keys()],
+            )
+
+    # -- queries -------------------------------------------------------------
+
+    def search(self, user_id, query, status=None, priority=None, limit=10):
+        """``(match_count, tasks)`` for ``user_id``, best matches first.
+
+        Without any words in ``query`` every task matches, newest first.
+        """
+        where, params = ["t.user_id = ?"], [user_id]
+        if status:
+            where.append("t.status = ?")
+            params.append(status)
+        if priority:
+            where.append("t.priority = ?")
+            params.append(priority)
+        expression = match_expression(user_key(user_id), query)
+        if expression is None:
+            source = "tasks t"
+            select = f"SELECT t.data FROM {source} WHERE {{}} ORDER BY t.created_at DESC LIMIT ?"
+        else:
+            # CROSS JOIN keeps the FTS table outermost; otherwise SQLite may walk
+            # tasks_by_user and re-run the MATCH for every row of the user. The
+            # inner query keeps the RANK_WINDOW newest matching tasks, and
+            # the outer one ranks only those.
+            source = "task_fts f CROSS JOIN tasks t ON t.rowid = f.rowid"
+            where.insert(0, "task_fts MATCH ?")
+            params.insert(0, expression)
+            select = (
+                f"SELECT data FROM (SELECT t.data AS data, {RANK} AS score FROM {source}"
+                f" WHERE {{}} ORDER BY t.created_at DESC LIMIT {RANK_WINDOW}) ORDER BY score LIMIT ?"
+            )
+        condition = " AND ".join(where)
+        with self.lock:
+            rows = self.conn.execute(select.format(condition), [*params, limit]).fetchall()
+            found = len(rows)
+            if found == limit:
+                found = self.conn.execute(
+                    f"SELECT COUNT(*) FROM {source} WHERE {condition}", params
+                ).fetchone()[0]
+        return found, [json.loads(data) for (data,) in rows]
+
+    def optimize(self):
+        """Merge FTS segments; worth running after large imports."""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO task_fts (task_fts) VALUES ('optimize')")
+
+    def close(self):
+        self.conn.close()
+
+
+def open_index(path=DEFAULT_PATH):
+    """A ``TaskSearchIndex``, or ``None`` if this SQLite has no FTS5."""
+    try:
+        return TaskSearchIndex(path)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return None
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# the chatbot modules are flat files next to this directory; the offline
+# stubs (stub_alpha_vantage, fake_llm) live in benchmarks/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+# task_client opens its search index at import; keep it out of the working tree
+os.environ.setdefault("CHATBOT_TASK_INDEX", ":memory:")
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from admission import AdmissionController, AdmissionTimeout
+from thread_registry import DEFAULT_USER
+
+
+def hold(controller, user_id, count):
+    """Enter ``count`` admissions for ``user_id`` and keep them open."""
+    contexts = [controller.admit(user_id) for _ in range(count)]
+    for context in contexts:
+        context.__enter__()
+    return contexts
+
+
+def release(contexts):
+    for context in contexts:
+        context.__exit__(None, None, None)
+
+
+def test_per_user_limit_queues_a_signed_in_user():
+    controller = AdmissionController(max_concurrency=8, per_user=2, timeout=0.05)
+    held = hold(controller, "alice", 2)
+    try:
+        with pytest.raises(AdmissionTimeout):
+            with controller.admit("alice"):
+                pass
+        with controller.admit("bob"):
+            pass
+    finally:
+        release(held)
+
+
+def test_default_user_is_only_bound_by_the_global_limit():
+    controller = AdmissionController(max_concurrency=4, per_user=2, timeout=0.05)
+    held = hold(controller, DEFAULT_USER, 4)
+    try:
+        assert controller.stats()["active"] == 4
+        with pytest.raises(AdmissionTimeout):
+            with controller.admit(DEFAULT_USER):
+                pass
+    finally:
+        release(held)
+
+
+def test_zero_per_user_disables_the_user_limit():
+    controller = AdmissionController(max_concurrency=3, per_user=0, timeout=0.05)
+    held = hold(controller, "alice", 3)
+    release(held)
+
+
+def test_waiter_gets_the_released_slot():
+    controller = AdmissionController(max_concurrency=1, per_user=1, timeout=2)
+    held = hold(controller, "alice", 1)
+    admitted = threading.Event()
+
+    def wait_for_slot():
+        with controller.admit("bob"):
+            admitted.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    assert not admitted.wait(0.05)
+    release(held)
+    waiter.join(2)
+    assert admitted.is_set()
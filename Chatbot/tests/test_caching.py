@@ -0,0 +1,40 @@
+import warnings
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from caching import SqliteLLMCache
+
+
+def test_llm_cache_round_trip_without_warnings(tmp_path):
+    cache = SqliteLLMCache(str(tmp_path / "chatbot.db"))
+    message = AIMessage(
+        content="",
+        tool_calls=[{"name": "get_stock_price", "args": {"symbol": "IBM"}, "id": "call_1"}],
+        usage_metadata={"input_tokens": 3, "output_tokens": 2, "total_tokens": 5},
+    )
+    cache.update("prompt", "gemini", [ChatGeneration(message=message, generation_info={"finish_reason": "STOP"})])
+    cache.update("plain", "gemini", [Generation(text="hello")])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        (chat,) = cache.lookup("prompt", "gemini")
+        (plain,) = cache.lookup("plain", "gemini")
+
+    assert chat.message.tool_calls == message.tool_calls
+    assert chat.message.usage_metadata == message.usage_metadata
+    assert chat.generation_info == {"finish_reason": "STOP"}
+    assert plain.text == "hello"
+    assert cache.lookup("other", "gemini") is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_llm_cache_treats_old_rows_as_misses(tmp_path):
+    cache = SqliteLLMCache(str(tmp_path / "chatbot.db"))
+    cache.conn.execute(
+        "INSERT INTO llm_cache (key, generations, created_at) VALUES (?, ?, 0)",
+        (cache._key("prompt", "gemini"), dumps([Generation(text="old")])),
+    )
+    assert cache.lookup("prompt", "gemini") is None
+    assert cache.misses == 1
@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+
+from checkpoint_cache import TieredSaver
+from checkpointing import checkpoint_size
+
+
+class CountingSaver(InMemorySaver):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get_tuple(self, config):
+        self.reads += 1
+        return super().get_tuple(config)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def put(saver, thread_id, payload="x"):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = str(uuid.uuid1())
+    checkpoint["channel_values"] = {"messages": [payload]}
+    saver.put(config(thread_id), checkpoint, {}, {})
+    return checkpoint
+
+
+def test_reads_after_a_write_are_served_from_memory():
+    storage = CountingSaver()
+    saver = TieredSaver(storage)
+    checkpoint = put(saver, "a")
+    assert saver.get_tuple(config("a")).checkpoint["id"] == checkpoint["id"]
+    assert storage.reads == 0
+    assert saver.stats()["hits"] == 1
+
+
+def test_miss_loads_once_then_hits():
+    storage = CountingSaver()
+    put(storage, "a")
+    saver = TieredSaver(storage)
+    saver.get_tuple(config("a"))
+    saver.get_tuple(config("a"))
+    assert storage.reads == 1
+    stats = saver.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_older_checkpoint_ids_bypass_the_cache():
+    storage = CountingSaver()
+    saver = TieredSaver(storage)
+    first = put(saver, "a", "old")
+    put(saver, "a", "new")
+    old_config = {"configurable": {**config("a")["configurable"], "checkpoint_id": first["id"]}}
+    assert saver.get_tuple(old_config).checkpoint["id"] == first["id"]
+    assert storage.reads == 1
+
+
+def test_byte_budget_evicts_least_recently_used():
+    storage = CountingSaver()
+    size = checkpoint_size(storage.serde, put(InMemorySaver(), "probe", "p" * 1000))
+    saver = TieredSaver(storage, max_bytes=int(size * 2.5))
+    for thread_id in ("a", "b"):
+        put(saver, thread_id, thread_id * 1000)
+    saver.get_tuple(config("a"))  # a is now the most recently used
+    put(saver, "c", "c" * 1000)
+
+    stats = saver.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+    saver.get_tuple(config("a"))
+    saver.get_tuple(config("c"))
+    assert storage.reads == 0
+    saver.get_tuple(config("b"))
+    assert storage.reads == 1
+
+
+def test_checkpoints_over_the_budget_are_not_cached():
+    storage = CountingSaver()
+    saver = TieredSaver(storage, max_bytes=100)
+    put(saver, "a", "a" * 1000)
+    assert saver.stats()["entries"] == 0
+    saver.get_tuple(config("a"))
+    assert storage.reads == 1
+
+
+def test_pending_writes_and_deletes_invalidate():
+    storage = CountingSaver()
+    saver = TieredSaver(storage)
+    checkpoint = put(saver, "a")
+    saver.put_writes({"configurable": {**config("a")["configurable"], "checkpoint_id": checkpoint["id"]}},
+                     [("messages", "pending")], "task")
+    assert saver.get_tuple(config("a")).pending_writes[0][2] == "pending"
+    assert storage.reads == 1
+    saver.delete_thread("a")
+    assert saver.get_tuple(config("a")) is None
+    assert saver.stats()["entries"] == 0
+
+
+def test_async_path_shares_the_cache():
+    storage = CountingSaver()
+    saver = TieredSaver(storage)
+
+    async def scenario():
+        checkpoint = empty_checkpoint()
+        checkpoint["id"] = str(uuid.uuid1())
+        await saver.aput(config("a"), checkpoint, {}, {})
+        return await saver.aget_tuple(config("a"))
+
+    assert asyncio.run(scenario()) is not None
+    assert saver.stats()["hits"] == 1
@@ -0,0 +1,120 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+from context_window import NOSTREAM_TAGS, ContextWindow, approx_tokens
+
+
+class FakeSummarizer:
+    """Summarizer stand-in that records every request it gets."""
+
+    def __init__(self):
+        self.requests = []
+        self.model = RunnableLambda(self._summarize)
+
+    def _summarize(self, messages, config=None):
+        self.requests.append(messages[0].content)
+        return AIMessage(content=f"summary {len(self.requests)}")
+
+
+def turn(n, words=40):
+    """A user turn answered through one tool call: 4 messages of ~``words`` words each."""
+    text = " ".join(f"w{n}" for _ in range(words))
+    return [
+        HumanMessage(content=f"question {n} {text}"),
+        AIMessage(content="", tool_calls=[{"name": "calculator", "args": {"n": n}, "id": f"call{n}"}]),
+        ToolMessage(content=f"result {n} {text}", tool_call_id=f"call{n}"),
+        AIMessage(content=f"answer {n} {text}"),
+    ]
+
+
+def history(turns):
+    return [message for n in range(turns) for message in turn(n)]
+
+
+def test_approx_tokens_counts_text_and_tool_calls():
+    assert approx_tokens([HumanMessage(content="x" * 40)]) == 14
+    call = AIMessage(content="", tool_calls=[{"name": "t", "args": {"a": 1}, "id": "1"}])
+    assert approx_tokens([call]) > approx_tokens([AIMessage(content="")])
+
+
+def test_under_budget_sends_everything_unsummarized():
+    fake = FakeSummarizer()
+    window = ContextWindow(fake.model, token_budget=10_000)
+    messages = history(3)
+    prompt, update = window.prepare({"messages": messages})
+    assert prompt == messages
+    assert update == {}
+    assert fake.requests == []
+
+
+def test_over_budget_cuts_at_a_user_message_within_recent_tokens():
+    fake = FakeSummarizer()
+    window = ContextWindow(fake.model, token_budget=400, recent_tokens=200)
+    messages = history(6)
+    prompt, update = window.prepare({"messages": messages})
+
+    cut = update["summarized_count"]
+    assert isinstance(messages[cut], HumanMessage)
+    assert approx_tokens(messages[cut:]) <= 200
+    # the next older turn would not have fit
+    assert approx_tokens(messages[cut - 4:]) > 200
+    assert prompt[0] == SystemMessage(content="Summary of the earlier conversation:\nsummary 1")
+    assert prompt[1:] == messages[cut:]
+    assert update["summary"] == "summary 1"
+    assert "question 0" in fake.requests[0] and f"question {cut // 4}" not in fake.requests[0]
+
+
+def test_latest_user_turn_is_kept_even_if_it_alone_is_over_budget():
+    fake = FakeSummarizer()
+    window = ContextWindow(fake.model, token_budget=100, recent_tokens=10)
+    messages = history(3)
+    prompt, update = window.prepare({"messages": messages})
+    assert update["summarized_count"] == 8
+    assert prompt[1:] == messages[8:]
+
+
+def test_rolling_summary_only_folds_in_new_messages():
+    fake = FakeSummarizer()
+    window = ContextWindow(fake.model, token_budget=400, recent_tokens=200)
+    messages = history(6)
+    _, first = window.prepare({"messages": messages})
+
+    # nothing new: the summary is reused without calling the model
+    state = {"messages": messages, **first}
+    _, update = window.prepare(state)
+    assert update == {} and len(fake.requests) == 1
+
+    messages = messages + history(10)[24:]
+    _, second = window.prepare({"messages": messages, **first})
+    assert second["summarized_count"] > first["summarized_count"]
+    request = fake.requests[1]
+    assert "Existing summary:\nsummary 1" in request
+    # only messages past the previous cut are sent again
+    assert "question 0" not in request
+    assert f"question {first['summarized_count'] // 4}" in request
+
+
+def test_summarizer_factory_is_lazy_and_nostream():
+    fake = FakeSummarizer()
+    made = []
+
+    def factory():
+        made.append(True)
+        return fake.model
+
+    window = ContextWindow(factory, token_budget=400, recent_tokens=200)
+    window.prepare({"messages": history(1)})
+    assert made == []
+    window.prepare({"messages": history(6)})
+    assert made == [True]
+    assert window.summarizer.config["tags"] == NOSTREAM_TAGS
+
+
+def test_aprepare_matches_prepare():
+    window = ContextWindow(FakeSummarizer().model, token_budget=400, recent_tokens=200)
+    sync_prompt, sync_update = window.prepare({"messages": history(6)})
+    window = ContextWindow(FakeSummarizer().model, token_budget=400, recent_tokens=200)
+    async_prompt, async_update = asyncio.run(window.aprepare({"messages": history(6)}))
+    assert (async_prompt, async_update) == (sync_prompt, sync_update)
@@ -0,0 +1,215 @@
+import asyncio
+import time
+
+import pytest
+
+import stub_alpha_vantage
+from http_client import (
+    AsyncHttpClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpClient,
+    HttpClientError,
+    RateLimitedError,
+    RateLimiter,
+    backoff_delay,
+)
+
+
+def served(server):
+    return server.RequestHandlerClass.requests_served
+
+
+@pytest.fixture
+def healthy():
+    server, url = stub_alpha_vantage.start()
+    yield server, url
+    server.shutdown()
+
+
+@pytest.fixture
+def failing():
+    server, url = stub_alpha_vantage.start(fail_rate=1.0)
+    yield server, url
+    server.shutdown()
+
+
+def make_client(**kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("backoff_cap", 0.02)
+    return HttpClient(**kwargs)
+
+
+# -- retries and backoff -----------------------------------------------------
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(8):
+        delay = backoff_delay(attempt, base=0.5, cap=4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_get_json_returns_quote(healthy):
+    server, url = healthy
+    client = make_client()
+    try:
+        data = client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    assert data["Global Quote"]["01. symbol"] == "IBM"
+    assert served(server) == 1
+
+
+def test_retries_5xx_then_gives_up(failing):
+    server, url = failing
+    client = make_client(retries=2)
+    try:
+        with pytest.raises(HttpClientError, match="after 3 attempts"):
+            client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    assert served(server) == 3
+    assert client.breaker.failures == 1
+
+
+def test_retries_connection_errors(healthy):
+    server, url = healthy
+    server.shutdown()
+    server.server_close()
+    client = make_client(retries=1, connect_timeout=0.5)
+    try:
+        with pytest.raises(HttpClientError, match="after 2 attempts"):
+            client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+
+
+# -- circuit breaker ---------------------------------------------------------
+
+def test_breaker_opens_and_fails_fast(failing):
+    server, url = failing
+    client = make_client(retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    try:
+        for _ in range(2):
+            with pytest.raises(HttpClientError):
+                client.get_json(url, params={"symbol": "IBM"})
+        assert client.breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    assert served(server) == 2
+
+
+def test_half_open_trial_closes_or_reopens(failing, healthy):
+    (_, bad_url), (_, good_url) = failing, healthy
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = make_client(retries=0, breaker=breaker)
+    try:
+        with pytest.raises(HttpClientError):
+            client.get_json(bad_url, params={"symbol": "IBM"})
+        time.sleep(0.06)
+        assert breaker.state == "half-open"
+        # a failed trial opens the circuit again for another reset_timeout
+        with pytest.raises(HttpClientError):
+            client.get_json(bad_url, params={"symbol": "IBM"})
+        assert breaker.state == "open"
+        time.sleep(0.06)
+        client.get_json(good_url, params={"symbol": "IBM"})
+        assert breaker.state == "closed"
+    finally:
+        client.close()
+
+
+def test_half_open_admits_one_trial_at_a_time():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.admit() is True
+    assert breaker.admit() is None
+    breaker.end_trial()
+    assert breaker.admit() is True
+
+
+def test_trial_without_verdict_does_not_stick(healthy):
+    _, url = healthy
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    limiter = RateLimiter(rate=0.001, burst=1)
+    limiter.tokens = 0.0
+    client = make_client(retries=0, breaker=breaker, limiter=limiter, max_wait=0)
+    try:
+        breaker.record_failure()
+        # the trial is refused by the rate limiter before reaching upstream
+        with pytest.raises(RateLimitedError):
+            client.get_json(url, params={"symbol": "IBM"})
+        limiter.tokens = 1.0
+        client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    assert breaker.state == "closed"
+
+
+# -- rate limiting -----------------------------------------------------------
+
+def test_rate_limiter_spaces_requests(healthy):
+    server, url = healthy
+    client = make_client(limiter=RateLimiter(rate=20, burst=1))
+    started = time.monotonic()
+    try:
+        for _ in range(4):
+            client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    # one token banked, then one every 50 ms
+    assert time.monotonic() - started >= 0.14
+    assert served(server) == 4
+
+
+def test_rate_limiter_refuses_past_max_wait(healthy):
+    server, url = healthy
+    client = make_client(limiter=RateLimiter(rate=0.5, burst=1), max_wait=0.1)
+    try:
+        client.get_json(url, params={"symbol": "IBM"})
+        with pytest.raises(RateLimitedError):
+            client.get_json(url, params={"symbol": "IBM"})
+    finally:
+        client.close()
+    assert served(server) == 1
+
+
+# -- async client ------------------------------------------------------------
+
+def test_async_client(failing, healthy):
+    (bad_server, bad_url), (good_server, good_url) = failing, healthy
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    limiter = RateLimiter(rate=100, burst=5)
+
+    async def scenario():
+        client = AsyncHttpClient(
+            retries=1, backoff_base=0.01, backoff_cap=0.02, breaker=breaker, limiter=limiter
+        )
+        try:
+            quotes = await asyncio.gather(*(
+                client.get_json(good_url, params={"symbol": s}) for s in ("IBM", "MSFT", "AAPL")
+            ))
+            assert [q["Global Quote"]["01. symbol"] for q in quotes] == ["IBM", "MSFT", "AAPL"]
+            with pytest.raises(HttpClientError, match="after 2 attempts"):
+                await client.get_json(bad_url, params={"symbol": "IBM"})
+            with pytest.raises(CircuitOpenError):
+                await client.get_json(good_url, params={"symbol": "IBM"})
+            await asyncio.sleep(0.06)
+            # a cancelled trial must not keep the circuit half-open forever
+            limiter.tokens = 0.0
+            limiter.rate = 0.1
+            trial = asyncio.ensure_future(client.get_json(good_url, params={"symbol": "IBM"}))
+            await asyncio.sleep(0.01)
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+            limiter.tokens, limiter.rate = 5.0, 100
+            await client.get_json(good_url, params={"symbol": "IBM"})
+            assert breaker.state == "closed"
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    assert served(bad_server) == 2
+    assert served(good_server) == 4
@@ -0,0 +1,75 @@
+import re
+import sqlite3
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import checkpointing
+from checkpoint_cache import TieredSaver
+from metrics import LATENCY_BUCKETS, InstrumentedSaver, Metrics
+
+
+def test_histogram_series_keep_bucket_sum_count_order():
+    metrics = Metrics()
+    for value in (0.003, 0.2, 45, 120):
+        metrics.observe("chatbot_llm_seconds", value, kind="chat")
+    metrics.observe("chatbot_llm_seconds", 1.5, kind="summary")
+    metrics.inc("chatbot_turns_total", run_name="chat_turn", status="ok")
+
+    lines = metrics.render().splitlines()
+    for kind in ("chat", "summary"):
+        series = [line for line in lines if f'kind="{kind}"' in line]
+        bounds = [re.search(r'le="([^"]+)"', line).group(1) for line in series[:-2]]
+        assert bounds == [f"{b:g}" for b in LATENCY_BUCKETS] + ["+Inf"]
+        counts = [int(line.rsplit(" ", 1)[1]) for line in series[:-2]]
+        assert counts == sorted(counts)
+        assert series[-2].startswith("chatbot_llm_seconds_sum")
+        assert series[-1].startswith("chatbot_llm_seconds_count")
+    assert 'chatbot_llm_seconds_count{kind="chat"} 4' in lines
+    assert lines.index("# TYPE chatbot_llm_seconds histogram") < lines.index("# TYPE chatbot_turns_total counter")
+
+
+class CountingSerde:
+    def __init__(self, serde):
+        self.serde = serde
+        self.calls = 0
+
+    def dumps_typed(self, obj):
+        self.calls += 1
+        return self.serde.dumps_typed(obj)
+
+    def __getattr__(self, name):
+        return getattr(self.serde, name)
+
+
+def bytes_total(metrics, op):
+    match = re.search(rf'chatbot_checkpoint_bytes_total{{op="{op}"}} (\d+)', metrics.render())
+    return int(match.group(1))
+
+
+def test_sizes_come_from_the_stored_blobs():
+    storage = SqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    counting = storage.serde = CountingSerde(storage.serde)
+    metrics = Metrics()
+    saver = TieredSaver(InstrumentedSaver(storage, metrics))
+
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    checkpoint = {
+        "v": 1, "id": "1ef00000-0000-6000-8000-000000000001", "ts": "2026-01-01T00:00:00+00:00",
+        "channel_values": {"messages": ["hi"]}, "channel_versions": {}, "versions_seen": {},
+    }
+    saved = saver.put(config, checkpoint, {}, {})
+    # only the storage saver serialized it; the hot tier reused its size
+    assert counting.calls == 1
+    size = len(counting.serde.dumps_typed(checkpoint)[1])
+    assert checkpointing.checkpoint_size(counting, checkpoint) == size
+    assert bytes_total(metrics, "write") == size
+
+    saver.backend.put_writes(saved, [("messages", "a"), ("messages", "bb")], "task")
+    assert counting.calls == 3
+    writes = sum(len(counting.serde.dumps_typed(v)[1]) for v in ("a", "bb"))
+    assert bytes_total(metrics, "write_pending") == writes
+
+    calls = counting.calls
+    assert saver.backend.get_tuple(saved).checkpoint["id"] == checkpoint["id"]
+    assert counting.calls == calls
+    assert bytes_total(metrics, "read") == size + writes
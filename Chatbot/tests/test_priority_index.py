@@ -0,0 +1,50 @@
+import random
+from datetime import date, datetime, timezone
+
+from priority_index import PriorityIndex, today
+
+BASE = today()
+
+
+def make_task(rng, i):
+    due = None
+    if rng.random() > 0.3:
+        due = date.fromordinal(BASE + rng.randint(-5, 10)).isoformat() + "T00:00:00.000Z"
+    return {
+        "id": str(i),
+        "title": f"task {i}",
+        "priority": rng.choice(["high", "medium", "low"]),
+        "status": rng.choice(["pending", "in-progress", "completed"]),
+        "dueDate": due,
+        "createdAt": datetime.fromtimestamp(1.7e9 + rng.randint(0, 10**7), timezone.utc).isoformat(),
+    }
+
+
+def ranking(index, k=20):
+    return [task["id"] for task, _ in index.top(k, day=BASE)]
+
+
+def test_sync_matches_a_fresh_index():
+    rng = random.Random(7)
+    tasks = {str(i): make_task(rng, i) for i in range(500)}
+    index = PriorityIndex(tasks.values(), day=BASE)
+    for _ in range(20):
+        for i in rng.sample(range(600), 40):
+            if rng.random() < 0.3:
+                tasks.pop(str(i), None)
+            else:
+                tasks[str(i)] = make_task(rng, i)
+        index.sync(list(tasks.values()))
+        assert ranking(index) == ranking(PriorityIndex(tasks.values(), day=BASE))
+        assert len(index) == sum(t["status"] != "completed" for t in tasks.values())
+
+
+def test_sync_leaves_unchanged_tasks_alone():
+    rng = random.Random(3)
+    tasks = [make_task(rng, i) for i in range(100)]
+    index = PriorityIndex(tasks, day=BASE)
+    heap_size = len(index._heap)
+    assert index.sync([dict(task) for task in tasks]) == 0
+    assert len(index._heap) == heap_size
+    edited = dict(tasks[0], priority="high", status="pending")
+    assert index.sync([edited, *tasks[1:]]) == 1
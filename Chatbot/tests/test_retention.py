@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import retention
+
+DAY = 86400
+
+
+def make_db(path, rows=2000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("CREATE TABLE blobs (id INTEGER PRIMARY KEY, data BLOB)")
+    with conn:
+        conn.executemany("INSERT INTO blobs (data) VALUES (?)", [(os.urandom(4000),) for _ in range(rows)])
+    with conn:
+        conn.execute("DELETE FROM blobs")
+    return conn
+
+
+def test_reclaim_releases_every_free_page(tmp_path):
+    path = str(tmp_path / "chatbot.db")
+    conn = make_db(path)
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    size_before = os.path.getsize(path)
+    assert free > 1000
+
+    stats = retention.reclaim(conn)
+
+    assert stats["pages_released"] == free
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert stats["db_bytes_after"] < stats["db_bytes_before"]
+    conn.close()
+    assert os.path.getsize(path) < size_before / 10
+
+
+def test_reclaim_releases_at_most_vacuum_pages(tmp_path):
+    conn = make_db(str(tmp_path / "chatbot.db"))
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    stats = retention.reclaim(conn, vacuum_pages=100)
+
+    assert stats["pages_released"] == 100
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == free - 100
+    conn.close()
+
+
+# -- prune -------------------------------------------------------------------
+
+def checkpoint_id(now, age_days, n):
+    """Checkpoint id written ``age_days`` before ``now`` (``n`` keeps ids apart)."""
+    return retention.checkpoint_id_before(now - age_days * DAY + n / 1000)
+
+
+@pytest.fixture
+def saver():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    saver = SqliteSaver(conn)
+    saver.setup()
+    yield saver
+    conn.close()
+
+
+def write_thread(saver, thread_id, ages, ns=""):
+    """One checkpoint per age (oldest first), each with one pending write; returns the ids."""
+    now, ids = time.time(), []
+    for n, age in enumerate(ages):
+        checkpoint = empty_checkpoint()
+        checkpoint["id"] = checkpoint_id(now, age, n)
+        ids.append(checkpoint["id"])
+        config = saver.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ns}}, checkpoint, {}, {})
+        saver.put_writes(config, [("messages", f"{thread_id} {n}")], f"task-{n}")
+    return ids
+
+
+def remaining(saver, table, thread_id):
+    return sorted(
+        row[0] for row in saver.conn.execute(
+            f"SELECT checkpoint_id FROM {table} WHERE thread_id = ?", (thread_id,)
+        )
+    )
+
+
+def test_prune_keep_last_keeps_newest_per_thread_and_namespace(saver):
+    root = write_thread(saver, "a", [5, 4, 3, 2, 1])
+    sub = write_thread(saver, "a", [5, 4, 3], ns="sub")
+    other = write_thread(saver, "b", [1])
+
+    deleted = retention.prune(saver.conn, keep_last=2)
+
+    assert deleted == {"checkpoints": 4, "writes": 4}
+    assert remaining(saver, "checkpoints", "a") == sorted(root[-2:] + sub[-2:])
+    assert remaining(saver, "checkpoints", "b") == other
+
+
+def test_prune_max_age_days_always_keeps_the_newest(saver):
+    fresh = write_thread(saver, "fresh", [40, 20, 1])
+    stale = write_thread(saver, "stale", [90, 60, 45])
+
+    deleted = retention.prune(saver.conn, max_age_days=30)
+
+    assert deleted["checkpoints"] == 3
+    assert remaining(saver, "checkpoints", "fresh") == fresh[1:]
+    # every checkpoint of "stale" is too old, but the thread must stay loadable
+    assert remaining(saver, "checkpoints", "stale") == stale[-1:]
+    assert saver.get_tuple({"configurable": {"thread_id": "stale"}}) is not None
+
+
+def test_prune_combines_both_policies(saver):
+    ids = write_thread(saver, "a", [50, 40, 3, 2, 1])
+    retention.prune(saver.conn, keep_last=4, max_age_days=30)
+    # keep_last alone would keep the 40-day-old one; max_age_days drops it too
+    assert remaining(saver, "checkpoints", "a") == ids[2:]
+
+
+def test_prune_removes_only_orphaned_writes(saver):
+    write_thread(saver, "a", [3, 2, 1])
+    retention.prune(saver.conn, keep_last=1)
+    assert remaining(saver, "writes", "a") == remaining(saver, "checkpoints", "a")
+    assert len(remaining(saver, "writes", "a")) == 1
+
+
+def test_prune_without_a_policy_deletes_nothing(saver):
+    write_thread(saver, "a", [400, 300])
+    assert retention.prune(saver.conn) == {"checkpoints": 0, "writes": 0}
+    assert len(remaining(saver, "checkpoints", "a")) == 2
@@ -0,0 +1,80 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from sqlite_pool import PooledSqliteSaver
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = PooledSqliteSaver(str(tmp_path / "chatbot.db"), readers=2, max_defer=0.05)
+    yield saver
+    saver.close()
+
+
+def put(saver, thread_id, writes=()):
+    config = saver.put(
+        {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, empty_checkpoint(), {}, {}
+    )
+    for n, value in enumerate(writes):
+        saver.put_writes(config, [("messages", value)], f"task-{n}")
+    return config
+
+
+def test_list_returns_pending_writes_from_the_reader(saver):
+    put(saver, "a", ["one", "two"])
+    put(saver, "a", ["three"])
+    listed = list(saver.list({"configurable": {"thread_id": "a"}}))
+    assert [[w[2] for w in t.pending_writes] for t in listed] == [["three"], ["one", "two"]]
+    assert all(t.parent_config is None for t in listed)
+    assert len(list(saver.list(None, limit=1))) == 1
+
+
+def test_list_runs_alongside_writers(saver):
+    for i in range(20):
+        put(saver, f"t{i}", ["x"])
+    errors = []
+
+    def write():
+        try:
+            for i in range(200):
+                put(saver, f"w{i % 5}", ["y", "z"])
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        for item in saver.list(None, limit=50):
+            assert item.pending_writes is not None
+    writer.join()
+    assert not errors
+
+
+def test_deferred_commit_does_not_hold_the_write_lock(saver):
+    config = put(saver, "a")
+    saver.put_writes(config, [("messages", "pending")], "task")
+    assert saver._pending == 1
+
+    other = sqlite3.connect(saver.path, timeout=1)
+    started = time.monotonic()
+    with other:
+        other.execute("CREATE TABLE IF NOT EXISTS other (x)")
+    other.close()
+    # the batched commit is flushed by the timer, well within the busy timeout
+    assert time.monotonic() - started < 0.5
+    assert saver._pending == 0
+
+
+def test_close_flushes_deferred_writes(tmp_path):
+    path = str(tmp_path / "chatbot.db")
+    saver = PooledSqliteSaver(path, readers=1, max_defer=60)
+    config = put(saver, "a")
+    saver.put_writes(config, [("messages", "pending")], "task")
+    saver.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import stock_quotes
+import stub_alpha_vantage
+from http_client import AsyncHttpClient, HttpClient
+
+
+def served(server):
+    return server.RequestHandlerClass.requests_served
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Point stock_quotes at a slow local stub, without the free-tier quota."""
+    server, url = stub_alpha_vantage.start(latency=0.1)
+    monkeypatch.setattr(stock_quotes, "ALPHA_VANTAGE_URL", url)
+    monkeypatch.setattr(stock_quotes, "client", HttpClient())
+    monkeypatch.setattr(stock_quotes, "async_client", AsyncHttpClient())
+    stock_quotes.fetch_quote.cache.invalidate()
+    stock_quotes.afetch_quote.cache.invalidate()
+    yield server
+    stock_quotes.client.close()
+    server.shutdown()
+
+
+def test_normalize_dedupes_and_uppercases():
+    assert stock_quotes.normalize([" ibm", "IBM", "", "msft ", None]) == ["IBM", "MSFT"]
+
+
+def test_quotes_are_cached_until_the_ttl_expires(stub, monkeypatch):
+    monkeypatch.setattr(stock_quotes.fetch_quote.cache, "ttl", 0.2)
+    assert stock_quotes.is_quote(stock_quotes.fetch_quote("ibm"))
+    stock_quotes.fetch_quote("IBM")
+    assert served(stub) == 1
+    time.sleep(0.25)
+    stock_quotes.fetch_quote("IBM")
+    assert served(stub) == 2
+
+
+def test_errors_are_not_cached(stub, monkeypatch):
+    monkeypatch.setattr(stock_quotes, "_request", lambda symbol: {"error": "down"})
+    assert stock_quotes.fetch_quote("IBM") == {"error": "down"}
+    assert stock_quotes.fetch_quote.cache.stats()["size"] == 0
+
+
+def test_concurrent_requests_share_one_upstream_call(stub):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(stock_quotes.fetch_quote("AAPL"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert served(stub) == 1
+    assert len(results) == 8 and all(r == results[0] for r in results)
+
+
+def test_batch_fetches_symbols_concurrently(stub):
+    start = time.perf_counter()
+    quotes = stock_quotes.fetch_quotes(["ibm", "msft", "IBM", "aapl"])
+    assert time.perf_counter() - start < 0.3
+    assert list(quotes) == ["IBM", "MSFT", "AAPL"]
+    assert served(stub) == 3
+    assert "IBM | " in stock_quotes.format_table(quotes)
+
+
+def test_batch_is_capped(stub):
+    quotes = stock_quotes.fetch_quotes([f"S{n}" for n in range(stock_quotes.MAX_BATCH + 5)])
+    assert len(quotes) == stock_quotes.MAX_BATCH
+    assert served(stub) == stock_quotes.MAX_BATCH
+
+
+def test_async_batch_dedupes_and_caches(stub):
+    async def run():
+        first = await stock_quotes.afetch_quotes(["ibm", "msft"])
+        again = await asyncio.gather(*(stock_quotes.afetch_quote("IBM") for _ in range(4)))
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert list(first) == ["IBM", "MSFT"]
+    assert all(quote == first["IBM"] for quote in again)
+    assert served(stub) == 2
+
+
+def test_format_table_reports_errors():
+    table = stock_quotes.format_table({"IBM": {"error": "timeout"}, "X": {"Note": "rate limited"}})
+    assert "IBM | error: timeout" in table
+    assert "X | error: rate limited" in table
@@ -0,0 +1,77 @@
+import time
+
+from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+
+from stream_adapter import TokenStream, text_of
+
+
+def chunks(*texts, delay=0.0):
+    """``(chunk, metadata)`` pairs as ``stream_mode="messages"`` yields them."""
+    for text in texts:
+        if delay:
+            time.sleep(delay)
+        yield AIMessageChunk(content=text), {}
+
+
+def test_text_of_joins_content_parts():
+    assert text_of("plain") == "plain"
+    assert text_of(["a", {"type": "text", "text": "b"}, {"type": "image_url"}, 3]) == "ab"
+
+
+def test_first_chunk_is_flushed_then_text_is_coalesced():
+    stream = TokenStream(chunks(*"abcdefghij"), min_chars=4, max_interval=60)
+    assert list(stream) == ["a", "bcde", "fghi", "j"]
+    stats = stream.stats()
+    assert stats["chunks_received"] == 10
+    assert stats["chunks_yielded"] == 4
+
+
+def test_slow_chunks_flush_on_interval():
+    stream = TokenStream(chunks("a", "b", "c", delay=0.03), min_chars=100, max_interval=0.02)
+    assert list(stream) == ["a", "b", "c"]
+
+
+def test_empty_deltas_and_other_messages_are_dropped():
+    tools = []
+
+    def source():
+        yield AIMessageChunk(content=""), {}
+        yield HumanMessage(content="not streamed"), {}
+        yield ToolMessage(content="42", tool_call_id="1"), {}
+        yield AIMessageChunk(content="hi"), {}
+
+    stream = TokenStream(source(), on_tool=tools.append)
+    assert list(stream) == ["hi"]
+    assert [t.content for t in tools] == ["42"]
+    assert stream.stats()["empty_dropped"] == 1
+
+
+def test_ttft_and_throughput():
+    def source():
+        time.sleep(0.1)
+        yield from chunks("x" * 40, "y" * 40, delay=0.05)
+
+    stream = TokenStream(source(), min_chars=1)
+    assert "".join(stream) == "x" * 40 + "y" * 40
+    stats = stream.stats()
+    assert 0.15 <= stats["ttft_seconds"] < stats["duration_seconds"]
+    assert stats["tokens"] == 20 and stats["tokens_estimated"]
+    assert stats["tokens_per_second"] > 0
+
+
+def test_usage_metadata_beats_the_estimate():
+    def source():
+        usage = {"input_tokens": 1, "output_tokens": 3, "total_tokens": 4}
+        yield AIMessageChunk(content="hello world", usage_metadata=usage), {}
+
+    stream = TokenStream(source())
+    list(stream)
+    assert stream.stats()["tokens"] == 3
+    assert not stream.stats()["tokens_estimated"]
+
+
+def test_stats_before_any_text():
+    stream = TokenStream(chunks())
+    assert list(stream) == []
+    assert stream.stats()["ttft_seconds"] is None
+    assert stream.stats()["tokens_per_second"] is None
@@ -0,0 +1,73 @@
+import task_client
+
+
+def test_refetch_diffs_into_the_users_priority_index(monkeypatch):
+    tasks = [
+        {"id": "1", "title": "write report", "priority": "low", "status": "pending"},
+        {"id": "2", "title": "pay rent", "priority": "high", "status": "pending"},
+    ]
+    monkeypatch.setattr(task_client.client, "get_json", lambda url, headers: [dict(t) for t in tasks])
+    task_client.invalidate()
+
+    first = task_client.snapshot("alice")
+    assert [t["id"] for t, _ in first.priorities.top(5)] == ["2", "1"]
+
+    tasks[0]["priority"] = "high"
+    tasks[0]["createdAt"] = "2026-02-01T00:00:00Z"
+    task_client.invalidate("alice")
+    second = task_client.snapshot("alice")
+
+    assert second is not first
+    assert second.priorities is first.priorities
+    assert [t["id"] for t, _ in second.priorities.top(5)] == ["1", "2"]
+    assert task_client.search(second, "rep")["tasks"][0]["id"] == "1"
+
+
+def test_unchanged_refetch_skips_the_reconcile(monkeypatch):
+    tasks = [{"id": "1", "title": "write report", "priority": "low", "status": "pending"}]
+    monkeypatch.setattr(task_client.client, "get_json", lambda url, headers: [dict(t) for t in tasks])
+    syncs = []
+    monkeypatch.setattr(task_client.search_index, "sync_user", lambda user_id, tasks: syncs.append(user_id))
+    task_client.invalidate()
+
+    task_client.snapshot("carol")
+    task_client.invalidate("carol")
+    task_client.snapshot("carol")
+    assert syncs == ["carol"]
+
+    task_client.apply_event("carol", "updated", dict(tasks[0], title="write memo"))
+    task_client.invalidate("carol")
+    task_client.snapshot("carol")
+    assert syncs == ["carol", "carol"]
+
+
+def test_async_answer(monkeypatch):
+    import asyncio
+
+    async def get_json(url, headers):
+        return [{"id": "1", "title": "write report", "priority": "high", "status": "pending"}]
+
+    monkeypatch.setattr(task_client.async_client, "get_json", get_json)
+    task_client.invalidate()
+    result = asyncio.run(task_client.aanswer(task_client.search, "dave", "report"))
+    assert [t["id"] for t in result["tasks"]] == ["1"]
+
+
+def test_fetch_racing_an_event_searches_its_own_tasks(monkeypatch):
+    tasks = [
+        {"id": "1", "title": "write report", "priority": "low", "status": "pending"},
+        {"id": "2", "title": "pay rent", "priority": "high", "status": "pending"},
+    ]
+
+    def get_json(url, headers):
+        # the user adds a task while their first list is on the wire
+        task_client.apply_event("erin", "created", {"id": "3", "title": "report card", "status": "pending"})
+        return [dict(t) for t in tasks]
+
+    monkeypatch.setattr(task_client.client, "get_json", get_json)
+    task_client.invalidate()
+
+    snap = task_client.snapshot("erin")
+    assert not snap.indexed
+    assert [t["id"] for t in task_client.search(snap, "report")["tasks"]] == ["1"]
+    assert task_client.search(snap)["found"] == 2
@@ -0,0 +1,69 @@
+import sqlite3
+
+import task_search
+from task_search import TaskSearchIndex, match_expression, user_key
+
+
+def make_index(tmp_path):
+    return TaskSearchIndex(str(tmp_path / "task_index.db"))
+
+
+def task(i, title, status="pending"):
+    return {"id": str(i), "title": title, "description": "", "status": status,
+            "createdAt": f"2026-01-{i % 28 + 1:02d}T00:00:00Z"}
+
+
+def test_single_letters_are_whole_words():
+    key = user_key("alice")
+    assert match_expression(key, "r") == f'"{key}r"'
+    assert match_expression(key, "re port") == f'"{key}re"* AND "{key}port"*'
+
+
+def test_search_is_per_user_and_ranks_title_prefixes(tmp_path):
+    index = make_index(tmp_path)
+    index.sync_user("alice", [task(1, "Write report"), task(2, "Pay rent"), task(3, "r and d")])
+    index.sync_user("bob", [task(1, "Report card")])
+    found, tasks = index.search("alice", "rep")
+    assert (found, [t["id"] for t in tasks]) == (1, ["1"])
+    assert index.search("alice", "r")[0] == 1
+    assert index.search("bob", "pay")[0] == 0
+    index.close()
+
+
+def test_broad_queries_count_every_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_search, "RANK_WINDOW", 20)
+    index = make_index(tmp_path)
+    index.sync_user("alice", [task(i, f"w{i} item") for i in range(200)])
+    found, tasks = index.search("alice", "w1", limit=5)
+    assert found == 111  # w1, w10-w19, w100-w199
+    assert len(tasks) == 5
+    index.close()
+
+
+
+def test_broad_queries_rank_the_newest_tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_search, "RANK_WINDOW", 20)
+    index = make_index(tmp_path)
+    tasks = [{"id": str(i), "title": f"report {i}", "createdAt": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}Z"}
+             for i in range(100)]
+    # the API lists tasks newest first
+    index.sync_user("alice", tasks[::-1])
+    index.upsert("alice", {"id": "old", "title": "report", "createdAt": "2025-01-01T00:00:00Z"})
+    found, ranked = index.search("alice", "rep", limit=20)
+    assert found == 101
+    assert {t["id"] for t in ranked} == {str(i) for i in range(80, 100)}
+    index.close()
+
+def test_index_without_prefix_indexes_is_rebuilt(tmp_path):
+    path = str(tmp_path / "task_index.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(task_search.SCHEMA.format(prefix="2"))
+    conn.execute("INSERT INTO tasks (user_id, task_id, data) VALUES ('alice', '1', '{}')")
+    conn.commit()
+    conn.close()
+
+    index = TaskSearchIndex(path)
+    sql = index.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'task_fts'").fetchone()[0]
+    assert f"prefix='{task_search.PREFIX_INDEX}'" in sql
+    assert index.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+    index.close()
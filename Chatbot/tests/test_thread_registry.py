@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from thread_registry import DEFAULT_USER, InvalidCursorError, QuotaExceededError, ThreadRegistry
+
+
+def checkpoint(messages, ts="2026-01-01T00:00:00+00:00"):
+    return {"ts": ts, "channel_values": {"messages": messages}}
+
+
+@pytest.fixture
+def registry():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    yield ThreadRegistry(conn, max_threads=2)
+    conn.close()
+
+
+def test_quota_is_off_by_default():
+    conn = sqlite3.connect(":memory:")
+    assert ThreadRegistry(conn).max_threads == 0
+    conn.close()
+
+
+def test_quota_applies_to_new_threads_of_named_users(registry):
+    for thread_id in ("a", "b"):
+        registry.authorize(thread_id, "alice")
+        registry.record(thread_id, checkpoint([HumanMessage("hi")]), "alice")
+    registry.authorize("a", "alice")
+    with pytest.raises(QuotaExceededError):
+        registry.authorize("c", "alice")
+    registry.authorize("c", "bob")
+
+
+def test_quota_never_applies_to_default_user(registry):
+    for thread_id in ("a", "b", "c"):
+        registry.authorize(thread_id, DEFAULT_USER)
+        registry.record(thread_id, checkpoint([HumanMessage("hi")]), DEFAULT_USER)
+    registry.authorize("d", DEFAULT_USER)
+
+
+def test_projection_appends_and_rebuilds(registry):
+    history = [HumanMessage("hi"), AIMessage("hello")]
+    registry.record("t", checkpoint(history))
+    history += [HumanMessage("again"), AIMessage("sure")]
+    registry.record("t", checkpoint(history))
+    assert [m["content"] for m in registry.display_messages("t")] == ["hi", "hello", "again", "sure"]
+    registry.record("t", checkpoint([HumanMessage("fresh")]))
+    assert [m["content"] for m in registry.display_messages("t")] == ["fresh"]
+
+
+def test_list_threads_pages_with_opaque_cursor(registry):
+    for n in range(5):
+        registry.record(f"t{n}", checkpoint([HumanMessage(f"hi {n}")], ts=f"2026-01-0{n + 1}T00:00:00+00:00"))
+    seen, cursor = [], None
+    while True:
+        threads, cursor = registry.list_threads(limit=2, cursor=cursor)
+        seen += [t["thread_id"] for t in threads]
+        if cursor is None:
+            break
+        assert "|" not in cursor
+    assert seen == ["t4", "t3", "t2", "t1", "t0"]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "!!!", "bm90IGpzb24=", "WzFd", "WyJhIiwgMV0="])
+def test_list_threads_rejects_bad_cursor(registry, cursor):
+    with pytest.raises(InvalidCursorError):
+        registry.list_threads(cursor=cursor)
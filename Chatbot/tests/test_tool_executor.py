@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+from tool_executor import ParallelToolNode
+
+
+@tool
+def sleepy(seconds: float) -> str:
+    """Sleep for ``seconds`` and say so."""
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+@tool
+def broken(reason: str) -> str:
+    """Always fail."""
+    raise RuntimeError(reason)
+
+
+@tool
+async def asleepy(seconds: float) -> str:
+    """Async sleep for ``seconds``."""
+    await asyncio.sleep(seconds)
+    return f"slept {seconds}"
+
+
+hang = threading.Event()
+
+
+@tool
+def stuck() -> str:
+    """Block until the test lets go."""
+    hang.wait(5)
+    return "unstuck"
+
+
+def state(*calls):
+    tool_calls = [{"name": name, "args": args, "id": f"call{n}"} for n, (name, args) in enumerate(calls)]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def test_calls_run_concurrently_and_keep_their_order():
+    node = ParallelToolNode([sleepy])
+    start = time.perf_counter()
+    result = node.invoke(state(*[("sleepy", {"seconds": 0.2})] * 4), {})
+    assert time.perf_counter() - start < 0.6
+    messages = result["messages"]
+    assert [m.tool_call_id for m in messages] == ["call0", "call1", "call2", "call3"]
+    assert all(m.content == "slept 0.2" for m in messages)
+
+    turn = node.stats()["last_turn"]
+    assert turn["tool_calls"] == 4
+    assert turn["sequential_seconds"] >= 0.8
+    assert turn["saved_seconds"] > 0.4
+    assert node.stats()["saved_seconds"] == turn["saved_seconds"]
+
+
+def test_unknown_tool_and_exception_become_error_messages():
+    node = ParallelToolNode([sleepy, broken])
+    messages = node.invoke(state(("nope", {}), ("broken", {"reason": "boom"}), ("sleepy", {"seconds": 0})), {})[
+        "messages"
+    ]
+    assert messages[0].status == "error" and "nope is not a valid tool" in messages[0].content
+    assert messages[1].status == "error" and "boom" in messages[1].content
+    assert messages[2].status == "success" and messages[2].content == "slept 0.0"
+
+
+def test_per_tool_timeout():
+    node = ParallelToolNode([sleepy, stuck], timeout=5, timeouts={"stuck": 0.1})
+    hang.clear()
+    try:
+        start = time.perf_counter()
+        messages = node.invoke(state(("stuck", {}), ("sleepy", {"seconds": 0})), {})["messages"]
+        assert time.perf_counter() - start < 1
+        assert messages[0].status == "error" and "timed out after 0.1s" in messages[0].content
+        assert messages[1].content == "slept 0.0"
+    finally:
+        hang.set()
+
+
+def test_timeout_counts_from_start_not_from_queueing():
+    node = ParallelToolNode([sleepy], max_concurrency=1, timeout=0.3)
+    # run one after another: the last call starts ~0.4s after it was queued
+    messages = node.invoke(state(*[("sleepy", {"seconds": 0.2})] * 3), {})["messages"]
+    assert all(isinstance(m, ToolMessage) and m.status == "success" for m in messages)
+
+
+def test_hung_tool_gives_its_slot_back():
+    node = ParallelToolNode([sleepy, stuck], max_concurrency=1, timeout=0.1)
+    hang.clear()
+    try:
+        messages = node.invoke(state(("stuck", {})), {})["messages"]
+        assert messages[0].status == "error"
+        messages = node.invoke(state(("sleepy", {"seconds": 0})), {})["messages"]
+        assert messages[0].status == "success"
+    finally:
+        hang.set()
+
+
+def test_ainvoke_mixes_sync_and_async_tools():
+    node = ParallelToolNode([sleepy, asleepy], timeouts={"asleepy": 0.1})
+    calls = state(("asleepy", {"seconds": 0.2}), ("sleepy", {"seconds": 0.1}), ("asleepy", {"seconds": 0}))
+    messages = asyncio.run(node.ainvoke(calls, {}))["messages"]
+    assert messages[0].status == "error" and "timed out" in messages[0].content
+    assert messages[1].content == "slept 0.1"
+    assert messages[2].content == "slept 0.0"
+    assert node.stats()["turns"] == 1
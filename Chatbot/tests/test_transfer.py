@@ -0,0 +1,131 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, message_to_dict
+
+import transfer
+from sqlite_pool import PooledSqliteSaver
+from thread_registry import ThreadRegistry
+
+
+class Store:
+    """A checkpoint database with its thread registry, as ``transfer.main`` opens it."""
+
+    def __init__(self, path):
+        self.saver = PooledSqliteSaver(str(path), readers=1)
+        self.registry = ThreadRegistry(self.saver.conn, lock=self.saver.lock)
+
+    def messages(self, thread_id):
+        latest = self.saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        return latest.checkpoint["channel_values"]
+
+    def export(self, **kwargs):
+        return list(transfer.export_records(self.saver, self.registry, **kwargs))
+
+    def close(self):
+        self.saver.close()
+
+
+def thread_records(thread_id, user_id, day, texts, summary=None):
+    messages = [HumanMessage(text) if n % 2 == 0 else AIMessage(text) for n, text in enumerate(texts)]
+    yield {
+        "kind": "thread",
+        "thread_id": thread_id,
+        "user_id": user_id,
+        "created_at": f"2026-01-{day:02d}T00:00:00+00:00",
+        "last_active_at": f"2026-01-{day:02d}T12:00:00+00:00",
+        "title": texts[0],
+        "message_count": len(messages),
+        "summary": summary,
+        "summarized_count": 1 if summary else None,
+    }
+    for seq, message in enumerate(messages):
+        yield {"kind": "message", "thread_id": thread_id, "seq": seq, "message": message_to_dict(message)}
+
+
+@pytest.fixture
+def source(tmp_path):
+    store = Store(tmp_path / "source.db")
+    records = [
+        *thread_records("a", "alice", 1, ["hi", "hello"]),
+        *thread_records("b", "alice", 2, ["plan my week", "sure", "thanks"], summary="weekly plan"),
+        *thread_records("c", "bob", 3, ["quote IBM", "IBM is 180"]),
+    ]
+    assert transfer.import_records(store.saver, store.registry, records) == {
+        "threads": 3, "messages": 7, "skipped": 0
+    }
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def target(tmp_path):
+    store = Store(tmp_path / "target.db")
+    yield store
+    store.close()
+
+
+FORMATS = [
+    ("dump.ndjson", transfer.write_ndjson, transfer.read_ndjson),
+    ("dump.ndjson.gz", transfer.write_ndjson, transfer.read_ndjson),
+    ("dump.parquet", transfer.write_parquet, transfer.read_parquet),
+]
+
+
+@pytest.mark.parametrize("name, write, read", FORMATS, ids=[f[0] for f in FORMATS])
+def test_round_trip(source, target, tmp_path, name, write, read):
+    if name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / name)
+    exported = source.export()
+    assert write(iter(exported), path) == len(exported) == 10
+
+    stats = transfer.import_records(target.saver, target.registry, read(path))
+    assert stats == {"threads": 3, "messages": 7, "skipped": 0}
+    assert target.export() == exported
+    values = target.messages("b")
+    assert [m.content for m in values["messages"]] == ["plan my week", "sure", "thanks"]
+    assert (values["summary"], values["summarized_count"]) == ("weekly plan", 1)
+    assert target.registry.owner("c") == "bob"
+
+
+def test_export_filters(source):
+    alice = source.export(user_id="alice")
+    assert [r["thread_id"] for r in alice if r["kind"] == "thread"] == ["b", "a"]
+    picked = source.export(thread_ids=["c", "missing"])
+    assert [r["thread_id"] for r in picked if r["kind"] == "thread"] == ["c"]
+    recent = source.export(active_since="2026-01-02")
+    assert [r["thread_id"] for r in recent if r["kind"] == "thread"] == ["c", "b"]
+
+
+def test_existing_threads_are_skipped_unless_replaced(source, target):
+    transfer.import_records(target.saver, target.registry, thread_records("a", "alice", 1, ["old"]))
+    exported = source.export()
+
+    stats = transfer.import_records(target.saver, target.registry, iter(exported))
+    assert stats == {"threads": 2, "messages": 5, "skipped": 1}
+    assert [m.content for m in target.messages("a")["messages"]] == ["old"]
+
+    stats = transfer.import_records(target.saver, target.registry, iter(exported), replace=True)
+    assert stats == {"threads": 3, "messages": 7, "skipped": 0}
+    assert [m.content for m in target.messages("a")["messages"]] == ["hi", "hello"]
+    assert target.export() == exported
+
+
+def test_message_outside_its_thread_is_rejected(target):
+    records = list(thread_records("a", "alice", 1, ["hi"]))
+    records[1]["thread_id"] = "b"
+    with pytest.raises(ValueError):
+        transfer.import_records(target.saver, target.registry, records)
+
+
+def test_cli_round_trip(source, target, tmp_path, capsys):
+    source.close()
+    target.close()
+    path = str(tmp_path / "cli.ndjson.gz")
+    transfer.main(["export", path, "--db", str(tmp_path / "source.db"), "--user", "alice"])
+    transfer.main(["import", path, "--db", str(tmp_path / "target.db")])
+    assert '"threads": 2' in capsys.readouterr().err
+    reopened = Store(tmp_path / "target.db")
+    try:
+        assert [t["thread_id"] for t in reopened.registry.list_threads(user_id="alice")[0]] == ["b", "a"]
+    finally:
+        reopened.close()
@@ -0,0 +1,430 @@
+"""Thread index kept next to the checkpoints in chatbot.db.
+
+``SqliteSaver`` only knows about checkpoints, so listing conversations used to
+mean scanning every checkpoint row. The ``threads`` table holds one row per
+conversation and is updated on every root checkpoint write, which keeps the
+sidebar query proportional to the page size.
+
+Every thread belongs to one user (``config["configurable"]["user_id"]``, or
+``DEFAULT_USER`` for the single-user Streamlit setup). Listings are scoped to
+that user through the ``(user_id, last_active_at)`` index, and the
+checkpointer refuses to read or write another user's thread.
+
+``thread_messages`` is a display projection of each thread (role, text, tool
+name per message), appended to on every write, so opening a conversation
+reads a few small rows instead of deserializing the checkpoint.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+import sqlite3
+import threading
+
+from langchain_core.messages import HumanMessage
+
+from checkpointing import DelegatingSaver
+from stream_adapter import text_of
+
+TITLE_LENGTH = 60
+PREVIEW_LENGTH = 80
+
+# Owner of threads written without a user_id (and of threads from before ownership)
+DEFAULT_USER = "local"
+# Conversations a user may keep; 0 (the default) disables the quota. It never
+# applies to DEFAULT_USER, which every unauthenticated session shares.
+MAX_THREADS_PER_USER = int(os.getenv("CHATBOT_MAX_THREADS_PER_USER", "0"))
+OWNER_CACHE_SIZE = 10_000
+
+
+class ThreadAccessError(PermissionError):
+    """The thread belongs to another user."""
+
+
+class QuotaExceededError(RuntimeError):
+    """The user already has ``max_threads`` conversations."""
+
+
+class InvalidCursorError(ValueError):
+    """A ``list_threads`` cursor that the registry did not hand out."""
+
+
+def user_of(config):
+    return (config.get("configurable") or {}).get("user_id") or DEFAULT_USER
+
+
+def thread_title(messages):
+    """First user message, trimmed the same way the Next.js chat titles are."""
+    for msg in messages:
+        if isinstance(msg, HumanMessage) and isinstance(msg.content, str) and msg.content.strip():
+            return msg.content.strip()[:TITLE_LENGTH]
+    return None
+
+
+def thread_preview(messages):
+    """Text of the newest message that has any, for the sidebar."""
+    for msg in reversed(messages):
+        if isinstance(msg.content, str) and msg.content.strip():
+            return " ".join(msg.content.split())[:PREVIEW_LENGTH]
+    return None
+
+
+THREAD_COLUMNS = "thread_id, user_id, created_at, last_active_at, title, preview, message_count"
+
+
+# message.type -> chat role shown in the UI
+ROLES = {"human": "user", "ai": "assistant", "tool": "tool", "system": "system"}
+
+
+def display_message(msg):
+    """``{"role", "content", "tool_name"}`` for one LangChain message."""
+    return {
+        "role": ROLES.get(msg.type, "assistant"),
+        "content": text_of(msg.content),
+        "tool_name": msg.name if msg.type == "tool" else None,
+    }
+
+
+def _thread_dict(row):
+    return dict(zip(THREAD_COLUMNS.split(", "), row))
+
+
+def _like(query):
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _encode_cursor(thread):
+    key = json.dumps([thread["last_active_at"], thread["thread_id"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from None
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(part, str) for part in key)):
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}")
+    return key
+
+
+class ThreadRegistry:
+    """One row per thread: owner, created_at, last_active_at, title, preview, message_count."""
+
+    def __init__(self, conn: sqlite3.Connection, lock=None, max_threads=MAX_THREADS_PER_USER):
+        self.conn = conn
+        self.lock = lock or threading.Lock()
+        self.max_threads = max_threads
+        # thread_id -> owner; an owner never changes, so entries only go on forget()
+        self._owners = {}
+        self.setup()
+
+    def setup(self):
+        with self.lock:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    last_active_at TEXT NOT NULL,
+                    title TEXT,
+                    message_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS threads_by_activity
+                    ON threads (last_active_at DESC, thread_id DESC);
+                """
+            )
+            # sqlite has no ADD COLUMN IF NOT EXISTS
+            for column in ("preview TEXT", "user_id TEXT"):
+                try:
+                    self.conn.execute(f"ALTER TABLE threads ADD COLUMN {column}")
+                except sqlite3.OperationalError as e:
+                    if "duplicate column name" not in str(e):
+                        raise
+            # threads from before ownership belonged to the one local user
+            self.conn.execute("UPDATE threads SET user_id = ? WHERE user_id IS NULL", (DEFAULT_USER,))
+            self.conn.executescript(
+                """
+                CREATE INDEX IF NOT EXISTS threads_by_user
+                    ON threads (user_id, last_active_at DESC, thread_id DESC);
+                CREATE TABLE IF NOT EXISTS thread_messages (
+                    thread_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    tool_name TEXT,
+                    PRIMARY KEY (thread_id, seq)
+                ) WITHOUT ROWID;
+                """
+            )
+            self.conn.commit()
+
+    def owner(self, thread_id):
+        """user_id owning ``thread_id``, or ``None`` for a thread not written yet."""
+        thread_id = str(thread_id)
+        if thread_id in self._owners:
+            return self._owners[thread_id]
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT user_id FROM threads WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if len(self._owners) >= OWNER_CACHE_SIZE:
+            self._owners.clear()
+        self._owners[thread_id] = row[0]
+        return row[0]
+
+    def count_threads(self, user_id):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM threads WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def authorize(self, thread_id, user_id=DEFAULT_USER, write=True):
+        """Raise unless ``user_id`` may use ``thread_id``.
+
+        Reading an unknown thread is allowed (it is simply empty); writing one
+        starts a new conversation and counts against the user's quota, if
+        there is one and the user is not ``DEFAULT_USER``.
+        """
+        owner = self.owner(thread_id)
+        if owner is not None and owner != user_id:
+            raise ThreadAccessError(f"thread {thread_id} belongs to another user")
+        if owner is None and write and self.max_threads and user_id != DEFAULT_USER:
+            if self.count_threads(user_id) >= self.max_threads:
+                raise QuotaExceededError(
+                    f"user {user_id} already has {self.max_threads} conversations"
+                )
+
+    def record(self, thread_id, checkpoint, user_id=DEFAULT_USER, created_at=None, commit=True):
+        """Upsert the row for ``thread_id`` from a freshly written checkpoint.
+
+        The owner is set by the first write and never changes afterwards.
+        ``created_at`` defaults to the checkpoint time (imports pass the
+        original one); ``commit=False`` leaves the commit to an enclosing
+        ``PooledSqliteSaver.batch()``.
+        """
+        messages = checkpoint.get("channel_values", {}).get("messages", [])
+        ts = checkpoint["ts"]
+        with self.lock:
+            self._project(str(thread_id), messages)
+            self.conn.execute(
+                """
+                INSERT INTO threads
+                    (thread_id, user_id, created_at, last_active_at, title, preview, message_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(thread_id) DO UPDATE SET
+                    last_active_at = excluded.last_active_at,
+                    title = COALESCE(threads.title, excluded.title),
+                    preview = COALESCE(excluded.preview, threads.preview),
+                    message_count = excluded.message_count
+                """,
+                (
+                    str(thread_id), user_id, created_at or ts, ts,
+                    thread_title(messages), thread_preview(messages), len(messages),
+                ),
+            )
+            if commit:
+                self.conn.commit()
+
+    def _project(self, thread_id, messages):
+        # Messages are only ever appended within a thread, so only the ones
+        # past what is already projected are converted; a shorter history
+        # (or a thread from before the projection) is rebuilt. Rows are
+        # numbered from 0 without gaps, so the last seq (one primary-key seek)
+        # gives the projected length without counting. Caller holds the lock.
+        last = self.conn.execute(
+            "SELECT MAX(seq) FROM thread_messages WHERE thread_id = ?", (thread_id,)
+        ).fetchone()[0]
+        projected = 0 if last is None else last + 1
+        if projected > len(messages):
+            self.conn.execute("DELETE FROM thread_messages WHERE thread_id = ?", (thread_id,))
+            projected = 0
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO thread_messages (thread_id, seq, role, content, tool_name)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                (thread_id, seq, row["role"], row["content"], row["tool_name"])
+                for seq, row in enumerate(map(display_message, messages[projected:]), projected)
+            ),
+        )
+
+    def project(self, thread_id, messages):
+        """Bring the display projection of ``thread_id`` up to date with ``messages``."""
+        with self.lock:
+            self._project(str(thread_id), messages)
+            self.conn.commit()
+
+    def display_messages(self, thread_id):
+        """The projected messages of ``thread_id``, oldest first.
+
+        Returns ``None`` when the projection does not cover the whole thread
+        yet (threads last written before it existed); rebuild it with
+        ``project()`` from the checkpoint in that case.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT message_count FROM threads WHERE thread_id = ?", (str(thread_id),)
+            ).fetchone()
+            rows = self.conn.execute(
+                "SELECT role, content, tool_name FROM thread_messages WHERE thread_id = ? ORDER BY seq",
+                (str(thread_id),),
+            ).fetchall()
+        if row is None:
+            return []
+        if len(rows) != row[0]:
+            return None
+        return [{"role": role, "content": content, "tool_name": tool_name} for role, content, tool_name in rows]
+
+    def forget(self, thread_id):
+        self._owners.pop(str(thread_id), None)
+        with self.lock:
+            self.conn.execute("DELETE FROM threads WHERE thread_id = ?", (str(thread_id),))
+            self.conn.execute("DELETE FROM thread_messages WHERE thread_id = ?", (str(thread_id),))
+            self.conn.commit()
+
+    def list_threads(self, limit=50, cursor=None, query=None, user_id=DEFAULT_USER):
+        """Return ``(threads, next_cursor)``, most recently active first.
+
+        ``cursor`` is the opaque value returned by the previous page; pass
+        ``None`` for the first page. ``next_cursor`` is ``None`` on the last.
+        A cursor that does not decode raises ``InvalidCursorError``.
+        ``query`` keeps only threads whose title or preview contains it.
+        Only ``user_id``'s threads are listed; ``user_id=None`` lists every
+        user's (maintenance tools only).
+        """
+        sql = f"SELECT {THREAD_COLUMNS} FROM threads"
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if query:
+            conditions.append("(title LIKE ? ESCAPE '\\' OR preview LIKE ? ESCAPE '\\')")
+            params += [_like(query), _like(query)]
+        if cursor:
+            last_active_at, thread_id = _decode_cursor(cursor)
+            conditions.append("(last_active_at, thread_id) < (?, ?)")
+            params += [last_active_at, thread_id]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY last_active_at DESC, thread_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        threads = [_thread_dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_cursor(threads[-1])
+        return threads, next_cursor
+
+    def get_thread(self, thread_id):
+        """The row for ``thread_id`` as a dict, or ``None``."""
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {THREAD_COLUMNS} FROM threads WHERE thread_id = ?", (str(thread_id),)
+            ).fetchone()
+        return _thread_dict(row) if row else None
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM threads LIMIT 1").fetchone() is None
+
+    def backfill(self, saver):
+        """Index threads that were written before the registry existed.
+
+        Runs only while the table is empty, so it costs one full pass over
+        the checkpoints the first time and nothing afterwards.
+        """
+        if not self.is_empty():
+            return 0
+        with self.lock:
+            has_checkpoints = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'checkpoints'"
+            ).fetchone()
+            if not has_checkpoints:
+                return 0
+            thread_ids = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT DISTINCT thread_id FROM checkpoints WHERE checkpoint_ns = ''"
+                )
+            ]
+        for thread_id in thread_ids:
+            latest = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+            if latest is not None:
+                self.record(thread_id, latest.checkpoint, latest.metadata.get("user_id") or DEFAULT_USER)
+        return len(thread_ids)
+
+
+class RegistrySaver(DelegatingSaver):
+    """Checkpointer that keeps a :class:`ThreadRegistry` in step with writes.
+
+    It also enforces ownership: reads and writes carrying another user's
+    ``user_id`` raise :class:`ThreadAccessError`, and a user's first write to
+    a new thread beyond the quota raises :class:`QuotaExceededError`.
+    """
+
+    def __init__(self, backend, registry: ThreadRegistry):
+        super().__init__(backend)
+        self.registry = registry
+
+    def _authorize(self, config, write):
+        thread_id = (config.get("configurable") or {}).get("thread_id")
+        if thread_id is not None:
+            self.registry.authorize(thread_id, user_of(config), write=write)
+
+    def get_tuple(self, config):
+        self._authorize(config, write=False)
+        return super().get_tuple(config)
+
+    def list(self, config, **kwargs):
+        if config is not None:
+            self._authorize(config, write=False)
+        return super().list(config, **kwargs)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        root = not config["configurable"].get("checkpoint_ns")
+        if root:
+            self._authorize(config, write=True)
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        if root:
+            self.registry.record(config["configurable"]["thread_id"], checkpoint, user_of(config))
+        return next_config
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        self.registry.forget(thread_id)
+
+    async def aget_tuple(self, config):
+        await asyncio.to_thread(self._authorize, config, False)
+        return await super().aget_tuple(config)
+
+    async def alist(self, config, **kwargs):
+        if config is not None:
+            await asyncio.to_thread(self._authorize, config, False)
+        async for item in super().alist(config, **kwargs):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        root = not config["configurable"].get("checkpoint_ns")
+        if root:
+            await asyncio.to_thread(self._authorize, config, True)
+        next_config = await super().aput(config, checkpoint, metadata, new_versions)
+        if root:
+            await asyncio.to_thread(
+                self.registry.record,
+                config["configurable"]["thread_id"],
+                checkpoint,
+                user_of(config),
+            )
+        return next_config
+
+    async def adelete_thread(self, thread_id):
+        await super().adelete_thread(thread_id)
+        await asyncio.to_thread(self.registry.forget, thread_id)
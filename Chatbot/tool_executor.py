@@ -0,0 +1,183 @@
+"""Concurrent tool execution for turns where the model calls several tools.
+
+``ParallelToolNode`` replaces the prebuilt ``ToolNode`` in the graph. All tool
+calls of the last ``AIMessage`` start together: sync tools on worker threads
+(at most ``max_concurrency`` running at once), async tools via
+``asyncio.gather``. Each call has its own timeout, counted from when the call
+starts running rather than from when it was queued, and a failing or slow
+tool turns into an error ``ToolMessage`` instead of failing the whole step. The node keeps a running tally of the wall-clock time saved
+compared to running the same calls one after another.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+DEFAULT_CONCURRENCY = int(os.getenv("CHATBOT_TOOL_CONCURRENCY", "8"))
+DEFAULT_TIMEOUT = float(os.getenv("CHATBOT_TOOL_TIMEOUT", "30"))
+
+
+def _error_message(call, error):
+    return ToolMessage(
+        content=f"Error: {error}\n Please fix your mistakes.",
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+class _Running:
+    """One sync tool call on its own daemon thread.
+
+    The thread waits for a free slot before it starts, so the timeout only
+    covers the time the call actually runs. A call that overruns is
+    abandoned: its slot is handed back so a hung tool cannot starve later
+    calls, and the thread is left to finish (or hang) on its own.
+    """
+
+    def __init__(self, slots, fn):
+        self._slots = slots
+        self._lock = threading.Lock()
+        self._released = False
+        self._started = threading.Event()
+        self._done = threading.Event()
+        self.start = None
+        self.duration = None
+        self.result = None
+        threading.Thread(target=self._run, args=(fn,), name="tool", daemon=True).start()
+
+    def _run(self, fn):
+        self._slots.acquire()
+        self.start = time.perf_counter()
+        self._started.set()
+        try:
+            self.result = fn()
+        finally:
+            self.duration = time.perf_counter() - self.start
+            self._release()
+            self._done.set()
+
+    def _release(self):
+        with self._lock:
+            if not self._released:
+                self._released = True
+                self._slots.release()
+
+    def wait(self, timeout):
+        """Whether the call finished within ``timeout`` seconds of starting."""
+        self._started.wait()
+        if self._done.wait(max(self.start + timeout - time.perf_counter(), 0)):
+            return True
+        self._release()
+        return False
+
+
+class ParallelToolNode:
+    """Run every tool call of a turn concurrently.
+
+    ``max_concurrency`` bounds concurrently running tool calls (across turns
+    for sync calls, per turn for async calls). ``timeout`` is
+    the default per-call timeout in seconds; ``timeouts`` overrides it per
+    tool name.
+    """
+
+    def __init__(self, tools, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, timeouts=None):
+        self.tools_by_name = {t.name: t for t in tools}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = {"turns": 0, "tool_calls": 0, "saved_seconds": 0.0, "last_turn": None}
+
+    def as_node(self, name="tools"):
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name=name)
+
+    def _timeout_for(self, call):
+        return self.timeouts.get(call["name"], self.timeout)
+
+    @staticmethod
+    def _tool_calls(state):
+        for message in reversed(state["messages"]):
+            if isinstance(message, AIMessage):
+                return message.tool_calls
+        return []
+
+    def _record(self, calls, durations, elapsed):
+        sequential = sum(durations)
+        turn = {
+            "tool_calls": len(calls),
+            "tools": [call["name"] for call in calls],
+            "elapsed_seconds": elapsed,
+            "sequential_seconds": sequential,
+            "saved_seconds": max(0.0, sequential - elapsed),
+        }
+        with self._stats_lock:
+            self._stats["turns"] += 1
+            self._stats["tool_calls"] += len(calls)
+            self._stats["saved_seconds"] += turn["saved_seconds"]
+            self._stats["last_turn"] = turn
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    # sync
+
+    def _call_sync(self, call, config):
+        try:
+            return self.tools_by_name[call["name"]].invoke({**call, "type": "tool_call"}, config)
+        except Exception as e:
+            return _error_message(call, repr(e))
+
+    def _start(self, call, config):
+        if call["name"] not in self.tools_by_name:
+            return None
+        return _Running(self._slots, lambda: self._call_sync(call, config))
+
+    def _finish(self, call, running):
+        if running is None:
+            return _error_message(call, f"{call['name']} is not a valid tool"), 0.0
+        timeout = self._timeout_for(call)
+        if running.wait(timeout):
+            return running.result, running.duration
+        return _error_message(call, f"{call['name']} timed out after {timeout}s"), timeout
+
+    def invoke(self, state, config):
+        calls = self._tool_calls(state)
+        start = time.perf_counter()
+        running = [self._start(call, config) for call in calls]
+        results = [self._finish(call, handle) for call, handle in zip(calls, running)]
+        self._record(calls, [duration for _, duration in results], time.perf_counter() - start)
+        return {"messages": [message for message, _ in results]}
+
+    # async
+
+    async def _run_async(self, call, config, limit):
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None or getattr(tool, "coroutine", None) is None:
+            # sync tools share the worker threads and slots of ``invoke``
+            return await asyncio.to_thread(self._finish, call, self._start(call, config))
+        async with limit:
+            start = time.perf_counter()
+            try:
+                message = await asyncio.wait_for(
+                    tool.ainvoke({**call, "type": "tool_call"}, config), self._timeout_for(call)
+                )
+            except asyncio.TimeoutError:
+                message = _error_message(call, f"{call['name']} timed out after {self._timeout_for(call)}s")
+            except Exception as e:
+                message = _error_message(call, repr(e))
+            return message, time.perf_counter() - start
+
+    async def ainvoke(self, state, config):
+        calls = self._tool_calls(state)
+        limit = asyncio.Semaphore(self.max_concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._run_async(call, config, limit) for call in calls))
+        self._record(calls, [duration for _, duration in results], time.perf_counter() - start)
+        return {"messages": [message for message, _ in results]}
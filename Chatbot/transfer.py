@@ -0,0 +1,262 @@
+"""Bulk export / import of conversations.
+
+Streams threads out of ``chatbot.db`` as newline-delimited JSON (optionally
+gzipped) or Parquet, and back into any checkpoint database, for backups or to
+move conversations between nodes::
+
+    python transfer.py export backup.ndjson.gz --user alice
+    python transfer.py export backup.parquet --since 2026-01-01
+    python transfer.py import backup.ndjson.gz --db other.db
+
+The stream is one ``thread`` record (owner, timestamps, rolling summary)
+followed by one ``message`` record per message, serialized with
+``message_to_dict``. Only one thread is held in memory at a time on either
+side, so the size of the dump does not matter.
+
+Imports write the latest state of each thread as a single checkpoint, grouped
+into transactions with ``PooledSqliteSaver.batch()``. Threads that already
+exist are skipped unless ``replace=True``, so an interrupted import can simply
+be run again. Run imports while the app is stopped when replacing threads it
+may have cached.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from itertools import islice
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langgraph.checkpoint.base import empty_checkpoint
+
+from sqlite_pool import PooledSqliteSaver
+from thread_registry import DEFAULT_USER, ThreadRegistry
+
+# Threads fetched from the registry per page
+PAGE_SIZE = 500
+# Records per Parquet row group
+PARQUET_ROWS = 10_000
+# ChatState keys besides messages that travel with a thread
+STATE_KEYS = ("summary", "summarized_count")
+
+
+# -------------------
+# Export
+# -------------------
+
+def iter_threads(registry, user_id=None, thread_ids=None, active_since=None):
+    """Registry rows to export: the given ids, or all (of ``user_id``), newest first."""
+    if thread_ids:
+        for thread_id in thread_ids:
+            thread = registry.get_thread(thread_id)
+            if thread is not None:
+                yield thread
+        return
+    cursor = None
+    while True:
+        threads, cursor = registry.list_threads(limit=PAGE_SIZE, cursor=cursor, user_id=user_id)
+        for thread in threads:
+            if active_since and thread["last_active_at"] < active_since:
+                return
+            yield thread
+        if cursor is None:
+            return
+
+
+def export_records(saver, registry, user_id=None, thread_ids=None, active_since=None):
+    """Yield the records of every selected thread, reading one checkpoint at a time."""
+    for thread in iter_threads(registry, user_id, thread_ids, active_since):
+        thread_id = thread["thread_id"]
+        latest = saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        if latest is None:
+            continue
+        values = latest.checkpoint["channel_values"]
+        messages = values.get("messages", [])
+        yield {
+            "kind": "thread",
+            "thread_id": thread_id,
+            "user_id": thread["user_id"],
+            "created_at": thread["created_at"],
+            "last_active_at": thread["last_active_at"],
+            "title": thread["title"],
+            "message_count": len(messages),
+            **{key: values.get(key) for key in STATE_KEYS},
+        }
+        for seq, message in enumerate(messages):
+            yield {"kind": "message", "thread_id": thread_id, "seq": seq, "message": message_to_dict(message)}
+
+
+# -------------------
+# Import
+# -------------------
+
+def group_threads(records):
+    """``(thread_record, message_dicts)`` pairs from a record stream, one thread at a time."""
+    thread, messages = None, []
+    for record in records:
+        if record["kind"] == "thread":
+            if thread is not None:
+                yield thread, messages
+            thread, messages = record, []
+        elif record["kind"] == "message":
+            if thread is None or record["thread_id"] != thread["thread_id"]:
+                raise ValueError(f"message for thread {record['thread_id']} outside its thread record")
+            messages.append(record["message"])
+    if thread is not None:
+        yield thread, messages
+
+
+def write_thread(saver, registry, thread, messages, replace=False):
+    """Store one thread as a single root checkpoint. Returns False if it was skipped."""
+    thread_id = thread["thread_id"]
+    user_id = thread.get("user_id") or DEFAULT_USER
+    if registry.owner(thread_id) is not None:
+        if not replace:
+            return False
+        saver.delete_thread(thread_id)
+        registry.forget(thread_id)
+
+    values = {"messages": messages_from_dict(messages)}
+    values.update({key: thread[key] for key in STATE_KEYS if thread.get(key) is not None})
+    version = saver.get_next_version(None, None)
+    checkpoint = empty_checkpoint()
+    checkpoint["ts"] = thread["last_active_at"]
+    checkpoint["channel_values"] = values
+    checkpoint["channel_versions"] = {key: version for key in values}
+    saver.put(
+        {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}},
+        checkpoint,
+        {"source": "import", "step": -1, "parents": {}, "user_id": user_id},
+        checkpoint["channel_versions"],
+    )
+    registry.record(thread_id, checkpoint, user_id, created_at=thread.get("created_at"), commit=False)
+    return True
+
+
+def import_records(saver, registry, records, replace=False):
+    """Write every thread in ``records``; returns counts of what was imported and skipped."""
+    stats = {"threads": 0, "messages": 0, "skipped": 0}
+    with saver.batch():
+        for thread, messages in group_threads(records):
+            if write_thread(saver, registry, thread, messages, replace=replace):
+                stats["threads"] += 1
+                stats["messages"] += len(messages)
+            else:
+                stats["skipped"] += 1
+    return stats
+
+
+# -------------------
+# Formats
+# -------------------
+
+def _open_text(path, mode):
+    if path == "-":
+        return sys.stdout if mode == "w" else sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_ndjson(records, path):
+    count = 0
+    out = _open_text(path, "w")
+    try:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False, default=str))
+            out.write("\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
+
+
+def read_ndjson(path):
+    src = _open_text(path, "r")
+    try:
+        for line in src:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export/import needs pyarrow: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+
+def write_parquet(records, path, rows_per_group=PARQUET_ROWS):
+    """Columns ``kind`` and ``thread_id`` for filtering, the record itself as JSON in ``data``."""
+    pa, pq = _pyarrow()
+    schema = pa.schema([("kind", pa.string()), ("thread_id", pa.string()), ("data", pa.string())])
+    count = 0
+    records = iter(records)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        while chunk := list(islice(records, rows_per_group)):
+            writer.write_table(pa.Table.from_pydict(
+                {
+                    "kind": [r["kind"] for r in chunk],
+                    "thread_id": [r["thread_id"] for r in chunk],
+                    "data": [json.dumps(r, ensure_ascii=False, default=str) for r in chunk],
+                },
+                schema=schema,
+            ))
+            count += len(chunk)
+    return count
+
+
+def read_parquet(path):
+    _, pq = _pyarrow()
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_ROWS, columns=["data"]):
+        for data in batch.column(0).to_pylist():
+            yield json.loads(data)
+
+
+def _is_parquet(path, fmt):
+    return fmt == "parquet" or (fmt is None and path.endswith(".parquet"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import chatbot conversations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="write threads to NDJSON (.gz) or Parquet")
+    export.add_argument("path", help="output file, or - for stdout")
+    export.add_argument("--user", help="only this user's threads")
+    export.add_argument("--thread", action="append", dest="threads", help="thread id (repeatable)")
+    export.add_argument("--since", help="only threads active since this ISO timestamp")
+
+    load = sub.add_parser("import", help="read threads written by export")
+    load.add_argument("path", help="input file, or - for stdin")
+    load.add_argument("--replace", action="store_true", help="overwrite threads that already exist")
+
+    for command in (export, load):
+        command.add_argument("--db", default="chatbot.db")
+        command.add_argument("--format", choices=["ndjson", "parquet"])
+    args = parser.parse_args(argv)
+
+    saver = PooledSqliteSaver(args.db, readers=1)
+    registry = ThreadRegistry(saver.conn, lock=saver.lock)
+    try:
+        if args.command == "export":
+            records = export_records(saver, registry, args.user, args.threads, args.since)
+            write = write_parquet if _is_parquet(args.path, args.format) else write_ndjson
+            stats = {"records": write(records, args.path)}
+        else:
+            read = read_parquet if _is_parquet(args.path, args.format) else read_ndjson
+            stats = import_records(saver, registry, read(args.path), replace=args.replace)
+    finally:
+        saver.close()
+    # stdout may be carrying the export itself
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import { Task, TaskCompletionHistory } from '@/models';
 import { awardPoints } from '@/lib/points';
 import { getAuthenticatedUserId } from '@/lib/auth-utils';
 import dbConnect from '@/lib/db';
+import { invalidateChatbotTasks, sendChatbotTaskEvent } from '@/lib/chatbot-sync';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
@@ -41,6 +42,7 @@ export async function DELETE(
 
     // Delete the task
     await Task.deleteOne({ _id: new ObjectId(params.id) });
+    await sendChatbotTaskEvent(userId.toString(), 'deleted', { id: params.id });
 
     return NextResponse.json({ message: 'Task deleted successfully' });
   } catch (error) {
@@ -173,6 +175,8 @@ export async function PUT(
       }
     }
 
+    await invalidateChatbotTasks(userId.toString());
+
     return NextResponse.json(updatedTask);
   } catch (error) {
     console.error('Error updating task:', error);
@@ -296,6 +300,8 @@ export async function PATCH(
       }
     }
 
+    await invalidateChatbotTasks(userId.toString());
+
     return NextResponse.json(updatedTask);
   } catch (error) {
     console.error('Error updating task:', error);
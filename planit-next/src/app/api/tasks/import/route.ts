@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server';
 import { Task } from '@/models';
 import { getAuthenticatedUserId } from '@/lib/auth-utils';
 import dbConnect from '@/lib/db';
+import { invalidateChatbotTasks } from '@/lib/chatbot-sync';
 
 // Keep runtime consistent with other task routes
 export const runtime = 'nodejs';
@@ -127,6 +128,10 @@ export async function POST(request: Request) {
       createdCount++;
     }
 
+    if (createdCount) {
+      await invalidateChatbotTasks(userId.toString());
+    }
+
     return NextResponse.json(
       { message: 'Tasks imported successfully', count: createdCount },
       { status: 201 }
@@ -3,6 +3,7 @@ import { Task } from '@/models';
 import { getAuthenticatedUserId } from '@/lib/auth-utils';
 import dbConnect from '@/lib/db';
 import { awardPoints } from '@/lib/points';
+import { invalidateChatbotTasks } from '@/lib/chatbot-sync';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
@@ -29,6 +30,7 @@ export async function GET(request: Request) {
     });
 
     // Check each task to see if it's overdue based on date and time
+    let markedOverdue = 0;
     for (const task of potentiallyOverdueTasks) {
       let isOverdue = false;
       
@@ -60,6 +62,7 @@ export async function GET(request: Request) {
       if (isOverdue) {
         console.log(`[MARKING OVERDUE] Task: ${task.title} - Deducting 5 coins`);
         await Task.findByIdAndUpdate(task._id, { status: 'overdue' });
+        markedOverdue++;
         
         // Deduct 5 coins for missing deadline
         try {
@@ -75,6 +78,11 @@ export async function GET(request: Request) {
       }
     }
 
+    // The chatbot's own fetches (internalUserId) already see the new statuses
+    if (markedOverdue && !internalUserId) {
+      await invalidateChatbotTasks(userId.toString());
+    }
+
     // Parse query parameters for filtering
     const { searchParams } = new URL(request.url);
     const query = searchParams.get('q');
@@ -151,6 +159,8 @@ export async function POST(request: Request) {
       endTime: endTime || null,
     });
 
+    await invalidateChatbotTasks(userId.toString());
+
     return NextResponse.json(task, { status: 201 });
   } catch (error) {
     console.error('Error creating task:', error);
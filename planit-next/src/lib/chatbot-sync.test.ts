@@ -0,0 +1,63 @@
+/**
+ * @jest-environment node
+ */
+/**
+ * Unit tests for chatbot task cache notifications
+ */
+
+import { invalidateChatbotTasks, sendChatbotTaskEvent } from './chatbot-sync';
+
+describe('chatbot-sync', () => {
+  const originalUrl = process.env.CHATBOT_API_URL;
+  const mockFetch = jest.fn();
+
+  beforeEach(() => {
+    mockFetch.mockReset();
+    mockFetch.mockResolvedValue({ ok: true, status: 204 });
+    (global as any).fetch = mockFetch;
+    process.env.CHATBOT_API_URL = 'http://chatbot:8000/';
+  });
+
+  afterAll(() => {
+    process.env.CHATBOT_API_URL = originalUrl;
+  });
+
+  it('does nothing when CHATBOT_API_URL is not set', async () => {
+    delete process.env.CHATBOT_API_URL;
+
+    await invalidateChatbotTasks('user123');
+
+    expect(mockFetch).not.toHaveBeenCalled();
+  });
+
+  it('posts an invalidation with the user id', async () => {
+    await invalidateChatbotTasks('user123');
+
+    expect(mockFetch).toHaveBeenCalledWith(
+      'http://chatbot:8000/tasks/invalidate',
+      expect.objectContaining({
+        method: 'POST',
+        headers: { 'x-user-id': 'user123' },
+      })
+    );
+  });
+
+  it('posts a task event as JSON', async () => {
+    await sendChatbotTaskEvent('user123', 'deleted', { id: 'task1' });
+
+    const [url, init] = mockFetch.mock.calls[0];
+    expect(url).toBe('http://chatbot:8000/tasks/events');
+    expect(init.headers['Content-Type']).toBe('application/json');
+    expect(JSON.parse(init.body)).toEqual({ type: 'deleted', task: { id: 'task1' } });
+  });
+
+  it('swallows errors so the task write still succeeds', async () => {
+    const consoleSpy = jest.spyOn(console, 'error').mockImplementation();
+    mockFetch.mockRejectedValue(new Error('connection refused'));
+
+    await expect(invalidateChatbotTasks('user123')).resolves.toBeUndefined();
+
+    expect(consoleSpy).toHaveBeenCalled();
+    consoleSpy.mockRestore();
+  });
+});
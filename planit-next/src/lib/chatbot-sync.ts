@@ -0,0 +1,43 @@
+/**
+ * Keeps the Python chatbot's task cache (Chatbot/task_client.py) in step with
+ * task writes. The chatbot caches each user's task list for up to 30 seconds;
+ * after a write, the task routes tell it to drop that copy (or to apply a
+ * delete directly) so its next answer sees the change.
+ *
+ * Enabled by CHATBOT_API_URL (e.g. http://localhost:8000). Without it, or if
+ * the chatbot is down, the write still succeeds and the chatbot catches up
+ * when its cache expires.
+ */
+
+const NOTIFY_TIMEOUT_MS = 1000;
+
+type TaskEventType = 'created' | 'updated' | 'completed' | 'deleted';
+
+async function post(path: string, userId: string, body?: unknown) {
+  const baseUrl = process.env.CHATBOT_API_URL;
+  if (!baseUrl) return;
+
+  try {
+    await fetch(`${baseUrl.replace(/\/$/, '')}${path}`, {
+      method: 'POST',
+      headers: {
+        'x-user-id': userId,
+        ...(body === undefined ? {} : { 'Content-Type': 'application/json' }),
+      },
+      body: body === undefined ? undefined : JSON.stringify(body),
+      signal: AbortSignal.timeout(NOTIFY_TIMEOUT_MS),
+    });
+  } catch (e) {
+    console.error('Error notifying chatbot of task change:', e);
+  }
+}
+
+/** Drop the chatbot's cached task list for this user; it refetches on the next question. */
+export function invalidateChatbotTasks(userId: string) {
+  return post('/tasks/invalidate', userId);
+}
+
+/** Apply one task change to the chatbot's cached task list without a refetch. */
+export function sendChatbotTaskEvent(userId: string, type: TaskEventType, task: { id: string }) {
+  return post('/tasks/events', userId, { type, task });
+}